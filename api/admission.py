@@ -0,0 +1,218 @@
+import os
+import math
+import time
+import heapq
+import asyncio
+import itertools
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+
+
+# =========================================================
+# CONFIG
+# =========================================================
+ADMISSION_ENABLED = os.getenv("SHL_ADMISSION", "1") == "1"
+
+# Cost units running at once (a short query costs 1) and requests waiting
+MAX_IN_FLIGHT = int(os.getenv("SHL_MAX_IN_FLIGHT", "8"))
+MAX_QUEUE = int(os.getenv("SHL_MAX_QUEUE", "64"))
+
+# A queued request that is not admitted within this gets a 503
+QUEUE_TIMEOUT_S = float(os.getenv("SHL_QUEUE_TIMEOUT_S", "5"))
+
+# Cost-based priority: every COST_CHARS of query text costs one more unit,
+# and each extra unit queues the request as if it arrived PENALTY_S later
+# (long JDs yield to short queries but are not starved)
+COST_PRIORITY = os.getenv("SHL_ADMISSION_COST", "0") == "1"
+COST_CHARS = int(os.getenv("SHL_ADMISSION_COST_CHARS", "2000"))
+COST_PENALTY_S = float(os.getenv("SHL_ADMISSION_COST_PENALTY_S", "0.25"))
+
+
+def query_cost(query: str) -> int:
+    if not COST_PRIORITY:
+        return 1
+    # Never more than the whole capacity, or it could not be admitted
+    return min(1 + len(query) // COST_CHARS, MAX_IN_FLIGHT)
+
+
+# =========================================================
+# CONTROLLER (ONE PER WORKER, EVENT-LOOP SIDE)
+# =========================================================
+class _Waiter:
+    __slots__ = ("cost", "future", "enqueued")
+
+    def __init__(self, cost: int, future: asyncio.Future):
+        self.cost = cost
+        self.future = future
+        self.enqueued = time.perf_counter()
+
+
+class AdmissionController:
+    """
+    Bounds the work a worker accepts: at most max_in_flight cost units
+    run (in the threadpool) at once, at most max_queue requests wait.
+    Anything beyond is rejected immediately (429); a request that waits
+    longer than queue_timeout_s is dropped (503). Both carry Retry-After.
+    All state lives on the event loop, so no locks are needed.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = MAX_IN_FLIGHT,
+        max_queue: int = MAX_QUEUE,
+        queue_timeout_s: float = QUEUE_TIMEOUT_S,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout_s = queue_timeout_s
+
+        self.used = 0
+        self.running = 0
+        self.queue: List[tuple] = []  # (priority, seq, waiter)
+        self.waiting = 0
+        self.seq = itertools.count()
+
+        # Seconds per request, for Retry-After
+        self.service_s: Optional[float] = None
+        self.stats = {
+            "admitted": 0,
+            "queued": 0,
+            "rejected_queue_full": 0,
+            "rejected_timeout": 0,
+            "max_queue_depth": 0,
+            "queue_wait_ms_total": 0.0,
+        }
+
+    # ---- capacity ----
+    def _fits(self, cost: int) -> bool:
+        # A lone request always runs, whatever its cost
+        return self.used == 0 or self.used + cost <= self.max_in_flight
+
+    def _take(self, cost: int) -> None:
+        self.used += cost
+        self.running += 1
+        self.stats["admitted"] += 1
+
+    def _release(self, cost: int, elapsed_s: float) -> None:
+        self.used -= cost
+        self.running -= 1
+        if self.service_s is None:
+            self.service_s = elapsed_s
+        else:
+            self.service_s = 0.9 * self.service_s + 0.1 * elapsed_s
+        self._wake()
+
+    def _wake(self) -> None:
+        """Admit waiters in priority order while the head fits."""
+        while self.queue:
+            _, _, waiter = self.queue[0]
+            if waiter.future.done():
+                # Timed out or cancelled: drop it
+                heapq.heappop(self.queue)
+                continue
+            if not self._fits(waiter.cost):
+                return
+            heapq.heappop(self.queue)
+            self.waiting -= 1
+            self._take(waiter.cost)
+            waiter.future.set_result(True)
+
+    def retry_after_s(self) -> int:
+        """Rough time for the current backlog to drain."""
+        service_s = self.service_s or 1.0
+        backlog = (self.running + self.waiting) / max(1, self.max_in_flight)
+        return max(1, math.ceil(backlog * service_s))
+
+    def _reject(self, status_code: int, reason: str) -> HTTPException:
+        return HTTPException(
+            status_code=status_code,
+            detail=f"Server overloaded: {reason}",
+            headers={"Retry-After": str(self.retry_after_s())},
+        )
+
+    # ---- admission ----
+    async def acquire(self, cost: int) -> None:
+        # Queue-jumping is not allowed while others wait
+        if self.waiting == 0 and self._fits(cost):
+            self._take(cost)
+            return
+
+        if self.waiting >= self.max_queue:
+            self.stats["rejected_queue_full"] += 1
+            raise self._reject(429, "queue full")
+
+        waiter = _Waiter(cost, asyncio.get_running_loop().create_future())
+        priority = waiter.enqueued
+        if COST_PRIORITY:
+            priority += (cost - 1) * COST_PENALTY_S
+        heapq.heappush(self.queue, (priority, next(self.seq), waiter))
+        self.waiting += 1
+        self.stats["queued"] += 1
+        self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], self.waiting)
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout_s)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.future.done():
+                # Admitted in the same tick the wait ended: give it back
+                self._release(cost, 0.0)
+            else:
+                waiter.future.cancel()
+                self.waiting -= 1
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.stats["rejected_timeout"] += 1
+            raise self._reject(503, "queue timeout")
+        finally:
+            wait_ms = (time.perf_counter() - waiter.enqueued) * 1000.0
+            self.stats["queue_wait_ms_total"] += wait_ms
+
+    @asynccontextmanager
+    async def admit(self, cost: int = 1):
+        await self.acquire(cost)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._release(cost, time.perf_counter() - start)
+
+    def to_dict(self) -> Dict[str, Any]:
+        queued = self.stats["queued"]
+        stats = {k: v for k, v in self.stats.items() if k != "queue_wait_ms_total"}
+        return {
+            "enabled": ADMISSION_ENABLED,
+            "in_flight": self.running,
+            "in_flight_cost": self.used,
+            "queue_depth": self.waiting,
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            **stats,
+            "rejected": stats["rejected_queue_full"] + stats["rejected_timeout"],
+            "avg_queue_wait_ms": (
+                round(self.stats["queue_wait_ms_total"] / queued, 3) if queued else 0.0
+            ),
+            "service_ms": (
+                None if self.service_s is None else round(self.service_s * 1000.0, 3)
+            ),
+        }
+
+
+_controller = AdmissionController()
+
+
+def admit(query: str):
+    """Slot for one /recommend request (no-op when admission is disabled)."""
+    if not ADMISSION_ENABLED:
+        return _noop()
+    return _controller.admit(query_cost(query))
+
+
+@asynccontextmanager
+async def _noop():
+    yield
+
+
+def get_stats() -> Dict[str, Any]:
+    return _controller.to_dict()
@@ -0,0 +1,451 @@
+import os
+import csv
+import sys
+import json
+import time
+import hashlib
+import argparse
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Offline: wait for a Groq rate-limit slot (and sit out 429 back-offs) instead of
+# shedding the query to the default intent (read when llm_client is imported)
+os.environ.setdefault("GROQ_ACQUIRE_TIMEOUT_S", "300")
+os.environ.setdefault("GROQ_RETRY_BUDGET_S", "300")
+
+from tqdm import tqdm
+
+from retrieval import search as retrieval
+from retrieval.candidates import Candidates
+from retrieval.catalog import get_catalog
+from retrieval.catalogs import use_catalog
+from retrieval.process import preprocess_query
+from reranking.llm_client import MAX_CONCURRENCY
+from reranking.query_understanding import extract_intents_batch, get_llm_stats
+from reranking.reranker import rerank
+from api.pipeline import TOP_K_RETRIEVAL
+from api.warm_cache import store_version
+
+
+# =========================================================
+# CONFIG
+# =========================================================
+# Queries per chunk: one encode + one FAISS call, and the checkpoint unit
+BATCH_CHUNK_SIZE = int(os.getenv("SHL_BATCH_CHUNK_SIZE", "256"))
+
+# Packed LLM calls kept in flight (GROQ_RPM / GROQ_MAX_CONCURRENCY still cap)
+BATCH_INTENT_WORKERS = int(os.getenv("SHL_BATCH_INTENT_WORKERS", str(MAX_CONCURRENCY)))
+
+OUTPUT_FORMATS = (".csv", ".jsonl")
+JOURNAL_SUFFIX = ".journal"
+
+# Leading input bytes hashed into the journal header (see input_fingerprint)
+INPUT_HEAD_BYTES = 1 << 20
+
+CSV_FIELDS = ["index", "id", "rank", "assessment_id", "url", "final_score"]
+
+
+# =========================================================
+# INPUT (STREAMED)
+# =========================================================
+Record = Tuple[str, Optional[str]]  # (query, id)
+
+
+def input_fingerprint(path: Path) -> Dict:
+    """
+    Size, mtime and a hash of the first INPUT_HEAD_BYTES: a file replaced
+    or appended to at the same path no longer matches its journal.
+    """
+    path = Path(path)
+    stat = path.stat()
+    with open(path, "rb") as f:
+        head = hashlib.sha256(f.read(INPUT_HEAD_BYTES)).hexdigest()
+    return {
+        "input": str(path.resolve()),
+        "input_size": stat.st_size,
+        "input_mtime_ns": stat.st_mtime_ns,
+        "input_head_sha256": head,
+    }
+
+
+def _column(names: Iterable[str], wanted: str) -> str:
+    """Case-insensitive column lookup (the dataset sheets use "Query")."""
+    names = [n for n in names if n]
+    for name in names:
+        if name.strip().lower() == wanted.strip().lower():
+            return name
+    raise ValueError(f"Column {wanted!r} not found in {names}")
+
+
+def _read_csv(path: Path, column: str, id_column: Optional[str]):
+    # Whole JDs in one cell exceed the 128 KiB default
+    csv.field_size_limit(min(sys.maxsize, 2**31 - 1))
+    delimiter = "\t" if path.suffix.lower() == ".tsv" else ","
+
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f, delimiter=delimiter)
+        query_col = _column(reader.fieldnames or [], column)
+        id_col = _column(reader.fieldnames, id_column) if id_column else None
+        for row in reader:
+            yield row[query_col] or "", row[id_col] if id_col else None
+
+
+def _read_jsonl(path: Path, column: str, id_column: Optional[str]):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            if not isinstance(record, dict):
+                # Still a record: keeps indices aligned with the input lines
+                yield "", None
+                continue
+            record_id = record.get(id_column) if id_column else None
+            yield str(record.get(column) or ""), (
+                None if record_id is None else str(record_id)
+            )
+
+
+def _read_parquet(path: Path, column: str, id_column: Optional[str]):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("Parquet input needs pyarrow (pip install pyarrow)") from e
+
+    parquet = pq.ParquetFile(path)
+    query_col = _column(parquet.schema_arrow.names, column)
+    id_col = _column(parquet.schema_arrow.names, id_column) if id_column else None
+    columns = [query_col] + ([id_col] if id_col and id_col != query_col else [])
+
+    # One record batch in memory at a time
+    for batch in parquet.iter_batches(batch_size=BATCH_CHUNK_SIZE, columns=columns):
+        data = batch.to_pydict()
+        ids = data[id_col] if id_col else itertools.repeat(None)
+        for query, record_id in zip(data[query_col], ids):
+            yield query or "", None if record_id is None else str(record_id)
+
+
+def read_records(
+    path: Path, column: str = "query", id_column: Optional[str] = None
+) -> Iterator[Record]:
+    """
+    (query, id) per input record, streamed: .csv / .tsv, .jsonl /
+    .ndjson or .parquet. Records without a query are kept (no results)
+    so record numbers stay stable across runs.
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix in (".csv", ".tsv"):
+        return _read_csv(path, column, id_column)
+    if suffix in (".jsonl", ".ndjson"):
+        return _read_jsonl(path, column, id_column)
+    if suffix == ".parquet":
+        return _read_parquet(path, column, id_column)
+    raise ValueError(f"Unsupported input format {path.suffix!r} (csv, jsonl, parquet)")
+
+
+def chunked(records: Iterable, size: int) -> Iterator[List]:
+    it = iter(records)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# =========================================================
+# OUTPUT (APPENDED PER CHUNK)
+# =========================================================
+class ResultWriter:
+    """
+    .csv: one row per recommendation (CSV_FIELDS).
+    .jsonl: one line per query, {"index", "id", "results": [...]}.
+    Opened at resume_bytes (the last checkpoint), dropping anything a
+    crashed run wrote after it.
+    """
+
+    def __init__(self, path: Path, resume_bytes: Optional[int] = None):
+        self.path = Path(path)
+        self.format = self.path.suffix.lower()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if resume_bytes is not None:
+            size = self.path.stat().st_size if self.path.exists() else -1
+            if size < resume_bytes:
+                raise RuntimeError(
+                    f"Cannot resume: {self.path} is missing or shorter than "
+                    f"its last checkpoint ({resume_bytes} bytes)"
+                )
+            with open(self.path, "rb+") as f:
+                f.truncate(resume_bytes)
+            self.file = open(self.path, "a", encoding="utf-8", newline="")
+        else:
+            self.file = open(self.path, "w", encoding="utf-8", newline="")
+
+        if self.format == ".csv":
+            self.csv = csv.writer(self.file)
+            if self.file.tell() == 0:
+                self.csv.writerow(CSV_FIELDS)
+
+    def write(
+        self, index: int, record_id: Optional[str], reranked: Candidates, store
+    ) -> int:
+        results = []
+        for i, row in enumerate(reranked.rows.tolist()):
+            results.append(
+                {
+                    "assessment_id": store.assessment_id(row),
+                    "url": store.get("url", row),
+                    "final_score": round(float(reranked.final_score[i]), 4),
+                }
+            )
+
+        if self.format == ".jsonl":
+            line = {"index": index, "id": record_id, "results": results}
+            self.file.write(json.dumps(line, ensure_ascii=False) + "\n")
+        else:
+            for rank, r in enumerate(results, start=1):
+                row = [index, record_id, rank, r["assessment_id"], r["url"]]
+                self.csv.writerow(row + [r["final_score"]])
+        return len(results)
+
+    def sync(self) -> int:
+        """Flush to disk; returns the durable size in bytes."""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return os.fstat(self.file.fileno()).st_size
+
+    def close(self) -> None:
+        if not self.file.closed:
+            self.sync()
+            self.file.close()
+
+
+# =========================================================
+# CHECKPOINT
+# =========================================================
+class BatchJournal:
+    """
+    Append-only JSONL next to the output: a header describing the run
+    (input fingerprint, columns, index / intent versions), then {"next",
+    "output_bytes"} after each chunk is durably written. Resume skips
+    `next` input records and cuts the output back to output_bytes.
+    """
+
+    def __init__(self, path: Path, header: Dict, resume: bool = False):
+        self.path = Path(path)
+        self.checkpoint = {"next": 0, "output_bytes": None}
+
+        entries = list(_read_entries(self.path)) if resume else []
+        if entries:
+            if entries[0] != header:
+                raise RuntimeError(
+                    f"Cannot resume: {self.path} was written for a different "
+                    f"input, settings or index ({entries[0]} != {header})"
+                )
+            checkpoints = [e for e in entries[1:] if "next" in e]
+            if checkpoints:
+                self.checkpoint = checkpoints[-1]
+
+        # Compacted rewrite (also drops a torn last line), swapped in whole
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps(header) + "\n")
+            if self.checkpoint["output_bytes"] is not None:
+                f.write(json.dumps(self.checkpoint) + "\n")
+        os.replace(tmp, self.path)
+
+        self.file = open(self.path, "a", encoding="utf-8")
+
+    @property
+    def done(self) -> int:
+        return self.checkpoint["next"]
+
+    @property
+    def output_bytes(self) -> Optional[int]:
+        return self.checkpoint["output_bytes"]
+
+    def commit(self, next_record: int, output_bytes: int) -> None:
+        self.checkpoint = {"next": next_record, "output_bytes": output_bytes}
+        self.file.write(json.dumps(self.checkpoint) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def _read_entries(path: Path):
+    if not path.exists():
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+# =========================================================
+# SCORING
+# =========================================================
+def retrieve_chunk(queries: List[str]) -> List[Candidates]:
+    """Rerank pools for many queries: one encode and one FAISS call."""
+    clean = [preprocess_query(q) for q in queries]
+    todo = [i for i, c in enumerate(clean) if c]
+
+    q_vecs = retrieval.encode_queries([clean[i] for i in todo])
+    tokens = [retrieval.query_tokens(clean[i]) for i in todo]
+
+    pools = [Candidates.empty() for _ in queries]
+    for i, hits in zip(todo, retrieval.search_hits_batch(q_vecs, tokens)):
+        pools[i] = retrieval.fuse_candidates(*hits).head(TOP_K_RETRIEVAL)
+    return pools
+
+
+def score_chunk(queries: List[str], intents_future, final_k: int) -> List[Candidates]:
+    """Retrieval runs while the chunk's LLM calls are in flight."""
+    pools = retrieve_chunk(queries)
+    intents = intents_future.result()
+    return [
+        rerank(query, pool, final_k=final_k, intent=intent) if len(pool) else pool
+        for query, pool, intent in zip(queries, pools, intents)
+    ]
+
+
+# =========================================================
+# RUN
+# =========================================================
+def run_batch(
+    input_path: Path,
+    output_path: Path,
+    column: str = "query",
+    id_column: Optional[str] = None,
+    final_k: int = 10,
+    chunk_size: int = BATCH_CHUNK_SIZE,
+    intent_workers: int = BATCH_INTENT_WORKERS,
+    resume: bool = False,
+    catalog: Optional[str] = None,
+) -> Dict:
+    """
+    Score every query of input_path into output_path, chunk by chunk.
+    Memory holds at most two chunks; a killed run continues from its
+    last checkpoint with resume=True.
+    """
+    if Path(output_path).suffix.lower() not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format {Path(output_path).suffix!r}")
+
+    with use_catalog(catalog):
+        store = get_catalog()
+        header = {
+            **input_fingerprint(input_path),
+            "column": column,
+            "id_column": id_column,
+            "output_format": Path(output_path).suffix.lower(),
+            **store_version(final_k),
+        }
+        journal = BatchJournal(
+            Path(str(output_path) + JOURNAL_SUFFIX), header, resume=resume
+        )
+        writer = ResultWriter(output_path, journal.output_bytes)
+        if journal.done:
+            print(f"🔹 Resuming after {journal.done} records")
+
+        records = itertools.islice(
+            read_records(input_path, column, id_column), journal.done, None
+        )
+        stats = {"records": journal.done, "scored": 0, "results": 0}
+        start = time.perf_counter()
+        progress = tqdm(initial=journal.done, unit="q", desc="🔹 Scoring")
+
+        def flush(chunk, unique, intents_future):
+            scored = score_chunk(unique, intents_future, final_k)
+            by_query = dict(zip(unique, scored))
+            for index, (query, record_id) in chunk:
+                reranked = by_query[query]
+                stats["results"] += writer.write(index, record_id, reranked, store)
+            stats["records"] = chunk[-1][0] + 1
+            stats["scored"] += len(chunk)
+            journal.commit(stats["records"], writer.sync())
+            progress.update(len(chunk))
+
+        # Intents of the next chunk are requested while this one is scored
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="shl-intent") as llm:
+            pending = deque()
+            numbered = enumerate(records, start=journal.done)
+            for chunk in chunked(numbered, chunk_size):
+                # Repeated JDs within a chunk are scored once
+                unique = list(dict.fromkeys(query for _, (query, _) in chunk))
+                future = llm.submit(
+                    extract_intents_batch, unique, workers=intent_workers
+                )
+                pending.append((chunk, unique, future))
+                if len(pending) > 1:
+                    flush(*pending.popleft())
+            while pending:
+                flush(*pending.popleft())
+
+        progress.close()
+        writer.close()
+        journal.close()
+
+    elapsed = time.perf_counter() - start
+    stats["elapsed_s"] = round(elapsed, 2)
+    stats["queries_per_s"] = round(stats["scored"] / elapsed, 2) if elapsed else 0.0
+    return stats
+
+
+# =========================================================
+# MAIN
+# =========================================================
+def main():
+    parser = argparse.ArgumentParser(
+        description="Score a large query file offline (streamed, resumable)"
+    )
+    parser.add_argument("input", type=Path, help=".csv / .tsv / .jsonl / .parquet")
+    parser.add_argument(
+        "--output", type=Path, required=True, help=".csv or .jsonl (appended)"
+    )
+    parser.add_argument("--column", default="query", help="query column / key")
+    parser.add_argument("--id-column", default=None, help="copied to the output")
+    parser.add_argument("--final-k", type=int, default=10)
+    parser.add_argument("--chunk-size", type=int, default=BATCH_CHUNK_SIZE)
+    parser.add_argument("--intent-workers", type=int, default=BATCH_INTENT_WORKERS)
+    parser.add_argument("--catalog", default=None, help="named catalog to score")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue from the output's journal instead of starting over",
+    )
+    args = parser.parse_args()
+
+    stats = run_batch(
+        args.input,
+        args.output,
+        column=args.column,
+        id_column=args.id_column,
+        final_k=args.final_k,
+        chunk_size=args.chunk_size,
+        intent_workers=args.intent_workers,
+        resume=args.resume,
+        catalog=args.catalog,
+    )
+
+    print(
+        f"\n✅ Scored {stats['scored']} queries in {stats['elapsed_s']}s "
+        f"({stats['queries_per_s']} q/s) -> {args.output}"
+    )
+    llm = get_llm_stats()
+    if llm.get("enabled", True):
+        shed = sum(v for k, v in llm.items() if k.startswith("shed_"))
+        print(f"📊 LLM calls: {llm['calls']}, failed: {llm['failed']}, shed: {shed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,50 @@
-from fastapi import FastAPI, HTTPException
+import os
+from contextlib import nullcontext
+from typing import Optional
+
+# Thread pools are sized when numpy / faiss / torch load: configure first
+from api import runtime
+
+runtime.configure()
+
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 
-from retrieval.search import search
-from reranking.reranker import rerank
+from retrieval.catalogs import (
+    UnknownCatalogError,
+    available_catalogs,
+    get_bundle,
+    get_index_stats,
+    use_bundle,
+)
+from retrieval.candidates import Candidates
+from api.pipeline import STAGE_WORKERS, run_pipeline
+from api import admission, semantic_cache, warm_cache
+from reranking.query_understanding import get_llm_stats
+from reranking import cross_encoder
 from api.formatter import format_assessment
 from api.schemas import RecommendResponse
-
-import json
-from pathlib import Path
-import os
-
-os.environ["TOKENIZERS_PARALLELISM"] = "false"
+from common.tracing import Trace, span, start_trace
+from api.profiler import PROFILE_HEADER, PROFILING_ENABLED, SamplingProfiler
 
 
 app = FastAPI(title="SHL Recommendation API")
 
 
-# Load canonical data once
-DATA_FILE = Path("data/processed/shl_assessments.json")
-ASSESSMENTS = {
-    a["assessment_id"]: a for a in json.loads(DATA_FILE.read_text(encoding="utf-8"))
-}
+# Canonical data: memory-mapped columnar stores, shared with retrieval.
+# The default catalog is loaded up front; named ones on first use (LRU).
+# Its warm cache (precomputed popular queries) is mapped up front too.
+with use_bundle(get_bundle()):
+    warm_cache.get_warm_store()
 
 
 class RecommendRequest(BaseModel):
     query: str
+    # Adds per-candidate score components and stage timings to the response
+    explain: bool = False
+    # Named catalog (data/catalogs/<name>); None = default catalog
+    catalog: Optional[str] = None
 
 
 @app.get("/health")
@@ -32,30 +52,99 @@ def health():
     return {"status": "ok"}
 
 
-@app.post("/recommend", response_model=RecommendResponse)
-def recommend(req: RecommendRequest):
+@app.get("/ready")
+def ready():
+    """Index loaded; reports the thread layout this worker runs with."""
+    return {
+        "status": "ready",
+        "pid": os.getpid(),
+        "runtime": runtime.get_settings(),
+        "stage_workers": STAGE_WORKERS,
+    }
+
+
+@app.get("/stats")
+def stats():
+    return {
+        "llm": get_llm_stats(),
+        "cross_encoder": cross_encoder.get_stats(),
+        "indexes": get_index_stats(),
+        "semantic_cache": semantic_cache.get_stats(),
+        "warm_cache": warm_cache.get_stats(),
+        "admission": admission.get_stats(),
+    }
+
+
+@app.get("/catalogs")
+def catalogs():
+    return {"catalogs": list(available_catalogs())}
+
+
+def explain_payload(trace: Trace, reranked: Candidates, catalog) -> dict:
+    return {
+        "timings": trace.to_dict(),
+        "intent": trace.notes.get("intent"),
+        "candidates": [
+            {
+                "rank": rank,
+                "assessment_id": c["assessment_id"],
+                "name": catalog.get("name", c["row"]),
+                "vector_score": c["vector_score"],
+                "bm25_score": c["bm25_score"],
+                "retrieval_score": c["retrieval_score"],
+                "final_score": c["final_score"],
+            }
+            for rank, c in enumerate(reranked.to_dicts(catalog), start=1)
+        ],
+    }
+
+
+@app.post(
+    "/recommend", response_model=RecommendResponse, response_model_exclude_none=True
+)
+async def recommend(
+    req: RecommendRequest,
+    profile_header: Optional[str] = Header(None, alias=PROFILE_HEADER),
+):
     query = req.query.strip()
     if not query:
         raise HTTPException(status_code=400, detail="Query cannot be empty")
 
-    # Phase-2
-    retrieved = search(query)[:50]
+    # Admitted (or rejected with 429 / 503) on the event loop, before a
+    # threadpool thread is taken: waiting requests cost no threads
+    async with admission.admit(query):
+        return await run_in_threadpool(recommend_sync, req, query, profile_header)
+
+
+def recommend_sync(req: RecommendRequest, query: str, profile_header: Optional[str]):
+    # Tracing / profiling only for requests that ask for it
+    profile = PROFILING_ENABLED and profile_header == "1"
+    trace = start_trace() if req.explain or profile else None
+    profiler = SamplingProfiler(trace.threads) if profile else None
+
+    try:
+        bundle = get_bundle(req.catalog)
+    except UnknownCatalogError:
+        raise HTTPException(status_code=404, detail=f"Unknown catalog: {req.catalog}")
 
-    # Attach metadata
-    candidates = []
-    for r in retrieved:
-        aid = r.get("assessment_id")
-        if aid in ASSESSMENTS:
-            c = ASSESSMENTS[aid].copy()
-            c["retrieval_score"] = r.get("retrieval_score", 0)
-            candidates.append(c)
+    with profiler or nullcontext(), use_bundle(bundle):
+        # Phase-2 retrieval and Phase-3 intent run concurrently, then rerank
+        reranked = run_pipeline(query, final_k=10, explain=req.explain)
 
-    if not candidates:
-        raise HTTPException(status_code=404, detail="No recommendations found")
+        if not len(reranked):
+            raise HTTPException(status_code=404, detail="No recommendations found")
 
-    # Phase-3
-    reranked = rerank(query, candidates, final_k=10)
+        # Materialize only the final k rows
+        with span("format"):
+            formatted = [
+                format_assessment(bundle.catalog.materialize(int(row)))
+                for row in reranked.rows
+            ]
 
-    formatted = [format_assessment(a) for a in reranked]
+    response = {"recommended_assessments": formatted}
+    if req.explain:
+        response["explain"] = explain_payload(trace, reranked, bundle.catalog)
+    if profiler is not None:
+        response["profile"] = profiler.to_dict()
 
-    return {"recommended_assessments": formatted}
+    return response
@@ -0,0 +1,206 @@
+import os
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Tuple
+
+from retrieval import search as retrieval
+from retrieval.candidates import Candidates
+from retrieval.process import preprocess_query
+from reranking.query_understanding import extract_intent
+from reranking.reranker import rerank
+from api import semantic_cache, warm_cache
+from common.tracing import annotate, span, traced
+
+
+# =========================================================
+# CONFIG
+# =========================================================
+TOP_K_RETRIEVAL = 50
+
+# Shared by all requests; stages block on I/O, torch or FAISS (GIL released)
+STAGE_WORKERS = int(os.getenv("SHL_STAGE_WORKERS", "16"))
+
+_executor = ThreadPoolExecutor(
+    max_workers=STAGE_WORKERS, thread_name_prefix="shl-stage"
+)
+
+
+# =========================================================
+# STAGE GRAPH
+# =========================================================
+class StageGraph:
+    """
+    Minimal DAG runner.
+    A stage is submitted as soon as all of its dependencies are done,
+    so independent stages (LLM call, encode, BM25) overlap.
+    Scheduling happens in the caller's thread: no pool thread ever
+    blocks on another stage, so the graph cannot deadlock the pool.
+    Every stage runs in a tracing span named after it, inside a copy
+    of the caller's context (so the request trace follows it).
+    An input may be a Future of a stage started earlier (submit_stage):
+    its dependents wait for it like for any other stage.
+    """
+
+    def __init__(self, executor: ThreadPoolExecutor = None):
+        self.executor = executor or _executor
+        self.stages: Dict[str, Tuple[Callable, Tuple[str, ...]]] = {}
+
+    def add(self, name: str, fn: Callable, *deps: str) -> "StageGraph":
+        self.stages[name] = (traced(name, fn), deps)
+        return self
+
+    def run(self, **inputs: Any) -> Dict[str, Any]:
+        results: Dict[str, Any] = {}
+        pending = dict(self.stages)
+        running = {}
+        for name, value in inputs.items():
+            if isinstance(value, Future):
+                running[value] = name
+            else:
+                results[name] = value
+
+        while pending or running:
+            for name, (fn, deps) in list(pending.items()):
+                if all(d in results for d in deps):
+                    args = [results[d] for d in deps]
+                    ctx = contextvars.copy_context()
+                    running[self.executor.submit(ctx.run, fn, *args)] = name
+                    del pending[name]
+
+            if not running:
+                missing = {n: d for n, (_, d) in pending.items()}
+                raise ValueError(f"Unresolvable stage dependencies: {missing}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                # Re-raises stage errors in the request thread
+                results[running.pop(future)] = future.result()
+
+        return results
+
+
+def submit_stage(name: str, fn: Callable, *args: Any) -> Future:
+    """Start one stage ahead of its graph (same pool, span and context)."""
+    ctx = contextvars.copy_context()
+    return _executor.submit(ctx.run, traced(name, fn), *args)
+
+
+# =========================================================
+# PIPELINE
+# =========================================================
+def build_candidates(retrieved: List[Dict]) -> List[Dict]:
+    """
+    Row-addressed rerank input from Phase-2 search() dicts (offline
+    callers; the request path carries a Candidates pool instead).
+    search() calls the fused score "score"; rerank reads "retrieval_score".
+    """
+    return [
+        {
+            "row": r["row"],
+            "assessment_id": r["assessment_id"],
+            "retrieval_score": r["score"],
+            "vector_score": r.get("vector_score", 0.0),
+            "bm25_score": r.get("bm25_score", 0.0),
+        }
+        for r in retrieved[:TOP_K_RETRIEVAL]
+    ]
+
+
+def _rerank_stage(query: str, final_k: int):
+    def run(retrieved: Candidates, intent):
+        annotate("intent", intent)
+        candidates = retrieved.head(TOP_K_RETRIEVAL)
+        if not len(candidates):
+            return candidates
+        return rerank(query, candidates, final_k=final_k, intent=intent)
+
+    return run
+
+
+def recommendation_graph(
+    query: str, final_k: int = 10, encoded: bool = False, intent: bool = True
+) -> StageGraph:
+    """
+    intent ──────────────────────┐
+    encode ─► vector ─┐          ├─► rerank (score + balance)
+    bm25 ─────────────┴─► fuse ──┘
+    encoded=True: the query vector is passed in as the "encode" input.
+    intent=False: the intent is passed in (e.g. a submit_stage Future).
+    """
+    graph = StageGraph()
+    if intent:
+        graph.add("intent", extract_intent, "query")
+    if not encoded:
+        graph.add("encode", retrieval.encode_query, "clean_query")
+
+    if retrieval.use_shards():
+        # Shards run vector + BM25 together behind one scatter-gather call
+        graph.add("hits", retrieval.sharded_search, "encode", "tokens")
+        graph.add("fuse", lambda hits: retrieval.fuse_candidates(*hits), "hits")
+    else:
+        graph.add("vector", retrieval.vector_search, "encode")
+        graph.add("bm25", retrieval.bm25_search, "tokens")
+        graph.add("fuse", retrieval.fuse_candidates, "vector", "bm25")
+
+    graph.add("rerank", _rerank_stage(query, final_k), "fuse", "intent")
+    return graph
+
+
+def run_pipeline(
+    query: str, final_k: int = 10, cache: bool = True, explain: bool = False
+) -> Candidates:
+    """
+    Retrieval and intent extraction run concurrently;
+    latency ≈ max(LLM, retrieval) + rerank instead of their sum.
+    Returns the reranked Candidates pool (empty if nothing found).
+    cache=False always computes (cache warming).
+    explain=True skips the warm cache, which keeps only rows and final
+    scores (no score components, no intent).
+    """
+    if cache and not explain and warm_cache.WARM_CACHE_ENABLED:
+        # Precomputed for this index version: no encode, no LLM call
+        with span("warm_cache"):
+            warmed = warm_cache.lookup(query, final_k)
+        if warmed is not None:
+            annotate("warm_cache", "hit")
+            return warmed
+
+    with span("preprocess_query"):
+        clean_query = preprocess_query(query)
+    if not clean_query:
+        return Candidates.empty()
+
+    inputs = {
+        "query": query,
+        "clean_query": clean_query,
+        "tokens": retrieval.query_tokens(clean_query),
+    }
+
+    if cache and semantic_cache.SEMANTIC_CACHE_ENABLED:
+        # The LLM call starts first, so a miss still overlaps it with the
+        # encode; a hit cancels it (or drops its result if it started)
+        inputs["intent"] = submit_stage("intent", extract_intent, query)
+
+        # Encode up front: a near-duplicate of a recent query reuses its
+        # reranked result, skipping the LLM call and the rerank
+        with span("encode"):
+            inputs["encode"] = retrieval.encode_query(clean_query)
+        with span("semantic_cache"):
+            cached = semantic_cache.lookup(query, inputs["encode"], final_k)
+        if cached is not None:
+            inputs["intent"].cancel()
+            reranked, intent = cached
+            annotate("intent", intent)
+            annotate("semantic_cache", "hit")
+            return reranked
+
+    graph = recommendation_graph(
+        query, final_k, encoded="encode" in inputs, intent="intent" not in inputs
+    )
+    results = graph.run(**inputs)
+
+    if "encode" in inputs and len(results["rerank"]):
+        semantic_cache.store(
+            query, inputs["encode"], final_k, results["rerank"], results["intent"]
+        )
+    return results["rerank"]
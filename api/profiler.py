@@ -0,0 +1,80 @@
+import os
+import sys
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable
+
+
+# =========================================================
+# CONFIG
+# =========================================================
+# The header alone is not enough: profiling must be enabled on the server
+PROFILING_ENABLED = os.getenv("SHL_PROFILING", "0") == "1"
+PROFILE_HEADER = "X-SHL-Profile"
+
+SAMPLE_INTERVAL_S = float(os.getenv("SHL_PROFILE_INTERVAL_MS", "2")) / 1000.0
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = os.path.basename(code.co_filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+# =========================================================
+# SAMPLING PROFILER (ONE REQUEST)
+# =========================================================
+class SamplingProfiler:
+    """
+    Samples the Python stacks of the threads serving one request
+    every SAMPLE_INTERVAL_S and aggregates them as folded stacks
+    ("root;caller;callee count"), the input format of flamegraph.pl
+    and speedscope.
+    """
+
+    def __init__(
+        self,
+        thread_ids: Callable[[], Iterable[int]],
+        interval_s: float = SAMPLE_INTERVAL_S,
+    ):
+        self.thread_ids = thread_ids
+        self.interval_s = interval_s
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="shl-profiler", daemon=True
+        )
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            frames = sys._current_frames()
+            for tid in list(self.thread_ids()):
+                frame = frames.get(tid)
+                if frame is None:
+                    continue
+
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                self.counts[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def __enter__(self) -> "SamplingProfiler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def folded(self) -> str:
+        return "\n".join(f"{stack} {n}" for stack, n in self.counts.most_common())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "interval_ms": round(self.interval_s * 1000.0, 3),
+            "samples": self.samples,
+            "folded": self.folded(),
+        }
@@ -0,0 +1,177 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, workers are never pinned
+    fcntl = None
+
+
+# =========================================================
+# CONFIG
+# =========================================================
+# Cores shared by all workers of this host (0 = every core we may run on)
+CPU_BUDGET = int(os.getenv("SHL_CPU_BUDGET", "0"))
+
+# uvicorn --workers (uvicorn itself reads WEB_CONCURRENCY)
+WORKERS = int(os.getenv("SHL_WORKERS", os.getenv("WEB_CONCURRENCY", "1")))
+
+# Threads per pool per worker (0 = CPU_BUDGET // WORKERS)
+THREADS_PER_WORKER = int(os.getenv("SHL_THREADS_PER_WORKER", "0"))
+
+# Pin each worker to its own slice of the budget
+CPU_PINNING = os.getenv("SHL_CPU_PINNING", "0") == "1"
+SLOT_DIR = Path(os.getenv("SHL_CPU_SLOT_DIR", Path(tempfile.gettempdir())))
+
+# Read once, when the library loads: must be set before numpy / faiss / torch
+THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",  # FAISS, torch intra-op
+    "MKL_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "BLIS_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+
+_settings: Optional[Dict[str, Any]] = None
+_slot_file = None
+
+
+def available_cpus() -> List[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+# =========================================================
+# CPU PINNING
+# =========================================================
+def _claim_slot(workers: int) -> Optional[int]:
+    """
+    Worker index among the workers of this host: the first free slot
+    lock. The lock is held for the life of the process, so a restarted
+    worker takes over the slot (and cores) of the one it replaces.
+    """
+    global _slot_file
+
+    if fcntl is None:
+        return None
+
+    for slot in range(workers):
+        f = open(SLOT_DIR / f"shl-cpu-slot-{slot}.lock", "w")
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            continue
+        _slot_file = f
+        return slot
+    return None
+
+
+def _pin(cpus: List[int], slot: int, threads: int) -> Optional[List[int]]:
+    mine = cpus[slot * threads : (slot + 1) * threads]
+    if not mine or not hasattr(os, "sched_setaffinity"):
+        return None
+    # Threads started later (stage pool, OpenMP, torch) inherit the mask
+    os.sched_setaffinity(0, mine)
+    return mine
+
+
+# =========================================================
+# CONFIGURE (ONCE PER WORKER, BEFORE THE HEAVY IMPORTS)
+# =========================================================
+def configure() -> Dict[str, Any]:
+    """
+    Size every native thread pool of this worker from the global budget:
+    budget // workers threads each for OpenMP (FAISS), torch and BLAS.
+    Explicit *_NUM_THREADS variables still win.
+    """
+    global _settings
+
+    if _settings is not None:
+        return _settings
+
+    cpus = available_cpus()
+    budget = min(CPU_BUDGET or len(cpus), len(cpus))
+    workers = max(1, WORKERS)
+    threads = THREADS_PER_WORKER or max(1, budget // workers)
+
+    for var in THREAD_ENV_VARS:
+        os.environ.setdefault(var, str(threads))
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+    late = [m for m in ("numpy", "faiss", "torch") if m in sys.modules]
+    if late:
+        print(f"⚠️ Imported before runtime.configure(): {', '.join(late)}")
+        _limit_loaded_pools(threads)
+
+    slot = pinned = None
+    if CPU_PINNING:
+        slot = _claim_slot(workers)
+        if slot is not None:
+            pinned = _pin(cpus[:budget], slot, threads)
+
+    _settings = {
+        "cpu_budget": budget,
+        "workers": workers,
+        "threads_per_worker": threads,
+        "oversubscribed": workers * threads > budget,
+        "slot": slot,
+        "pinned_cpus": pinned,
+    }
+    return _settings
+
+
+def _limit_loaded_pools(threads: int) -> None:
+    """Runtime fallback for libraries whose env vars were read too early."""
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(threads)
+    if "faiss" in sys.modules:
+        sys.modules["faiss"].omp_set_num_threads(threads)
+    try:
+        from threadpoolctl import threadpool_limits
+
+        threadpool_limits(threads)
+    except ImportError:
+        pass
+
+
+# =========================================================
+# REPORT (/ready)
+# =========================================================
+def get_settings() -> Dict[str, Any]:
+    """Configured budget plus what each loaded library actually uses."""
+    effective: Dict[str, Any] = {}
+
+    if "torch" in sys.modules:
+        torch = sys.modules["torch"]
+        effective["torch_intra_op"] = torch.get_num_threads()
+        effective["torch_inter_op"] = torch.get_num_interop_threads()
+    else:
+        effective["torch_intra_op"] = None  # model not loaded yet
+
+    if "faiss" in sys.modules:
+        effective["faiss_omp"] = sys.modules["faiss"].omp_get_max_threads()
+
+    try:
+        from threadpoolctl import threadpool_info
+
+        effective["blas"] = [
+            {"api": p["internal_api"], "threads": p["num_threads"]}
+            for p in threadpool_info()
+        ]
+    except ImportError:
+        pass
+
+    if hasattr(os, "sched_getaffinity"):
+        effective["affinity"] = sorted(os.sched_getaffinity(0))
+
+    return {
+        **configure(),
+        "env": {var: os.environ.get(var) for var in THREAD_ENV_VARS},
+        "effective": effective,
+    }
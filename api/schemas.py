@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import Any, Dict, List, Optional
 
 
 class Assessment(BaseModel):
@@ -14,3 +14,6 @@ class Assessment(BaseModel):
 
 class RecommendResponse(BaseModel):
     recommended_assessments: List[Assessment]
+    # Only present when requested (explain=true / profiling header)
+    explain: Optional[Dict[str, Any]] = None
+    profile: Optional[Dict[str, Any]] = None
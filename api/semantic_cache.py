@@ -0,0 +1,185 @@
+import os
+import re
+import time
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from retrieval import search as retrieval
+from retrieval.candidates import Candidates
+from retrieval.catalogs import current_bundle
+from reranking.query_understanding import get_intent_version
+
+
+# =========================================================
+# CONFIG
+# =========================================================
+SEMANTIC_CACHE_ENABLED = os.getenv("SHL_SEMANTIC_CACHE", "1") == "1"
+
+# Cosine similarity (normalized query embeddings) needed to reuse a result
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SHL_SEMANTIC_CACHE_THRESHOLD", "0.9"))
+
+# Entries kept (least recently used evicted) and their time to live
+SEMANTIC_CACHE_SIZE = int(os.getenv("SHL_SEMANTIC_CACHE_SIZE", "1024"))
+SEMANTIC_CACHE_TTL_S = float(os.getenv("SHL_SEMANTIC_CACHE_TTL_S", "3600"))
+
+
+# =========================================================
+# CONSTRAINTS (CHEAP, NO LLM)
+# =========================================================
+_MINUTES_RE = re.compile(r"(\d+)\s*(?:-\s*)?(?:mins?|minutes?)\b", re.I)
+_HOURS_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(?:-\s*)?(?:hrs?|hours?)\b", re.I)
+
+_SENIORITY = {
+    "entry": re.compile(
+        r"\b(entry[\s-]level|graduates?|junior|fresher|interns?)\b", re.I
+    ),
+    "mid": re.compile(r"\b(mid[\s-]level|intermediate)\b", re.I),
+    "senior": re.compile(r"\b(senior|sr\.?|principal|experienced)\b", re.I),
+    "executive": re.compile(r"\b(executives?|directors?|vp|cxo|c-suite)\b", re.I),
+}
+
+
+def query_constraints(query: str) -> Tuple[tuple, tuple]:
+    """
+    Rule-based stand-in for the intent constraints (max_duration,
+    seniority), available before the LLM call. Near-duplicate
+    embeddings often differ only in these ("40 min" vs "20 min").
+    """
+    durations = {int(m) for m in _MINUTES_RE.findall(query)}
+    durations |= {round(float(h) * 60) for h in _HOURS_RE.findall(query)}
+    seniority = (level for level, rx in _SENIORITY.items() if rx.search(query))
+    return tuple(sorted(durations)), tuple(seniority)
+
+
+# =========================================================
+# CACHE
+# =========================================================
+class SemanticCache:
+    """
+    Recent queries as rows of a small (size, dim) matrix of normalized
+    embeddings; a lookup is one matrix-vector product. A hit needs
+    cosine >= threshold, the same scope (catalog, index and intent
+    version, final_k) and the same query_constraints().
+    """
+
+    def __init__(
+        self,
+        size: int = SEMANTIC_CACHE_SIZE,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        ttl_s: float = SEMANTIC_CACHE_TTL_S,
+    ):
+        self.size = size
+        self.threshold = threshold
+        self.ttl_s = ttl_s
+
+        self.vectors: Optional[np.ndarray] = None  # allocated on first store
+        self.valid = np.zeros(size, dtype=bool)
+        self.created = np.zeros(size)
+        self.used = np.zeros(size)
+        self.keys: List[Any] = [None] * size
+        self.values: List[Any] = [None] * size
+
+        self.lock = threading.Lock()
+        self.stats = {"lookups": 0, "hits": 0, "stores": 0, "evictions": 0}
+
+    def lookup(self, q_vec: np.ndarray, key: tuple) -> Optional[Tuple[Any, float]]:
+        """(value, similarity) of the closest matching entry, or None."""
+        now = time.monotonic()
+        with self.lock:
+            self.stats["lookups"] += 1
+            if self.vectors is None:
+                return None
+
+            expired = self.valid & (now - self.created > self.ttl_s)
+            self.valid[expired] = False
+
+            sims = self.vectors @ q_vec
+            sims[~self.valid] = -np.inf
+            for slot in np.argsort(-sims):
+                if sims[slot] < self.threshold:
+                    break
+                if self.keys[slot] == key:
+                    self.used[slot] = now
+                    self.stats["hits"] += 1
+                    return self.values[slot], float(sims[slot])
+        return None
+
+    def store(self, q_vec: np.ndarray, key: tuple, value: Any) -> None:
+        now = time.monotonic()
+        with self.lock:
+            if self.vectors is None:
+                self.vectors = np.zeros((self.size, len(q_vec)), dtype="float32")
+
+            free = np.flatnonzero(~self.valid)
+            if free.size:
+                slot = int(free[0])
+            else:
+                slot = int(np.argmin(self.used))
+                self.stats["evictions"] += 1
+
+            self.vectors[slot] = q_vec
+            self.valid[slot] = True
+            self.created[slot] = self.used[slot] = now
+            self.keys[slot] = key
+            self.values[slot] = value
+            self.stats["stores"] += 1
+
+    def clear(self) -> None:
+        with self.lock:
+            self.valid[:] = False
+            self.keys = [None] * self.size
+            self.values = [None] * self.size
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            lookups = self.stats["lookups"]
+            return {
+                **self.stats,
+                "misses": lookups - self.stats["hits"],
+                "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+                "entries": int(self.valid.sum()),
+                "size": self.size,
+                "threshold": self.threshold,
+            }
+
+
+_cache = SemanticCache()
+
+
+# =========================================================
+# PIPELINE HELPERS
+# =========================================================
+def cache_vector(q_vec: np.ndarray) -> np.ndarray:
+    """One unit vector per query (multi-vector long queries are pooled)."""
+    vec = q_vec.mean(axis=0) if q_vec.ndim == 2 else q_vec
+    return (vec / max(float(np.linalg.norm(vec)), 1e-12)).astype("float32")
+
+
+def cache_key(query: str, final_k: int) -> tuple:
+    bundle = current_bundle()
+    # Hashing meta.json + catalog per request is avoidable: once per bundle
+    index_version = bundle.derived("index_version", retrieval.get_index_version)
+    scope = (bundle.name, index_version, get_intent_version(), final_k)
+    return scope, query_constraints(query)
+
+
+def lookup(query: str, q_vec: np.ndarray, final_k: int):
+    """Cached (reranked, intent) for a near-duplicate query, or None."""
+    hit = _cache.lookup(cache_vector(q_vec), cache_key(query, final_k))
+    return None if hit is None else hit[0]
+
+
+def store(
+    query: str, q_vec: np.ndarray, final_k: int, reranked: Candidates, intent: Dict
+) -> None:
+    _cache.store(cache_vector(q_vec), cache_key(query, final_k), (reranked, intent))
+
+
+def clear_cache() -> None:
+    _cache.clear()
+
+
+def get_stats() -> dict:
+    return {"enabled": SEMANTIC_CACHE_ENABLED, **_cache.to_dict()}
@@ -0,0 +1,332 @@
+import os
+import csv
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from retrieval import search as retrieval
+from retrieval.candidates import Candidates
+from retrieval.catalogs import IndexBundle, current_bundle, use_bundle
+from reranking.query_understanding import LLM_ENABLED, get_intent_version
+
+
+# =========================================================
+# CONFIG
+# =========================================================
+BASE_DIR = Path(__file__).resolve().parents[1]
+EXCEL_FILE = BASE_DIR / "data" / "train_test_data" / "Gen_AI Dataset (1).xlsx"
+
+# Materialized results live next to the index they were computed on
+WARM_DIR_NAME = "warm"
+MANIFEST_FILE = "manifest.json"
+
+# Most frequent queries materialized per build
+WARM_TOP_N = int(os.getenv("SHL_WARM_TOP_N", "1000"))
+WARM_WORKERS = int(os.getenv("SHL_WARM_WORKERS", "4"))
+
+WARM_CACHE_ENABLED = os.getenv("SHL_WARM_CACHE", "1") == "1"
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def query_key(normalized: str) -> int:
+    digest = hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def store_version(final_k: int) -> dict:
+    """Everything a materialized result depends on (active bundle)."""
+    return {
+        "index_version": retrieval.get_index_version(),
+        "intent_version": get_intent_version(),
+        "llm_enabled": LLM_ENABLED,
+        "final_k": final_k,
+    }
+
+
+# =========================================================
+# STORE (READ SIDE, MEMORY-MAPPED)
+# =========================================================
+class WarmStore:
+    """
+    Precomputed /recommend results, one entry per normalized query:
+    keys.npy (sorted 64-bit query hashes), the query texts (checked on
+    a hit) and the ranked rows + final scores, all memory-mapped.
+    """
+
+    def __init__(self, directory: Path):
+        with open(directory / MANIFEST_FILE, "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+
+        self.directory = directory
+        self.keys = np.load(directory / "keys.npy", mmap_mode="r")
+        self.query_offsets = np.load(directory / "query.offsets.npy", mmap_mode="r")
+        self.query_data = np.load(directory / "query.data.npy", mmap_mode="r")
+        self.result_offsets = np.load(directory / "rows.offsets.npy", mmap_mode="r")
+        self.rows = np.load(directory / "rows.npy", mmap_mode="r")
+        self.scores = np.load(directory / "scores.npy", mmap_mode="r")
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _query(self, i: int) -> str:
+        raw = self.query_data[self.query_offsets[i] : self.query_offsets[i + 1]]
+        return raw.tobytes().decode("utf-8")
+
+    def lookup(self, query: str) -> Optional[Candidates]:
+        """Ranked candidates for an exact (normalized) match."""
+        normalized = normalize_query(query)
+        key = np.uint64(query_key(normalized))
+        i = int(np.searchsorted(self.keys, key))
+        if i >= len(self.keys) or self.keys[i] != key or self._query(i) != normalized:
+            return None
+
+        start, end = self.result_offsets[i], self.result_offsets[i + 1]
+        return Candidates(
+            np.array(self.rows[start:end], dtype="int64"),
+            final_score=np.array(self.scores[start:end], dtype="float64"),
+        )
+
+
+class _NoStore:
+    """Missing or stale store: every lookup misses."""
+
+    manifest: dict = {}
+
+    def __len__(self) -> int:
+        return 0
+
+    def lookup(self, query: str) -> None:
+        return None
+
+
+_stats = {"lookups": 0, "hits": 0}
+_stats_lock = threading.Lock()
+
+
+def get_warm_store(final_k: int = 10):
+    """Store of the active bundle, only if built for its current version."""
+    bundle = current_bundle()
+
+    def load():
+        directory = bundle.index_dir / WARM_DIR_NAME
+        if not (directory / MANIFEST_FILE).exists():
+            return _NoStore()
+
+        store = WarmStore(directory)
+        expected = store_version(final_k)
+        built = {k: store.manifest.get(k) for k in expected}
+        if built != expected:
+            print(f"⚠️ Ignoring stale warm cache in {directory}")
+            return _NoStore()
+
+        print(f"🔹 Memory-mapped warm cache: {len(store)} queries ({bundle.name})")
+        return store
+
+    return bundle.derived(f"warm_store_{final_k}", load)
+
+
+def lookup(query: str, final_k: int = 10) -> Optional[Candidates]:
+    result = get_warm_store(final_k).lookup(query)
+    with _stats_lock:
+        _stats["lookups"] += 1
+        _stats["hits"] += result is not None
+    return result
+
+
+def get_stats() -> dict:
+    with _stats_lock:
+        lookups = _stats["lookups"]
+        return {
+            "enabled": WARM_CACHE_ENABLED,
+            **_stats,
+            "hit_rate": round(_stats["hits"] / lookups, 4) if lookups else 0.0,
+        }
+
+
+# =========================================================
+# QUERY SOURCES
+# =========================================================
+def queries_from_log(path: Path) -> Iterable[str]:
+    """
+    Traffic log: JSONL ({"query": ...} per line), CSV with a query
+    column, or plain text with one query per line.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if path.suffix == ".jsonl":
+            for line in f:
+                try:
+                    query = json.loads(line).get("query")
+                except (ValueError, AttributeError):
+                    continue
+                if query:
+                    yield query
+        elif path.suffix == ".csv":
+            for row in csv.DictReader(f):
+                row = {k.strip().lower(): v for k, v in row.items() if k}
+                if row.get("query"):
+                    yield row["query"]
+        else:
+            for line in f:
+                if line.strip():
+                    yield line
+
+
+def queries_from_sheets(path: Path = EXCEL_FILE) -> Iterable[str]:
+    """Queries of every sheet of the Gen_AI Dataset workbook."""
+    import pandas as pd
+
+    for df in pd.read_excel(path, sheet_name=None).values():
+        df.columns = [str(c).strip().lower() for c in df.columns]
+        if "query" in df.columns:
+            yield from df["query"].dropna().astype(str)
+
+
+def popular_queries(queries: Iterable[str], top_n: int = WARM_TOP_N) -> List[str]:
+    """Most frequent queries (first spelling seen of each normalized form)."""
+    counts: Counter = Counter()
+    spelling: Dict[str, str] = {}
+    for query in queries:
+        query = query.strip()
+        normalized = normalize_query(query)
+        if normalized:
+            counts[normalized] += 1
+            spelling.setdefault(normalized, query)
+    return [spelling[n] for n, _ in counts.most_common(top_n)]
+
+
+# =========================================================
+# BUILD
+# =========================================================
+def build_warm_store(
+    queries: List[str],
+    index_dir: Path,
+    final_k: int = 10,
+    workers: int = WARM_WORKERS,
+    source: str = "",
+) -> Path:
+    """
+    Run the full /recommend pipeline for each query against the index
+    in index_dir and write the results as a memory-mappable store.
+    """
+    from api.pipeline import run_pipeline
+
+    bundle = IndexBundle("warm-build", index_dir)
+    start = time.perf_counter()
+
+    def compute(query: str):
+        with use_bundle(bundle):
+            # Bypass the caches: results must come from this index
+            return run_pipeline(query, final_k=final_k, cache=False)
+
+    with use_bundle(bundle):
+        version = store_version(final_k)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(compute, queries))
+
+    entries = {}
+    for query, reranked in zip(queries, results):
+        if len(reranked):
+            normalized = normalize_query(query)
+            entries[query_key(normalized)] = (normalized, reranked)
+
+    keys = sorted(entries)
+    offsets = np.zeros(len(keys) + 1, dtype="int64")
+    rows, scores = [], []
+    for i, key in enumerate(keys):
+        reranked = entries[key][1]
+        rows.extend(reranked.rows.tolist())
+        scores.extend(reranked.final_score.tolist())
+        offsets[i + 1] = len(rows)
+
+    # Written aside, swapped in whole
+    out_dir = Path(index_dir) / WARM_DIR_NAME
+    tmp_dir = out_dir.with_name(WARM_DIR_NAME + ".tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    np.save(tmp_dir / "keys.npy", np.array(keys, dtype="uint64"))
+    encoded = [entries[k][0].encode("utf-8") for k in keys]
+    query_offsets = np.zeros(len(keys) + 1, dtype="int64")
+    query_offsets[1:] = np.cumsum([len(b) for b in encoded])
+    np.save(tmp_dir / "query.offsets.npy", query_offsets)
+    np.save(tmp_dir / "query.data.npy", np.frombuffer(b"".join(encoded), "uint8"))
+    np.save(tmp_dir / "rows.offsets.npy", offsets)
+    np.save(tmp_dir / "rows.npy", np.array(rows, dtype="int32"))
+    np.save(tmp_dir / "scores.npy", np.array(scores, dtype="float64"))
+
+    manifest = {
+        **version,
+        "num_queries": len(keys),
+        "source": source,
+        "build_s": round(time.perf_counter() - start, 2),
+    }
+    with open(tmp_dir / MANIFEST_FILE, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    return out_dir
+
+
+def warm_index(
+    index_dir: Path,
+    log: Optional[Path] = None,
+    top_n: int = WARM_TOP_N,
+    workers: int = WARM_WORKERS,
+) -> Path:
+    """Query list from a traffic log (or the dataset sheets) -> warm store."""
+    if log is not None:
+        source, queries = str(log), queries_from_log(log)
+    else:
+        source, queries = str(EXCEL_FILE), queries_from_sheets()
+
+    queries = popular_queries(queries, top_n)
+    print(f"🔹 Warming {len(queries)} queries from {source}")
+    out_dir = build_warm_store(queries, index_dir, workers=workers, source=source)
+
+    with open(out_dir / MANIFEST_FILE, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    print(
+        f"✅ Warm cache: {manifest['num_queries']} results "
+        f"in {manifest['build_s']}s -> {out_dir}"
+    )
+    return out_dir
+
+
+# =========================================================
+# MAIN
+# =========================================================
+def main():
+    parser = argparse.ArgumentParser(
+        description="Precompute /recommend results for popular queries"
+    )
+    parser.add_argument("--index-dir", type=Path, default=retrieval.INDEX_DIR)
+    parser.add_argument(
+        "--log",
+        type=Path,
+        default=None,
+        help="traffic log (.jsonl / .csv / one query per line); "
+        "default: the Gen_AI Dataset sheets",
+    )
+    parser.add_argument("--top", type=int, default=WARM_TOP_N)
+    parser.add_argument("--workers", type=int, default=WARM_WORKERS)
+    args = parser.parse_args()
+
+    warm_index(args.index_dir, args.log, args.top, args.workers)
+
+
+if __name__ == "__main__":
+    main()
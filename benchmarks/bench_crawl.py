@@ -0,0 +1,131 @@
+import sys
+import time
+import tempfile
+from pathlib import Path
+from urllib.parse import urlsplit
+
+# =========================================================
+# ADD PROJECT ROOT
+# =========================================================
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT))
+# ingestion/ modules import each other by bare name
+sys.path.append(str(PROJECT_ROOT / "ingestion"))
+
+from common.crawl_fixtures import FixtureServer
+from async_crawl import crawl_shl_assessments_async
+from http_cache import HttpCache
+
+
+# =========================================================
+# CONFIG
+# =========================================================
+NUM_PRODUCTS = 120
+LATENCY_S = 0.05
+
+# (label, concurrency per host, requests / s per host)
+CONFIGS = [
+    ("serial", 1, 100.0),
+    ("concurrency=4", 4, 100.0),
+    ("concurrency=16", 16, 100.0),
+    ("politeness 20 rps", 16, 20.0),
+]
+
+
+# =========================================================
+# MAIN
+# =========================================================
+def normalized(records):
+    # Each server gets a fresh port (which also reshuffles the per-page link sets):
+    # compare by URL path, in path order
+    records = [{**r, "url": urlsplit(r["url"]).path} for r in records]
+    return sorted(records, key=lambda r: r["url"])
+
+
+def crawl(server, concurrency=16, rate=100.0, **kwargs):
+    return crawl_shl_assessments_async(
+        base_url=server.base_url,
+        catalog_url=server.catalog_url,
+        concurrency=concurrency,
+        rate=rate,
+        **kwargs,
+    )
+
+
+def run(label, concurrency, rate, throttle_every=0, **kwargs):
+    with FixtureServer(NUM_PRODUCTS, LATENCY_S, throttle_every) as server:
+        start = time.perf_counter()
+        records = normalized(crawl(server, concurrency, rate, **kwargs))
+        elapsed = time.perf_counter() - start
+
+    print(
+        f"{label:<22} {len(records):>8} {elapsed:>8.2f} "
+        f"{server.requests:>9} {server.max_in_flight:>9}"
+    )
+    return records
+
+
+def main():
+    rtt_ms = LATENCY_S * 1000
+    print(f"🔹 Fixture catalog: {NUM_PRODUCTS} products, {rtt_ms:.0f} ms RTT")
+    print(f"\n{'mode':<22} {'records':>8} {'secs':>8} {'requests':>9} {'max conc':>9}")
+
+    baseline = None
+    for label, concurrency, rate in CONFIGS:
+        records = run(label, concurrency, rate)
+        baseline = baseline or records
+        assert records == baseline, f"{label}: output differs from serial crawl"
+
+    # Opt-in lxml parser, and parsing off the event loop
+    records = run("lxml parser", 16, 100.0, parser="lxml")
+    assert records == baseline, "bs4 and lxml parsers disagree"
+    records = run("parse pool x2", 16, 100.0, parse_workers=2)
+    assert records == baseline, "process-pool parsing changed the output"
+
+    # Every 10th request throttled: AIMD backs off, output unchanged
+    records = run("429 every 10th", 16, 100.0, throttle_every=10)
+    assert records == baseline, "throttled crawl lost or reordered records"
+
+    print("\n✅ All modes returned identical records")
+
+    run_incremental()
+
+
+def run_incremental():
+    """Cold crawl, then nightly-style refreshes after a few products change."""
+    print(f"\n{'refresh':<22} {'records':>8} {'secs':>8} {'requests':>9} {'KiB':>8}")
+
+    with tempfile.TemporaryDirectory() as tmp, FixtureServer(
+        NUM_PRODUCTS, LATENCY_S
+    ) as server:
+        cache = HttpCache(Path(tmp))
+
+        def measure(label, **kwargs):
+            requests, sent = server.requests, server.bytes_sent
+            start = time.perf_counter()
+            records = normalized(crawl(server, cache=cache, **kwargs))
+            elapsed = time.perf_counter() - start
+            kib = (server.bytes_sent - sent) / 1024
+            print(
+                f"{label:<22} {len(records):>8} {elapsed:>8.2f} "
+                f"{server.requests - requests:>9} {kib:>8.1f}"
+            )
+            return records
+
+        measure("cold (fills cache)")
+
+        for i in range(0, NUM_PRODUCTS, 20):
+            server.touch(i)
+        records = measure("listing + 304s")
+        assert records == normalized(crawl(server)), "incremental crawl is stale"
+
+        for i in range(5, NUM_PRODUCTS, 40):
+            server.touch(i)
+        records = measure("sitemap lastmod", discovery="sitemap")
+        assert records == normalized(crawl(server)), "sitemap crawl is stale"
+
+    print("✅ Incremental crawls match a full recrawl")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# =========================================================
+# ADD PROJECT ROOT
+# =========================================================
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT))
+
+from retrieval.search import search
+from reranking.reranker import rerank
+from reranking.query_understanding import extract_intent
+from reranking import cross_encoder
+from evalssss.phase2_eval import load_url_to_id_map, load_training_data
+from evalssss.metrics import average_precision_at_k, recall_at_k
+
+
+# =========================================================
+# CONFIG
+# =========================================================
+TOP_K_RETRIEVAL = 50
+FINAL_K = 10
+TOP_N_VALUES = [10, 20, 50]
+
+
+# =========================================================
+# RUN ONE RERANK MODE
+# =========================================================
+def run_mode(prepared, **rerank_kwargs):
+    latencies, recalls, aps = [], [], []
+
+    for query, relevant, candidates, intent in prepared:
+        pool = [dict(c) for c in candidates]
+
+        start = time.perf_counter()
+        reranked = rerank(query, pool, FINAL_K, intent=intent, **rerank_kwargs)
+        latencies.append((time.perf_counter() - start) * 1000.0)
+
+        ranked = [c["assessment_id"] for c in reranked]
+        recalls.append(recall_at_k(ranked, relevant, FINAL_K))
+        aps.append(average_precision_at_k(ranked, relevant, FINAL_K))
+
+    return {
+        "recall@10": float(np.mean(recalls)),
+        "map@10": float(np.mean(aps)),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+
+# =========================================================
+# MAIN
+# =========================================================
+def main():
+    url_to_id = load_url_to_id_map()
+    queries, _ = load_training_data(url_to_id)
+
+    # Retrieval + intent once per query: only the rerank stage is compared
+    print("🔹 Preparing candidates and intents...")
+    prepared = []
+    for query, relevant in queries:
+        candidates = [
+            {
+                "row": r["row"],
+                "assessment_id": r["assessment_id"],
+                "retrieval_score": r["score"],
+            }
+            for r in search(query)[:TOP_K_RETRIEVAL]
+        ]
+        prepared.append((query, set(relevant), candidates, extract_intent(query)))
+
+    print(
+        f"\n{'mode':<22} {'recall@10':>10} {'map@10':>8} {'p50 ms':>8} {'p95 ms':>8}"
+    )
+
+    def report(name, res):
+        print(
+            f"{name:<22} {res['recall@10']:>10.3f} {res['map@10']:>8.3f} "
+            f"{res['p50_ms']:>8.1f} {res['p95_ms']:>8.1f}"
+        )
+
+    report("rule-based", run_mode(prepared, use_cross_encoder=False))
+
+    # Warm the model so load time is not billed to the first query
+    cross_encoder.get_cross_encoder()
+
+    for top_n in TOP_N_VALUES:
+        cross_encoder.CROSS_ENCODER_TOP_N = top_n
+        cross_encoder.clear_cache()
+        report(f"cross-encoder N={top_n}", run_mode(prepared, use_cross_encoder=True))
+
+    print(f"\n🔹 Cross-encoder stats: {cross_encoder.get_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import argparse
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+# =========================================================
+# ADD PROJECT ROOT
+# =========================================================
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT))
+# ingestion/ modules import each other by bare name
+sys.path.append(str(PROJECT_ROOT / "ingestion"))
+
+from common.crawl_fixtures import product_html
+from crawl import parse_test_details
+from fast_extract import parse_test_details_html
+from http_cache import HttpCache
+
+
+# =========================================================
+# CONFIG
+# =========================================================
+NUM_FIXTURES = 120
+POOL_WORKERS = [1, 2, 4]
+
+
+# =========================================================
+# EXTRACTORS
+# =========================================================
+def parse_bs4(html, url):
+    return parse_test_details(BeautifulSoup(html, "html.parser"), url)
+
+
+def parse_fast(html, url):
+    return parse_test_details_html(html, url, scoped=False)
+
+
+def parse_scoped(html, url):
+    return parse_test_details_html(html, url)
+
+
+EXTRACTORS = {"bs4": parse_bs4, "lxml": parse_fast, "lxml scoped": parse_scoped}
+
+
+def parse_one(args):
+    label, html, url = args
+    return EXTRACTORS[label](html, url)
+
+
+# =========================================================
+# PAGES
+# =========================================================
+def load_pages(cache_dir):
+    pages = [
+        (product_html(i, i % 2), f"https://fixture/view/fixture-{i}/")
+        for i in range(NUM_FIXTURES)
+    ]
+
+    if cache_dir:
+        # Real pages saved by an --incremental crawl
+        cache = HttpCache(cache_dir)
+        for entry in cache.entries():
+            html = cache.html(entry["url"])
+            if html is not None:
+                pages.append((html, entry["url"]))
+    return pages
+
+
+# =========================================================
+# SPEED
+# =========================================================
+def time_serial(pages, fn, repeats=3):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for html, url in pages:
+            fn(html, url)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def time_pool(pages, label, workers):
+    jobs = [(label, html, url) for html, url in pages]
+    with ProcessPoolExecutor(workers) as pool:
+        # Warm the workers (imports) before timing
+        list(pool.map(parse_one, jobs[:workers]))
+        start = time.perf_counter()
+        list(pool.map(parse_one, jobs, chunksize=8))
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="lxml vs bs4 product extraction")
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=None,
+        help="also time saved HttpCache pages (e.g. data/raw/http_cache)",
+    )
+    args = parser.parse_args()
+
+    # Field-by-field parity is checked by tests/test_extract_parity.py
+    pages = load_pages(args.cache_dir)
+    print(f"🔹 {len(pages)} pages")
+
+    print(f"\n{'extractor':<22} {'ms / page':>10} {'speedup':>8}")
+    baseline = None
+    for label, fn in EXTRACTORS.items():
+        per_page = time_serial(pages, fn) / len(pages) * 1000
+        baseline = baseline or per_page
+        print(f"{label:<22} {per_page:>10.3f} {baseline / per_page:>7.1f}x")
+
+    print(f"\n{'process pool':<22} {'pages / s':>10}")
+    for label in ["bs4", "lxml scoped"]:
+        for workers in POOL_WORKERS:
+            elapsed = time_pool(pages, label, workers)
+            rate = len(pages) / elapsed
+            print(f"{f'{label} x{workers}':<22} {rate:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
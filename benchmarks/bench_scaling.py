@@ -0,0 +1,302 @@
+import os
+import sys
+import csv
+import json
+import time
+import hashlib
+import argparse
+import subprocess
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows: no rusage, peak RSS is reported as None
+    resource = None
+
+# =========================================================
+# ADD PROJECT ROOT
+# =========================================================
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT))
+
+from benchmarks.synthetic_catalog import write_catalog
+
+
+# =========================================================
+# CONFIG
+# =========================================================
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+WORK_DIR = PROJECT_ROOT / "data" / "synthetic"
+RESULTS_FILE = PROJECT_ROOT / "benchmarks" / "results" / "scaling.json"
+QUERIES_FILE = PROJECT_ROOT / "data" / "retrieval_eval.csv"
+
+NUM_QUERIES = 50
+# Per-phase wall-clock cap: large sizes report fewer samples instead of hanging
+PHASE_BUDGET_S = 120.0
+FINAL_K = 10
+
+
+# =========================================================
+# MEMORY
+# =========================================================
+def rss_mb():
+    """Current resident set size (Linux), else peak RSS."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / 2**20, 1)
+    except (OSError, ValueError, AttributeError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb(usage=None):
+    if resource is None:
+        return None
+    usage = usage or resource.getrusage(resource.RUSAGE_SELF)
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 2**20 if sys.platform == "darwin" else 2**10
+    return round(usage.ru_maxrss / scale, 1)
+
+
+# =========================================================
+# QUERY ENCODER FOR RANDOM-VECTOR INDEXES
+# =========================================================
+class RandomQueryEncoder:
+    """
+    Stands in for MiniLM when the index was built with --random-vectors:
+    deterministic unit vector per query text, no model download.
+    """
+
+    max_seq_length = 256
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def encode(self, texts, normalize_embeddings=True, **kwargs):
+        out = np.empty((len(texts), self.dim), dtype="float32")
+        for i, text in enumerate(texts):
+            seed = int.from_bytes(hashlib.sha1(text.encode()).digest()[:8], "little")
+            vec = np.random.default_rng(seed).standard_normal(self.dim)
+            out[i] = vec / np.linalg.norm(vec)
+        return out
+
+
+# =========================================================
+# MEASUREMENT HELPERS
+# =========================================================
+def load_queries(n: int):
+    with open(QUERIES_FILE, "r", encoding="utf-8") as f:
+        queries = [row["query"] for row in csv.DictReader(f)]
+    return [queries[i % len(queries)] for i in range(n)]
+
+
+def timed_loop(fn, items, budget_s: float):
+    latencies = []
+    start = time.perf_counter()
+    for item in items:
+        t0 = time.perf_counter()
+        fn(item)
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+        if time.perf_counter() - start > budget_s:
+            break
+
+    total = time.perf_counter() - start
+    return {
+        "samples": len(latencies),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+        "mean_ms": round(float(np.mean(latencies)), 3),
+        "qps": round(len(latencies) / total, 2),
+    }
+
+
+# =========================================================
+# WORKER (ONE PROCESS PER SIZE: CLEAN RSS, CLEAN LAZY GLOBALS)
+# =========================================================
+def run_worker(args):
+    # SHL_INDEX_DIR / SHL_LLM_ENABLED / SHL_SEMANTIC_CACHE are set by the parent
+    # before these imports
+    from retrieval import search as retrieval
+    from reranking.reranker import rerank
+    from reranking.query_understanding import DEFAULT_INTENT
+    from api.pipeline import build_candidates
+
+    result = {"rss_baseline_mb": rss_mb()}
+
+    if args.random_vectors:
+        retrieval._model = RandomQueryEncoder(retrieval.get_embeddings().shape[1])
+
+    queries = load_queries(args.queries)
+
+    # Cold start: lazy FAISS + BM25 build and model load on the first query
+    start = time.perf_counter()
+    retrieval.search(queries[0])
+    result["cold_start_s"] = round(time.perf_counter() - start, 3)
+    result["rss_after_index_mb"] = rss_mb()
+
+    result["search"] = timed_loop(retrieval.search, queries, args.budget_s)
+
+    prepared = [(q, build_candidates(retrieval.search(q))) for q in queries[:20]]
+    pool = [prepared[i % len(prepared)] for i in range(len(queries))]
+
+    def rerank_one(item):
+        query, candidates = item
+        intent = json.loads(json.dumps(DEFAULT_INTENT))
+        rerank(query, [dict(c) for c in candidates], FINAL_K, intent=intent)
+
+    result["rerank"] = timed_loop(rerank_one, pool, args.budget_s)
+
+    from fastapi.testclient import TestClient
+    from api.main import app
+
+    client = TestClient(app)
+
+    def recommend(query):
+        response = client.post("/recommend", json={"query": query})
+        assert response.status_code in (200, 404), response.text
+
+    result["recommend"] = timed_loop(recommend, queries, args.budget_s)
+    result["rss_final_mb"] = rss_mb()
+    result["rss_peak_mb"] = peak_rss_mb()
+
+    with open(args.worker_out, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+
+# =========================================================
+# PARENT: GENERATE → BUILD → MEASURE, PER SIZE
+# =========================================================
+def run_child(cmd, env=None):
+    """Run a child process, return (wall seconds, peak RSS MB of the child)."""
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=PROJECT_ROOT, env=env)
+
+    if hasattr(os, "wait4"):
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        peak = peak_rss_mb(usage)
+    else:
+        proc.wait()
+        peak = None
+
+    if proc.returncode != 0:
+        raise RuntimeError(f"{cmd[2]} failed with exit code {proc.returncode}")
+
+    return round(time.perf_counter() - start, 3), peak
+
+
+def bench_size(n: int, args):
+    catalog_file = WORK_DIR / f"catalog_{n}.json"
+    index_dir = WORK_DIR / f"index_{n}"
+    result = {}
+
+    if args.rebuild or not catalog_file.exists():
+        print(f"🔹 [{n:,}] Generating synthetic catalog...")
+        start = time.perf_counter()
+        write_catalog(n, catalog_file)
+        result["generate_s"] = round(time.perf_counter() - start, 3)
+
+    if args.rebuild or not (index_dir / "meta.json").exists():
+        print(f"🔹 [{n:,}] Building index with retrieval/embed.py...")
+        cmd = [sys.executable, "-m", "retrieval.embed", "--input", str(catalog_file)]
+        cmd += ["--index-dir", str(index_dir)]
+        if args.random_vectors:
+            cmd.append("--random-vectors")
+        result["build_s"], result["build_peak_rss_mb"] = run_child(cmd)
+
+    print(f"🔹 [{n:,}] Measuring search / rerank / recommend...")
+    # Repeated queries would be served by the semantic cache: measure the
+    # full pipeline
+    env = dict(
+        os.environ,
+        SHL_INDEX_DIR=str(index_dir),
+        SHL_LLM_ENABLED="0",
+        SHL_SEMANTIC_CACHE="0",
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / "result.json"
+        cmd = [sys.executable, str(Path(__file__).resolve()), "--worker"]
+        cmd += ["--worker-out", str(out), "--queries", str(args.queries)]
+        cmd += ["--budget-s", str(args.budget_s)]
+        if args.random_vectors:
+            cmd.append("--random-vectors")
+
+        result["worker_wall_s"], _ = run_child(cmd, env)
+        with open(out, "r", encoding="utf-8") as f:
+            result.update(json.load(f))
+
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# =========================================================
+# MAIN
+# =========================================================
+def main():
+    parser = argparse.ArgumentParser(description="Catalog scaling benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--queries", type=int, default=NUM_QUERIES)
+    parser.add_argument("--budget-s", type=float, default=PHASE_BUDGET_S)
+    parser.add_argument(
+        "--random-vectors",
+        action="store_true",
+        help="skip the embedding model (index + queries use random unit vectors)",
+    )
+    parser.add_argument("--rebuild", action="store_true")
+    parser.add_argument("--output", type=Path, default=RESULTS_FILE)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--worker-out", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    report = {
+        "commit": git_commit(),
+        "config": {
+            "queries": args.queries,
+            "budget_s": args.budget_s,
+            "random_vectors": args.random_vectors,
+            "num_shards": int(os.getenv("SHL_NUM_SHARDS", "1")),
+        },
+        "sizes": {},
+    }
+
+    for n in args.sizes:
+        report["sizes"][str(n)] = bench_size(n, args)
+        s = report["sizes"][str(n)]
+        print(
+            f"✅ [{n:,}] search p50 {s['search']['p50_ms']:.1f} ms | "
+            f"rerank p50 {s['rerank']['p50_ms']:.1f} ms | "
+            f"recommend p50 {s['recommend']['p50_ms']:.1f} ms | "
+            f"peak RSS {s['rss_peak_mb']} MB"
+        )
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+    print(f"\n📄 Saved results to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
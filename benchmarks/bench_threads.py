@@ -0,0 +1,283 @@
+import os
+import sys
+import csv
+import json
+import time
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+
+# =========================================================
+# ADD PROJECT ROOT
+# =========================================================
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT))
+
+# No numpy / faiss / torch at module level: uvicorn workers import this
+# module (create_app) and the thread budget must be applied before they load
+
+
+# =========================================================
+# CONFIG
+# =========================================================
+RESULTS_FILE = PROJECT_ROOT / "benchmarks" / "results" / "threads.json"
+QUERIES_FILE = PROJECT_ROOT / "data" / "retrieval_eval.csv"
+
+CLIENTS = 8
+WARMUP_S = 5.0
+DURATION_S = 20.0
+READY_TIMEOUT_S = 180.0
+
+
+# =========================================================
+# SERVER SIDE (RUNS IN EACH UVICORN WORKER)
+# =========================================================
+def create_app():
+    """uvicorn --factory entry point: the API, optionally without the model."""
+    from api.main import app
+
+    if os.getenv("SHL_BENCH_RANDOM_VECTORS") == "1":
+        from retrieval import search as retrieval
+        from benchmarks.bench_scaling import RandomQueryEncoder
+
+        retrieval._model = RandomQueryEncoder(retrieval.get_embeddings().shape[1])
+
+    return app
+
+
+# =========================================================
+# LAYOUTS
+# =========================================================
+def parse_layout(text: str):
+    workers, threads = text.lower().split("x")
+    return int(workers), int(threads)
+
+
+def host_cores() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def default_layouts(cores: int):
+    """
+    workers × (cores // workers) for powers of two, plus the ungoverned
+    layout: every worker sized to the whole box (library defaults).
+    """
+    layouts = []
+    workers = 1
+    while workers <= cores:
+        layouts.append((workers, cores // workers))
+        workers *= 2
+    if cores > 1:
+        layouts.append((cores, cores))
+    return layouts
+
+
+# =========================================================
+# SERVER LIFECYCLE
+# =========================================================
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers: int, threads: int, port: int, slot_dir: str, args):
+    env = dict(
+        os.environ,
+        SHL_WORKERS=str(workers),
+        SHL_THREADS_PER_WORKER=str(threads),
+        SHL_CPU_BUDGET=str(args.cores),
+        SHL_CPU_PINNING="1" if args.pin else "0",
+        SHL_CPU_SLOT_DIR=slot_dir,
+        # Measure the full pipeline: no LLM latency, no result caches
+        SHL_LLM_ENABLED="0",
+        SHL_SEMANTIC_CACHE="0",
+        SHL_WARM_CACHE="0",
+    )
+    if args.index_dir:
+        env["SHL_INDEX_DIR"] = str(args.index_dir)
+    if args.random_vectors:
+        env["SHL_BENCH_RANDOM_VECTORS"] = "1"
+
+    cmd = [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "benchmarks.bench_threads:create_app",
+        "--factory",
+        "--host",
+        "127.0.0.1",
+        "--port",
+        str(port),
+        "--workers",
+        str(workers),
+        "--log-level",
+        "warning",
+    ]
+    return subprocess.Popen(cmd, cwd=PROJECT_ROOT, env=env)
+
+
+def wait_ready(port: int, workers: int, proc) -> dict:
+    """Poll /ready until every worker has answered; returns pid -> runtime."""
+    import httpx
+
+    seen = {}
+    deadline = time.perf_counter() + READY_TIMEOUT_S
+    while len(seen) < workers and time.perf_counter() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {proc.returncode}")
+        try:
+            # New connection each time so the kernel spreads them over workers
+            r = httpx.get(f"http://127.0.0.1:{port}/ready", timeout=5.0)
+            body = r.json()
+            seen[body["pid"]] = body["runtime"]
+        except (httpx.HTTPError, ValueError, KeyError):
+            time.sleep(0.5)
+
+    if len(seen) < workers:
+        print(f"⚠️ Only {len(seen)}/{workers} workers answered /ready")
+    return seen
+
+
+# =========================================================
+# LOAD (CLOSED LOOP, FIXED NUMBER OF CLIENTS)
+# =========================================================
+def load_queries():
+    with open(QUERIES_FILE, "r", encoding="utf-8") as f:
+        return [row["query"] for row in csv.DictReader(f)]
+
+
+def run_load(port: int, queries, clients: int, duration_s: float) -> dict:
+    import httpx
+    import numpy as np
+
+    latencies, errors = [], []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration_s
+
+    def client(i: int):
+        mine, failed = [], 0
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=60.0) as http:
+            n = i
+            while time.perf_counter() < deadline:
+                query = queries[n % len(queries)]
+                n += clients
+                t0 = time.perf_counter()
+                r = http.post("/recommend", json={"query": query})
+                if r.status_code in (200, 404):
+                    mine.append((time.perf_counter() - t0) * 1000.0)
+                else:
+                    failed += 1
+        with lock:
+            latencies.extend(mine)
+            errors.append(failed)
+
+    start = time.perf_counter()
+    pool = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    if not latencies:
+        return {"requests": 0, "errors": sum(errors)}
+    return {
+        "requests": len(latencies),
+        "errors": sum(errors),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 2),
+    }
+
+
+def bench_layout(workers: int, threads: int, queries, args) -> dict:
+    port = free_port()
+    with tempfile.TemporaryDirectory() as slot_dir:
+        proc = start_server(workers, threads, port, slot_dir, args)
+        try:
+            runtimes = wait_ready(port, workers, proc)
+            # Lazy FAISS / BM25 / model load happens per worker
+            run_load(port, queries, args.clients, args.warmup_s)
+            result = run_load(port, queries, args.clients, args.duration_s)
+        finally:
+            proc.terminate()
+            proc.wait(timeout=60)
+
+    result["runtime"] = next(iter(runtimes.values()), None)
+    return result
+
+
+# =========================================================
+# MAIN
+# =========================================================
+def main():
+    from benchmarks.bench_scaling import git_commit
+
+    parser = argparse.ArgumentParser(
+        description="Throughput and p99 of /recommend per worker × thread layout"
+    )
+    parser.add_argument("--cores", type=int, default=host_cores())
+    parser.add_argument(
+        "--layouts",
+        nargs="+",
+        default=None,
+        help="WORKERSxTHREADS, e.g. 1x8 2x4 8x1 (default: derived from --cores)",
+    )
+    parser.add_argument("--clients", type=int, default=CLIENTS)
+    parser.add_argument("--warmup-s", type=float, default=WARMUP_S)
+    parser.add_argument("--duration-s", type=float, default=DURATION_S)
+    parser.add_argument("--pin", action="store_true", help="SHL_CPU_PINNING=1")
+    parser.add_argument("--index-dir", type=Path, default=None)
+    parser.add_argument(
+        "--random-vectors",
+        action="store_true",
+        help="random query vectors instead of the model (no download)",
+    )
+    parser.add_argument("--output", type=Path, default=RESULTS_FILE)
+    args = parser.parse_args()
+
+    if args.layouts:
+        layouts = [parse_layout(text) for text in args.layouts]
+    else:
+        layouts = default_layouts(args.cores)
+    queries = load_queries()
+
+    report = {
+        "commit": git_commit(),
+        "config": {
+            "cores": args.cores,
+            "clients": args.clients,
+            "duration_s": args.duration_s,
+            "pinned": args.pin,
+            "random_vectors": args.random_vectors,
+        },
+        "layouts": {},
+    }
+
+    print(f"{'layout':<10} {'req/s':>8} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for workers, threads in layouts:
+        label = f"{workers}x{threads}"
+        result = bench_layout(workers, threads, queries, args)
+        report["layouts"][label] = result
+        print(
+            f"{label:<10} {result.get('throughput_rps', 0):>8.1f} "
+            f"{result.get('p50_ms', 0):>9.1f} {result.get('p99_ms', 0):>9.1f} "
+            f"{result['errors']:>7}"
+        )
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+    print(f"\n📄 Saved results to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import sys
+import json
+import argparse
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+# =========================================================
+# ADD PROJECT ROOT
+# =========================================================
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT))
+
+from retrieval.catalog import load_source_records
+
+
+# =========================================================
+# CONFIG
+# =========================================================
+SEED = 13
+CHUNK = 50_000
+
+URL_TEMPLATE = "https://www.shl.com/products/product-catalog/view/synthetic-{}/"
+
+
+# =========================================================
+# EMPIRICAL PROFILE OF THE REAL CATALOG
+# =========================================================
+class CatalogProfile:
+    """
+    Distributions taken from the real shl_assessments.json:
+    - name / description lengths (in words) are resampled as-is
+    - words follow the real unigram frequencies (Zipf-like)
+    - categorical fields are resampled from the real records
+    """
+
+    def __init__(self, records):
+        names = [(r.get("name") or "").split() for r in records]
+        descriptions = [(r.get("description") or "").split() for r in records]
+
+        self.name_lengths = np.array([max(1, len(w)) for w in names])
+        self.description_lengths = np.array([len(w) for w in descriptions])
+
+        name_counts = Counter(w for words in names for w in words)
+        text_counts = Counter(w for words in descriptions for w in words)
+
+        self.name_vocab, self.name_probs = self._distribution(name_counts)
+        self.text_vocab, self.text_probs = self._distribution(text_counts)
+
+        self.records = records
+
+    @staticmethod
+    def _distribution(counts: Counter):
+        vocab = np.array(list(counts), dtype=object)
+        freqs = np.array(list(counts.values()), dtype="float64")
+        return vocab, freqs / freqs.sum()
+
+    def sample_texts(self, rng, lengths, vocab, probs):
+        """One batched draw for all words, split back into per-row strings."""
+        words = vocab[rng.choice(len(vocab), size=int(lengths.sum()), p=probs)]
+        bounds = np.concatenate([[0], np.cumsum(lengths)])
+        return [" ".join(words[bounds[i] : bounds[i + 1]]) for i in range(len(lengths))]
+
+
+# =========================================================
+# GENERATION
+# =========================================================
+def generate_records(profile: CatalogProfile, start: int, n: int, rng):
+    name_lengths = rng.choice(profile.name_lengths, size=n)
+    desc_lengths = rng.choice(profile.description_lengths, size=n)
+
+    names = profile.sample_texts(
+        rng, name_lengths, profile.name_vocab, profile.name_probs
+    )
+    descriptions = profile.sample_texts(
+        rng, desc_lengths, profile.text_vocab, profile.text_probs
+    )
+    templates = rng.integers(0, len(profile.records), size=n)
+
+    for i in range(n):
+        template = profile.records[int(templates[i])]
+        idx = start + i
+
+        yield {
+            **template,
+            "name": names[i],
+            "url": URL_TEMPLATE.format(idx),
+            "description": descriptions[i],
+            "assessment_id": f"syn_{idx:07d}",
+            "retrieval_score": None,
+            "rerank_score": None,
+        }
+
+
+def write_catalog(n: int, out_file: Path, seed: int = SEED) -> Path:
+    """Stream n synthetic records to a JSON array (never all in memory as text)."""
+    profile = CatalogProfile(load_source_records())
+    rng = np.random.default_rng(seed)
+
+    out_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_file, "w", encoding="utf-8") as f:
+        f.write("[\n")
+        for start in range(0, n, CHUNK):
+            size = min(CHUNK, n - start)
+            for i, record in enumerate(generate_records(profile, start, size, rng)):
+                if start + i:
+                    f.write(",\n")
+                f.write(json.dumps(record, ensure_ascii=False))
+        f.write("\n]\n")
+
+    return out_file
+
+
+# =========================================================
+# MAIN
+# =========================================================
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic SHL-schema catalog")
+    parser.add_argument("n", type=int, help="number of assessments")
+    parser.add_argument("out", type=Path, help="output JSON file")
+    parser.add_argument("--seed", type=int, default=SEED)
+    args = parser.parse_args()
+
+    print(f"🔹 Generating {args.n:,} synthetic assessments...")
+    write_catalog(args.n, args.out, args.seed)
+    print(f"✅ Saved to: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+import random
+import re
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+# =========================================================
+# CONFIG
+# =========================================================
+CATALOG_PATH = "/products/product-catalog/"
+PRODUCT_PATH = CATALOG_PATH + "view/"
+ITEMS_PER_PAGE = 12
+# Pre-packaged job solutions: in the sitemap, not in the type=1 listing
+NUM_JOB_SOLUTIONS = 3
+
+TEST_TYPES = [
+    "Ability & Aptitude",
+    "Biodata & Situational Judgement",
+    "Competencies",
+    "Knowledge & Skills",
+    "Personality & Behavior",
+    "Simulations",
+]
+
+
+# =========================================================
+# HTML (SAME MARKUP THE SHL PARSERS TARGET)
+# =========================================================
+# Site chrome around every product: the real pages are mostly nav / scripts
+NAV_HTML = "\n".join(
+    f'<li><a href="/solutions/area-{n}/">Solution area {n}</a></li>' for n in range(150)
+)
+SCRIPT_HTML = "<script>window.dataLayer = [%s];</script>" % ",".join(
+    f'{{"event": "view", "slot": {n}}}' for n in range(200)
+)
+
+
+def product_html(i: int, version: int = 0) -> str:
+    rng = random.Random(i)
+    keys = rng.sample("ABCEKPS", rng.randint(1, 3))
+    remote = "-yes" if i % 3 else "-no"
+    return f"""<!DOCTYPE html>
+<html><head><title>Product {i}</title>{SCRIPT_HTML}</head>
+<body>
+<header><nav><a href="/">Home</a><ul>{NAV_HTML}</ul></nav></header>
+<main>
+<div class="product-catalogue module">
+  <h1>Fixture Assessment {i}</h1>
+  <div class="product-catalogue-training-calendar__row typ">
+    <h4>Description</h4>
+    <p>Multi-choice test that measures the knowledge of topic {i}
+       and {TEST_TYPES[i % len(TEST_TYPES)].lower()}{" (revised)" * version}.</p>
+  </div>
+  <div class="product-catalogue-training-calendar__row typ">
+    <h4>Job levels</h4><p>Mid-Professional, Professional Individual Contributor,</p>
+  </div>
+  <div class="product-catalogue-training-calendar__row typ">
+    <h4>Assessment length</h4>
+    <p>Approximate Completion Time in minutes = {5 + i % 50}</p>
+  </div>
+  <div class="product-catalogue-training-calendar__row typ">
+    <p class="d-flex">Test Type: {''.join(
+        f'<span class="product-catalogue__key">{k}</span>' for k in keys
+    )}</p>
+    <p class="d-flex"><span>Remote Testing:</span>
+      <span class="catalogue__circle {remote}"></span></p>
+  </div>
+</div>
+</main>
+<footer><div class="rich-text">All rights reserved.</div></footer>
+</body></html>"""
+
+
+def listing_html(offset: int, num_products: int) -> str:
+    rows = "\n".join(
+        f"""<tr data-entity-id="{i}">
+  <td class="custom__table-heading__title">
+    <a href="{PRODUCT_PATH}fixture-{i}/">Fixture Assessment {i}</a></td>
+  <td class="custom__table-heading__general"></td></tr>"""
+        for i in range(offset, min(offset + ITEMS_PER_PAGE, num_products))
+    )
+    return f"<html><body><table>{rows}</table></body></html>"
+
+
+def sitemap_xml(base_url: str, lastmods: list) -> str:
+    urls = "\n".join(
+        f"<url><loc>{base_url}{PRODUCT_PATH}fixture-{i}/</loc>"
+        f"<lastmod>{time.strftime('%Y-%m-%dT%H:%M:%S+00:00', time.gmtime(t))}"
+        "</lastmod></url>"
+        for i, t in enumerate(lastmods)
+    )
+    urls += "".join(
+        f"\n<url><loc>{base_url}{PRODUCT_PATH}job-solution-{n}/</loc></url>"
+        for n in range(NUM_JOB_SOLUTIONS)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        f"{urls}\n</urlset>"
+    )
+
+
+# =========================================================
+# SERVER
+# =========================================================
+class FixtureServer:
+    """
+    Local SHL look-alike catalog for crawler benchmarks.
+    - latency_s: per-request server delay (simulated network RTT)
+    - throttle_every: every n-th request answers 429 with Retry-After
+    - product pages carry ETag / Last-Modified and answer 304 when unchanged;
+      touch(i) edits product i; /sitemap.xml lists products with lastmod,
+      plus job solutions that are not individual tests
+    """
+
+    def __init__(
+        self, num_products: int = 120, latency_s: float = 0.05, throttle_every=0
+    ):
+        self.num_products = num_products
+        self.latency_s = latency_s
+        self.throttle_every = throttle_every
+        self.versions = [0] * num_products
+        # Whole seconds, like HTTP dates; one second in the past
+        self.modified = [int(time.time()) - 1] * num_products
+        self.requests = 0
+        self.not_modified = 0
+        self.bytes_sent = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}"
+
+    @property
+    def catalog_url(self) -> str:
+        return self.base_url + CATALOG_PATH
+
+    def touch(self, i: int) -> None:
+        self.versions[i] += 1
+        self.modified[i] = int(time.time()) + 1
+
+    def __enter__(self) -> "FixtureServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with server.lock:
+                    server.requests += 1
+                    n = server.requests
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                try:
+                    time.sleep(server.latency_s)
+                    if server.throttle_every and n % server.throttle_every == 0:
+                        self.send_response(429)
+                        self.send_header("Retry-After", "0.2")
+                        self.end_headers()
+                        return
+                    status, body, headers = server.route(self.path)
+                    if headers.get("ETag") and (
+                        self.headers.get("If-None-Match") == headers["ETag"]
+                    ):
+                        status, body = 304, ""
+                        with server.lock:
+                            server.not_modified += 1
+
+                    self.send_response(status)
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.end_headers()
+                    payload = body.encode("utf-8")
+                    self.wfile.write(payload)
+                    with server.lock:
+                        server.bytes_sent += len(payload)
+                finally:
+                    with server.lock:
+                        server.in_flight -= 1
+
+        return Handler
+
+    def route(self, path: str):
+        """(status, body, headers) for a request path."""
+        html = {"Content-Type": "text/html; charset=utf-8"}
+        parts = urlsplit(path)
+
+        if parts.path == CATALOG_PATH:
+            offset = int(parse_qs(parts.query).get("start", ["0"])[0])
+            return 200, listing_html(offset, self.num_products), html
+
+        if parts.path == "/sitemap.xml":
+            body = sitemap_xml(self.base_url, self.modified)
+            return 200, body, {"Content-Type": "application/xml"}
+
+        match = re.fullmatch(re.escape(PRODUCT_PATH) + r"fixture-(\d+)/", parts.path)
+        if match and int(match.group(1)) < self.num_products:
+            i = int(match.group(1))
+            headers = {
+                **html,
+                "ETag": f'"{i}-{self.versions[i]}"',
+                "Last-Modified": formatdate(self.modified[i], usegmt=True),
+            }
+            return 200, product_html(i, self.versions[i]), headers
+
+        pattern = re.escape(PRODUCT_PATH) + r"job-solution-(\d+)/"
+        match = re.fullmatch(pattern, parts.path)
+        if match and int(match.group(1)) < NUM_JOB_SOLUTIONS:
+            return 200, product_html(self.num_products + int(match.group(1))), html
+
+        return 404, "not found", html
@@ -0,0 +1,108 @@
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional
+
+
+# =========================================================
+# PER-REQUEST TRACE
+# =========================================================
+class Trace:
+    """
+    Stage timings of one request.
+    Spans may be recorded from several threads (stage graph workers).
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self.notes: Dict[str, Any] = {}
+        # Threads currently inside a span of this request (span depth per thread)
+        self.root_thread = threading.get_ident()
+        self.active: Counter = Counter()
+        self.lock = threading.Lock()
+
+    def enter(self) -> None:
+        with self.lock:
+            self.active[threading.get_ident()] += 1
+
+    def exit(self) -> None:
+        tid = threading.get_ident()
+        with self.lock:
+            self.active[tid] -= 1
+            if self.active[tid] <= 0:
+                del self.active[tid]
+
+    def threads(self) -> List[int]:
+        """Threads working on this request right now (profiler targets)."""
+        with self.lock:
+            others = [t for t in self.active if t != self.root_thread]
+        return [self.root_thread, *others]
+
+    def record(self, name: str, t0: float, t1: float) -> None:
+        with self.lock:
+            self.spans.append(
+                {
+                    "name": name,
+                    "start_ms": round((t0 - self.start) * 1000.0, 3),
+                    "duration_ms": round((t1 - t0) * 1000.0, 3),
+                    "thread": threading.current_thread().name,
+                }
+            )
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self.lock:
+            spans = sorted(self.spans, key=lambda s: s["start_ms"])
+        total = (time.perf_counter() - self.start) * 1000.0
+        return {"total_ms": round(total, 3), "spans": spans}
+
+
+_current: ContextVar[Optional[Trace]] = ContextVar("shl_trace", default=None)
+
+
+def start_trace() -> Trace:
+    trace = Trace()
+    _current.set(trace)
+    return trace
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+# =========================================================
+# SPANS (NO-OP WHEN THE REQUEST IS NOT TRACED)
+# =========================================================
+@contextmanager
+def span(name: str):
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+
+    trace.enter()
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.record(name, t0, time.perf_counter())
+        trace.exit()
+
+
+def traced(name: str, fn: Callable) -> Callable:
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        with span(name):
+            return fn(*args, **kwargs)
+
+    return wrapper
+
+
+def annotate(key: str, value: Any) -> None:
+    """Attach a value (e.g. the extracted intent) to the current trace."""
+    trace = _current.get()
+    if trace is not None:
+        trace.notes[key] = value
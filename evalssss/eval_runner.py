@@ -0,0 +1,216 @@
+import os
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+# =========================================================
+# ADD PROJECT ROOT
+# =========================================================
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT))
+
+from retrieval.search import get_index_version, search_batch
+from reranking.reranker import rerank
+from reranking.query_understanding import extract_intents_batch, get_intent_version
+from api.pipeline import build_candidates
+from evalssss.phase2_eval import load_url_to_id_map, load_training_data
+from evalssss.metrics import (
+    average_precision_at_k,
+    hit_at_k,
+    mean,
+    ndcg_at_k,
+    recall_at_k,
+)
+
+
+# =========================================================
+# CONFIG
+# =========================================================
+FINAL_K = 10
+K_VALUES = [5, 10, 20, 50]
+
+RERANK_WORKERS = int(os.getenv("SHL_EVAL_WORKERS", str(os.cpu_count() or 4)))
+
+CACHE_DIR = Path(__file__).resolve().parent / "cache"
+OUTPUT_DIR = Path(__file__).resolve().parent / "data"
+PER_QUERY_CSV = OUTPUT_DIR / "eval_per_query.csv"
+SUMMARY_JSON = OUTPUT_DIR / "eval_summary.json"
+
+
+# =========================================================
+# DISK CACHE (ONE JSON FILE PER VERSION, KEYED BY QUERY)
+# =========================================================
+def load_cache(path: Path) -> dict:
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_cache(path: Path, data: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    tmp.replace(path)
+
+
+def cached_stage(path: Path, queries, compute, refresh: bool = False):
+    """Return one value per query, computing (in one batch) only the misses."""
+    cache = {} if refresh else load_cache(path)
+    missing = [q for q in dict.fromkeys(queries) if q not in cache]
+
+    if missing:
+        for q, value in zip(missing, compute(missing)):
+            cache[q] = value
+        save_cache(path, cache)
+
+    return [cache[q] for q in queries], len(queries) - len(missing)
+
+
+# =========================================================
+# STAGES
+# =========================================================
+def retrieve(queries):
+    # Only what rerank and the metrics need: keeps the cache small
+    return [
+        [
+            {"row": r["row"], "assessment_id": r["assessment_id"], "score": r["score"]}
+            for r in results
+        ]
+        for results in search_batch(queries)
+    ]
+
+
+def rerank_one(args):
+    query, retrieved, intent = args
+    candidates = build_candidates(retrieved)
+    if not candidates:
+        return []
+    reranked = rerank(query, candidates, FINAL_K, intent=intent)
+    return [c["assessment_id"] for c in reranked]
+
+
+def stage_metrics(ranked_lists, relevant_sets, k_values):
+    metrics = {}
+    for k in k_values:
+        pairs = list(zip(ranked_lists, relevant_sets))
+        metrics[f"recall@{k}"] = mean(recall_at_k(r, rel, k) for r, rel in pairs)
+        metrics[f"hit@{k}"] = mean(hit_at_k(r, rel, k) for r, rel in pairs)
+        metrics[f"map@{k}"] = mean(
+            average_precision_at_k(r, rel, k) for r, rel in pairs
+        )
+        metrics[f"ndcg@{k}"] = mean(ndcg_at_k(r, rel, k) for r, rel in pairs)
+    return {name: round(value, 4) for name, value in metrics.items()}
+
+
+# =========================================================
+# MAIN
+# =========================================================
+def main():
+    parser = argparse.ArgumentParser(description="Cached end-to-end evaluation")
+    parser.add_argument("--refresh", action="store_true", help="ignore disk caches")
+    parser.add_argument("--workers", type=int, default=RERANK_WORKERS)
+    args = parser.parse_args()
+
+    timings = {}
+
+    start = time.perf_counter()
+    url_to_id = load_url_to_id_map()
+    labelled, _ = load_training_data(url_to_id)
+    queries = [query for query, _ in labelled]
+    relevant = [set(ids) for _, ids in labelled]
+    timings["load_s"] = time.perf_counter() - start
+
+    index_version = get_index_version()
+    intent_version = get_intent_version()
+    print(f"🔹 Index version: {index_version} | intent version: {intent_version}")
+
+    # -------------------------------
+    # Retrieval (batched encode, cached per index version)
+    # -------------------------------
+    start = time.perf_counter()
+    retrieved, retrieval_hits = cached_stage(
+        CACHE_DIR / f"retrieval_{index_version}.json", queries, retrieve, args.refresh
+    )
+    timings["retrieval_s"] = time.perf_counter() - start
+
+    # -------------------------------
+    # Intents (packed LLM calls, cached per model + prompt)
+    # -------------------------------
+    start = time.perf_counter()
+    intents, intent_hits = cached_stage(
+        CACHE_DIR / f"intents_{intent_version}.json",
+        queries,
+        extract_intents_batch,
+        args.refresh,
+    )
+    timings["intent_s"] = time.perf_counter() - start
+
+    # -------------------------------
+    # Rerank (thread pool: NumPy scoring releases the GIL)
+    # -------------------------------
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        final = list(pool.map(rerank_one, zip(queries, retrieved, intents)))
+    timings["rerank_s"] = time.perf_counter() - start
+
+    # -------------------------------
+    # Metrics
+    # -------------------------------
+    start = time.perf_counter()
+    retrieval_ranked = [[r["assessment_id"] for r in res] for res in retrieved]
+    summary = {
+        "index_version": index_version,
+        "intent_version": intent_version,
+        "num_queries": len(queries),
+        "cache_hits": {"retrieval": retrieval_hits, "intent": intent_hits},
+        "retrieval": stage_metrics(retrieval_ranked, relevant, K_VALUES),
+        "final": stage_metrics(final, relevant, [k for k in K_VALUES if k <= FINAL_K]),
+    }
+
+    per_query = []
+    for query, rel, ret, fin in zip(queries, relevant, retrieval_ranked, final):
+        per_query.append(
+            {
+                "query": query,
+                "num_relevant": len(rel),
+                f"retrieval_recall@{FINAL_K}": recall_at_k(ret, rel, FINAL_K),
+                f"final_recall@{FINAL_K}": recall_at_k(fin, rel, FINAL_K),
+                f"final_map@{FINAL_K}": average_precision_at_k(fin, rel, FINAL_K),
+                f"final_ndcg@{FINAL_K}": ndcg_at_k(fin, rel, FINAL_K),
+            }
+        )
+    timings["metrics_s"] = time.perf_counter() - start
+    summary["timings_s"] = {name: round(t, 3) for name, t in timings.items()}
+
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame(per_query).to_csv(PER_QUERY_CSV, index=False)
+    with open(SUMMARY_JSON, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
+    # -------------------------------
+    # Report
+    # -------------------------------
+    print("\n📊 EVALUATION SUMMARY")
+    print("=" * 60)
+    for stage in ("retrieval", "final"):
+        print(f"\n{stage.upper()}")
+        for name, value in summary[stage].items():
+            print(f"  {name:<12} {value:.4f}")
+
+    print("\n⏱️  Stage timings (s)")
+    for name, value in summary["timings_s"].items():
+        print(f"  {name:<12} {value:.3f}")
+
+    print(f"\n✅ Saved per-query results to: {PER_QUERY_CSV}")
+    print(f"✅ Saved summary to: {SUMMARY_JSON}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import math
+from typing import Iterable, List, Set
+
+
+# =========================================================
+# RANKING METRICS (BINARY RELEVANCE)
+# =========================================================
+def recall_at_k(ranked: List[str], relevant: Set[str], k: int) -> float:
+    """Fraction of relevant items found in the top k."""
+    if not relevant:
+        return 0.0
+    return len(set(ranked[:k]) & relevant) / len(relevant)
+
+
+def hit_at_k(ranked: List[str], relevant: Set[str], k: int) -> float:
+    """1 if any relevant item is in the top k (Phase-2 recall definition)."""
+    return float(any(aid in relevant for aid in ranked[:k]))
+
+
+def average_precision_at_k(ranked: List[str], relevant: Set[str], k: int) -> float:
+    if not relevant:
+        return 0.0
+
+    hits, total = 0, 0.0
+    for i, aid in enumerate(ranked[:k], start=1):
+        if aid in relevant:
+            hits += 1
+            total += hits / i
+
+    return total / min(len(relevant), k)
+
+
+def ndcg_at_k(ranked: List[str], relevant: Set[str], k: int) -> float:
+    if not relevant:
+        return 0.0
+
+    dcg = sum(
+        1.0 / math.log2(i + 1)
+        for i, aid in enumerate(ranked[:k], start=1)
+        if aid in relevant
+    )
+    ideal = sum(1.0 / math.log2(i + 1) for i in range(1, min(len(relevant), k) + 1))
+    return dcg / ideal
+
+
+def mean(values: Iterable[float]) -> float:
+    values = list(values)
+    return sum(values) / len(values) if values else 0.0
@@ -1,10 +1,10 @@
 import sys
 import json
+import argparse
 from pathlib import Path
 from collections import defaultdict
 
 import pandas as pd
-from tqdm import tqdm
 
 
 # =========================================================
@@ -13,7 +13,8 @@ from tqdm import tqdm
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 sys.path.append(str(PROJECT_ROOT))
 
-from retrieval.search import search
+from retrieval.search import get_index_version
+from evalssss.metrics import hit_at_k, recall_at_k
 
 
 # =========================================================
@@ -114,52 +115,57 @@ def save_missing_urls(missing_urls):
 # =========================================================
 # EVALUATION
 # =========================================================
-def run_evaluation(queries):
-    print("🔹 Running Phase-2 recall evaluation...")
+def run_evaluation(queries, refresh: bool = False):
+    # Deferred: eval_runner imports the loaders above from this module
+    from evalssss.eval_runner import CACHE_DIR, cached_stage, retrieve, stage_metrics
 
-    results = []
-
-    for idx, (query, true_ids) in enumerate(tqdm(queries)):
-        retrieved = search(query)
+    print("🔹 Running Phase-2 retrieval evaluation...")
 
-        retrieved_ids = [r["assessment_id"] for r in retrieved if "assessment_id" in r]
+    texts = [query for query, _ in queries]
+    relevant = [set(ids) for _, ids in queries]
 
-        # Debug first query
-        if idx == 0:
-            print("\n🔍 DEBUG SAMPLE")
-            print("Query:", query)
-            print("GT assessment_ids:", list(true_ids))
-            print("Retrieved assessment_ids:", retrieved_ids[:10])
+    # Batched encode, shared per index version with eval_runner's cache
+    retrieved, cache_hits = cached_stage(
+        CACHE_DIR / f"retrieval_{get_index_version()}.json", texts, retrieve, refresh
+    )
+    print(f"🔹 Retrieval cache hits: {cache_hits}/{len(texts)}")
+    ranked = [[r["assessment_id"] for r in res] for res in retrieved]
 
-        row = {
-            "query": query,
-            "num_relevant": len(true_ids),
-        }
+    if texts:
+        print("\n🔍 DEBUG SAMPLE")
+        print("Query:", texts[0])
+        print("GT assessment_ids:", list(relevant[0]))
+        print("Retrieved assessment_ids:", ranked[0][:10])
 
+    results = []
+    for query, rel, ret in zip(texts, relevant, ranked):
+        row = {"query": query, "num_relevant": len(rel)}
         for k in K_VALUES:
-            top_k = retrieved_ids[:k]
-            hit = any(aid in top_k for aid in true_ids)
-            row[f"recall@{k}"] = int(hit)
-
+            row[f"hit@{k}"] = hit_at_k(ret, rel, k)
+            row[f"recall@{k}"] = recall_at_k(ret, rel, k)
         results.append(row)
 
-    return pd.DataFrame(results)
+    return pd.DataFrame(results), stage_metrics(ranked, relevant, K_VALUES)
 
 
 # =========================================================
 # MAIN
 # =========================================================
 def main():
+    parser = argparse.ArgumentParser(description="Phase-2 retrieval evaluation")
+    parser.add_argument("--refresh", action="store_true", help="ignore disk caches")
+    args = parser.parse_args()
+
     url_to_id = load_url_to_id_map()
 
     queries, missing_urls = load_training_data(url_to_id)
     save_missing_urls(missing_urls)
 
-    eval_df = run_evaluation(queries)
+    eval_df, summary = run_evaluation(queries, refresh=args.refresh)
 
-    print("\n🔹 Phase-2 Recall Summary")
-    for k in K_VALUES:
-        print(f"recall@{k}: {eval_df[f'recall@{k}'].mean():.3f}")
+    print("\n🔹 Phase-2 Retrieval Summary")
+    for name, value in summary.items():
+        print(f"  {name:<12} {value:.4f}")
 
     OUTPUT_CSV.parent.mkdir(parents=True, exist_ok=True)
     eval_df.to_csv(OUTPUT_CSV, index=False)
@@ -1,5 +1,4 @@
 import sys
-import json
 from pathlib import Path
 
 import pandas as pd
@@ -8,7 +7,9 @@ PROJECT_ROOT = Path(__file__).resolve().parents[1]
 sys.path.append(str(PROJECT_ROOT))
 
 from retrieval.search import search
+from retrieval.catalog import get_catalog
 from reranking.reranker import rerank
+from reranking.query_understanding import extract_intents_batch
 
 
 # =========================================================
@@ -17,34 +18,32 @@ from reranking.reranker import rerank
 TOP_K_RETRIEVAL = 50
 FINAL_K = 10
 
-ASSESSMENTS_FILE = PROJECT_ROOT / "data" / "processed" / "shl_assessments.json"
 OUTPUT_FILE = Path(__file__).resolve().parent / "data" / "ranking_eval.csv"
 
 
 # =========================================================
 # LOAD CANONICAL DATA
 # =========================================================
-with open(ASSESSMENTS_FILE, "r", encoding="utf-8") as f:
-    ASSESSMENTS = {a["assessment_id"]: a for a in json.load(f)}
+CATALOG = get_catalog()
 
 
 # =========================================================
 # EVALUATION
 # =========================================================
-def evaluate(query: str, true_ids: set):
+def evaluate(query: str, true_ids: set, intent: dict = None):
     retrieved = search(query)[:TOP_K_RETRIEVAL]
 
-    # Attach metadata
-    candidates = []
-    for r in retrieved:
-        aid = r.get("assessment_id")
-        if aid in ASSESSMENTS:
-            c = ASSESSMENTS[aid].copy()
-            c["assessment_id"] = aid
-            c["retrieval_score"] = r.get("retrieval_score", 0)
-            candidates.append(c)
+    # Row-addressed candidates
+    candidates = [
+        {
+            "row": r["row"],
+            "assessment_id": r["assessment_id"],
+            "retrieval_score": r["score"],
+        }
+        for r in retrieved
+    ]
 
-    reranked = rerank(query, candidates, FINAL_K)
+    reranked = rerank(query, candidates, FINAL_K, intent=intent)
 
     rows = []
     for rank, c in enumerate(reranked, start=1):
@@ -54,7 +53,7 @@ def evaluate(query: str, true_ids: set):
                 "assessment_id": c["assessment_id"],
                 "rank": rank,
                 "is_relevant": int(c["assessment_id"] in true_ids),
-                "test_type": c.get("test_type"),
+                "test_type": CATALOG.get("test_type", c["row"]),
             }
         )
 
@@ -70,10 +69,13 @@ def main():
     url_to_id = load_url_to_id_map()
     queries, _ = load_training_data(url_to_id)
 
+    # Packed LLM calls: one completion per batch of queries
+    intents = extract_intents_batch([query for query, _ in queries])
+
     all_rows = []
 
-    for query, true_ids in queries:
-        all_rows.extend(evaluate(query, true_ids))
+    for (query, true_ids), intent in zip(queries, intents):
+        all_rows.extend(evaluate(query, true_ids, intent))
 
     df = pd.DataFrame(all_rows)
     OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
@@ -1,5 +1,4 @@
 import sys
-import json
 from pathlib import Path
 
 import pandas as pd
@@ -12,7 +11,9 @@ PROJECT_ROOT = Path(__file__).resolve().parents[1]
 sys.path.append(str(PROJECT_ROOT))
 
 from retrieval.search import search
+from retrieval.catalog import get_catalog
 from reranking.reranker import rerank
+from reranking.query_understanding import extract_intents_batch
 
 
 # =========================================================
@@ -24,21 +25,16 @@ BASE_DIR = PROJECT_ROOT
 EXCEL_FILE = BASE_DIR / "data" / "train_test_data" / "Gen_AI Dataset (1).xlsx"
 TEST_SHEET = "Test-Set"  # Unlabelled test queries
 
-ASSESSMENTS_FILE = BASE_DIR / "data" / "processed" / "shl_assessments.json"
-
 OUTPUT_CSV = BASE_DIR / "data" / "submission_predictions.csv"
 
 FINAL_K = 10
 
 
 # =========================================================
-# LOAD CANONICAL ASSESSMENTS
+# LOAD CANONICAL CATALOG
 # =========================================================
-def load_assessments():
-    with open(ASSESSMENTS_FILE, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    return {a["assessment_id"]: a for a in data}
+def load_catalog():
+    return get_catalog()
 
 
 # =========================================================
@@ -59,30 +55,37 @@ def load_test_queries():
 # =========================================================
 # GENERATE PREDICTIONS
 # =========================================================
-def generate_predictions(queries, assessments):
+def generate_predictions(queries, catalog):
     rows = []
 
-    for query in tqdm(queries, desc="🔹 Generating predictions"):
+    # Packed LLM calls: one completion per batch of queries
+    intents = extract_intents_batch(queries)
+
+    for query, intent in tqdm(
+        zip(queries, intents), total=len(queries), desc="🔹 Generating predictions"
+    ):
         # Phase-2 retrieval
         retrieved = search(query)[:50]
 
-        candidates = []
-        for r in retrieved:
-            aid = r.get("assessment_id")
-            if aid in assessments:
-                c = assessments[aid].copy()
-                c["retrieval_score"] = r.get("retrieval_score", 0.0)
-                candidates.append(c)
-
+        candidates = [
+            {
+                "row": r["row"],
+                "assessment_id": r["assessment_id"],
+                "retrieval_score": r["score"],
+            }
+            for r in retrieved
+        ]
 
         if not candidates:
             continue
 
         # Phase-3 reranking
-        reranked = rerank(query, candidates, final_k=FINAL_K)
+        reranked = rerank(query, candidates, final_k=FINAL_K, intent=intent)
 
         for a in reranked:
-            rows.append({"Query": query, "Assessment_url": a["url"]})
+            rows.append(
+                {"Query": query, "Assessment_url": catalog.get("url", a["row"])}
+            )
 
     return pd.DataFrame(rows)
 
@@ -91,10 +94,10 @@ def generate_predictions(queries, assessments):
 # MAIN
 # =========================================================
 def main():
-    assessments = load_assessments()
+    catalog = load_catalog()
     queries = load_test_queries()
 
-    df = generate_predictions(queries, assessments)
+    df = generate_predictions(queries, catalog)
 
     OUTPUT_CSV.parent.mkdir(parents=True, exist_ok=True)
     df.to_csv(OUTPUT_CSV, index=False)
@@ -0,0 +1,508 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+import xml.etree.ElementTree as ET
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+import httpx
+from bs4 import BeautifulSoup
+
+from crawl import (
+    BASE_CATALOG_URL,
+    BASE_URL,
+    HEADERS,
+    catalog_page_url,
+    extract_individual_test_links,
+    parse_test_details,
+)
+from fast_extract import parse_test_details_html
+from http_cache import PARSER_VERSION, HttpCache, content_hash
+
+# Politeness budget: requests per second per host, and in-flight requests per host.
+# Defaults match crawl.py (one request at a time, 2.5-4.5s apart: ~0.3 req/s);
+# faster crawls are opt-in through SHL_CRAWL_RATE / SHL_CRAWL_CONCURRENCY
+MAX_CONCURRENCY_PER_HOST = int(os.getenv("SHL_CRAWL_CONCURRENCY", "1"))
+RATE_LIMIT = float(os.getenv("SHL_CRAWL_RATE", "0.3"))
+MIN_RATE = 0.1
+
+# AIMD: x BACKOFF_FACTOR on 429 / 5xx, then +RATE_STEP of the budget per success
+RATE_STEP = 0.05
+BACKOFF_FACTOR = 0.5
+
+MAX_RETRIES = 4
+RETRY_STATUS = {429, 500, 502, 503, 504}
+REQUEST_TIMEOUT_S = 60.0
+
+ITEMS_PER_PAGE = 12
+MAX_PAGES = 60
+# Catalog listing pages fetched ahead of the one being processed
+LISTING_PREFETCH = 2
+# Product pages fetched (or done) but not yet emitted: bounds crawl memory
+FETCH_WINDOW = int(os.getenv("SHL_CRAWL_WINDOW", "32"))
+
+SITEMAP_PATH = "/sitemap.xml"
+PRODUCT_URL_MARKER = "/product-catalog/view/"
+
+# Product page parser: "bs4" (crawl.py reference) or "lxml" (fast_extract, scoped).
+# lxml stays opt-in until tests/test_extract_parity.py passes on captured real pages
+PARSER = os.getenv("SHL_PARSER", "bs4")
+# Parse in a process pool of this size; 0 parses inline on the event loop
+PARSE_WORKERS = int(os.getenv("SHL_PARSE_WORKERS", "0"))
+
+
+class AdaptiveRateLimiter:
+    """
+    Per-host request pacing with additive increase / multiplicative decrease.
+    Requests are spaced 1 / rate apart; 429 and 5xx halve the rate and
+    honour Retry-After by pausing the whole host. Successes climb back
+    towards max_rate (the politeness budget), never above it.
+    """
+
+    def __init__(self, max_rate: float = RATE_LIMIT):
+        self.max_rate = max_rate
+        self.rate = max_rate
+        self.next_slot = 0.0
+        self.paused_until = 0.0
+        self.lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot, self.paused_until)
+            self.next_slot = slot + 1.0 / self.rate
+
+        delay = slot - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def on_success(self) -> None:
+        self.rate = min(self.max_rate, self.rate + RATE_STEP * self.max_rate)
+
+    def on_throttle(self, retry_after: float | None = None) -> None:
+        floor = min(MIN_RATE, self.max_rate)
+        self.rate = max(floor, self.rate * BACKOFF_FACTOR)
+        if retry_after:
+            self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+
+
+def _retry_after(resp: httpx.Response) -> float | None:
+    try:
+        return float(resp.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_time(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip())
+    except ValueError:
+        return None
+    # Date-only lastmod values are naive: treat them as UTC
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _url_key(url: str) -> str:
+    """Sitemap and listing links may differ in host form or trailing slash."""
+    return urlsplit(url).path.rstrip("/")
+
+
+def parse_product_html(html: str, url: str, parser: str = PARSER) -> dict | None:
+    """Module-level (picklable) so a process pool can run it."""
+    if parser == "bs4":
+        return parse_test_details(BeautifulSoup(html, "html.parser"), url)
+    return parse_test_details_html(html, url)
+
+
+def _xml_locs(xml_text: str, tag: str) -> list[tuple[str, str | None]]:
+    """(loc, lastmod) pairs of a sitemap (tag="url") or sitemap index ("sitemap")."""
+    root = ET.fromstring(xml_text)
+    pairs = []
+    for node in root.iter():
+        if node.tag.rsplit("}", 1)[-1] != tag:
+            continue
+        loc = lastmod = None
+        for child in node:
+            name = child.tag.rsplit("}", 1)[-1]
+            if name == "loc":
+                loc = (child.text or "").strip()
+            elif name == "lastmod":
+                lastmod = (child.text or "").strip()
+        if loc:
+            pairs.append((loc, lastmod))
+    return pairs
+
+
+class AsyncCrawler:
+    """
+    Pooled async HTTP client with a concurrency cap and an adaptive
+    rate limiter per host. Crawl time is bounded by the politeness
+    budget (rate x concurrency), not by serial round trips.
+    With an HttpCache, product pages are fetched conditionally:
+    304 / unchanged bodies reuse the cached record without parsing.
+    """
+
+    def __init__(
+        self,
+        base_url: str = BASE_URL,
+        catalog_url: str = BASE_CATALOG_URL,
+        concurrency: int = MAX_CONCURRENCY_PER_HOST,
+        rate: float = RATE_LIMIT,
+        cache: HttpCache | None = None,
+        parser: str = PARSER,
+        parse_workers: int = PARSE_WORKERS,
+    ):
+        self.base_url = base_url
+        self.catalog_url = catalog_url
+        self.concurrency = concurrency
+        self.rate = rate
+        self.cache = cache
+        self.parser = parser
+        self.parse_workers = parse_workers
+        self.parse_pool = None
+
+        self.slots = defaultdict(lambda: asyncio.Semaphore(self.concurrency))
+        self.limiters = defaultdict(lambda: AdaptiveRateLimiter(self.rate))
+        self.stats = defaultdict(int)
+        self.client = None
+
+    async def __aenter__(self) -> "AsyncCrawler":
+        self.client = httpx.AsyncClient(
+            headers=HEADERS,
+            timeout=REQUEST_TIMEOUT_S,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=self.concurrency * 2,
+                max_keepalive_connections=self.concurrency,
+            ),
+        )
+        if self.parse_workers > 0:
+            self.parse_pool = ProcessPoolExecutor(self.parse_workers)
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.client.aclose()
+        if self.parse_pool is not None:
+            self.parse_pool.shutdown(cancel_futures=True)
+
+    async def fetch(self, url: str, headers: dict | None = None):
+        """
+        GET with per-host pacing and jittered retries.
+        Returns the response (200 or 304) or None on failure.
+        """
+        host = urlsplit(url).netloc
+        limiter = self.limiters[host]
+
+        for attempt in range(MAX_RETRIES + 1):
+            async with self.slots[host]:
+                await limiter.acquire()
+                try:
+                    resp = await self.client.get(url, headers=headers)
+                except httpx.TransportError as e:
+                    self.stats["transport_errors"] += 1
+                    error = e
+                    resp = None
+
+            if resp is not None:
+                self.stats["bytes"] += len(resp.content)
+                if resp.status_code in RETRY_STATUS:
+                    self.stats[f"status_{resp.status_code}"] += 1
+                    limiter.on_throttle(_retry_after(resp))
+                    error = f"HTTP {resp.status_code}"
+                elif resp.status_code >= 400:
+                    print(f"Skipping {url}: HTTP {resp.status_code}")
+                    self.stats["skipped"] += 1
+                    return None
+                else:
+                    limiter.on_success()
+                    self.stats["fetched"] += 1
+                    return resp
+
+            if attempt < MAX_RETRIES:
+                self.stats["retries"] += 1
+                await asyncio.sleep(random.uniform(0, 2**attempt))
+
+        print(f"Error processing {url}: {error}")
+        self.stats["failed"] += 1
+        return None
+
+    async def parse_product(self, html: str, url: str) -> dict | None:
+        """Parse inline, or in the process pool so parsing overlaps fetching."""
+        self.stats["parsed"] += 1
+        try:
+            if self.parse_pool is None:
+                return parse_product_html(html, url, self.parser)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.parse_pool, parse_product_html, html, url, self.parser
+            )
+        except Exception as e:
+            print(f"Error processing {url}: {e}")
+            return None
+
+    async def cached_record(self, entry: dict) -> dict | None:
+        """Cached record, re-parsed from cached HTML if the parser changed."""
+        if entry.get("parser_version") == PARSER_VERSION:
+            return entry["record"]
+
+        html = self.cache.html(entry["url"])
+        if html is None:
+            return entry["record"]
+        record = await self.parse_product(html, entry["url"])
+        validators = {
+            "etag": entry.get("etag"),
+            "last-modified": entry.get("last_modified"),
+        }
+        self.cache.store(entry["url"], html, validators, record)
+        return record
+
+    async def fetch_product(self, url: str) -> dict | None:
+        entry = self.cache.get(url) if self.cache else None
+        resp = await self.fetch(url, HttpCache.conditional_headers(entry))
+
+        if resp is None:
+            # Keep the last good copy rather than dropping the product
+            return await self.cached_record(entry) if entry else None
+
+        if entry and resp.status_code == 304:
+            self.stats["not_modified"] += 1
+            self.cache.revalidated(entry, resp.headers)
+            return await self.cached_record(entry)
+
+        html = resp.text
+        if entry and entry["content_hash"] == content_hash(html):
+            # No validators from the server, but the body is unchanged
+            self.stats["unchanged"] += 1
+            self.cache.revalidated(entry, resp.headers)
+            return await self.cached_record(entry)
+
+        record = await self.parse_product(html, url)
+        if self.cache:
+            self.cache.store(url, html, resp.headers, record)
+        return record
+
+    async def fetch_listing(self, offset: int) -> list[str] | None:
+        resp = await self.fetch(catalog_page_url(offset, self.catalog_url))
+        if resp is None:
+            return None
+        soup = BeautifulSoup(resp.text, "html.parser")
+        return extract_individual_test_links(soup, self.base_url)
+
+    async def iter_listings(self, max_pages: int = MAX_PAGES):
+        """
+        Product links of each listing page, in page order, with
+        LISTING_PREFETCH pages in flight ahead. Stops at the first empty
+        page; yields None (then stops) if a page fails to load.
+        """
+        listings = {}
+
+        def schedule_listing(page: int) -> None:
+            if page < max_pages and page not in listings:
+                offset = page * ITEMS_PER_PAGE
+                listings[page] = asyncio.create_task(self.fetch_listing(offset))
+
+        for ahead in range(LISTING_PREFETCH + 1):
+            schedule_listing(ahead)
+
+        try:
+            for page in range(max_pages):
+                links = await listings.pop(page)
+                if links is None:
+                    print(f"CRITICAL: Failed to load catalog page {page + 1}")
+                    yield None
+                    return
+                if not links:
+                    print(f"No products found at offset {page * ITEMS_PER_PAGE}.")
+                    return
+                yield links
+                schedule_listing(page + 1 + LISTING_PREFETCH)
+        finally:
+            # Past the end of the catalog: drop speculative listing fetches
+            for task in listings.values():
+                task.cancel()
+
+    async def discover_sitemap(self) -> list[tuple[str, str | None]] | None:
+        """Product (url, lastmod) pairs from sitemap.xml (index or urlset)."""
+        resp = await self.fetch(self.base_url.rstrip("/") + SITEMAP_PATH)
+        if resp is None:
+            return None
+
+        urls = _xml_locs(resp.text, "url")
+        children = [loc for loc, _ in _xml_locs(resp.text, "sitemap")]
+        for child in await asyncio.gather(*(self.fetch(c) for c in children)):
+            if child is not None:
+                urls.extend(_xml_locs(child.text, "url"))
+
+        return [(loc, lm) for loc, lm in urls if PRODUCT_URL_MARKER in loc]
+
+    async def _fetch_in_order(self, urls, visit, on_record=None) -> list[dict]:
+        """
+        visit(url) for every url of the async iterator `urls`, keeping at
+        most FETCH_WINDOW product pages in flight or finished ahead of the
+        one being emitted. Records come out in url order: to on_record
+        (it may block; fetching then stops too) or, without it, collected
+        and returned.
+        """
+        window = asyncio.Semaphore(FETCH_WINDOW)
+        ordered = asyncio.Queue()
+
+        async def emit() -> list[dict]:
+            results = []
+            while (task := await ordered.get()) is not None:
+                record = await task
+                if record and on_record:
+                    await asyncio.to_thread(on_record, record)
+                elif record:
+                    results.append(record)
+                window.release()
+            return results
+
+        emitter = asyncio.create_task(emit())
+        try:
+            async for url in urls:
+                slot = asyncio.ensure_future(window.acquire())
+                await asyncio.wait({slot, emitter}, return_when=asyncio.FIRST_COMPLETED)
+                if not slot.done():
+                    # on_record failed: stop fetching, re-raise below
+                    slot.cancel()
+                    break
+                ordered.put_nowait(asyncio.create_task(visit(url)))
+        finally:
+            ordered.put_nowait(None)
+        return await emitter
+
+    async def crawl(
+        self, max_pages: int = MAX_PAGES, on_record=None, lastmods=None
+    ) -> list[dict]:
+        """
+        Walk listing pages in order, keeping LISTING_PREFETCH pages in
+        flight ahead, while product pages of earlier listings download.
+        Output order matches the serial crawler (page, then link order).
+        on_record(record) receives records in that order as soon as they
+        (and all before them) are done; it may block to apply back-pressure.
+        With on_record, records are streamed only (the result is empty).
+        lastmods ({url path: sitemap lastmod}) skips cached products not
+        modified since they were fetched: they cost no request at all.
+        """
+
+        async def links():
+            seen_urls = set()
+            page = 0
+            async for page_links in self.iter_listings(max_pages):
+                if page_links is None:
+                    break
+                new_links = [link for link in page_links if link not in seen_urls]
+                seen_urls.update(new_links)
+                page += 1
+                print(f"Crawling Page {page}: {len(new_links)} new products")
+                for link in new_links:
+                    yield link
+
+            if lastmods is not None:
+                listed = {_url_key(link) for link in seen_urls}
+                self.stats["sitemap_not_listed"] += len(set(lastmods) - listed)
+
+        async def visit(url):
+            entry = self.cache.get(url) if self.cache and lastmods else None
+            modified = _parse_time(lastmods.get(_url_key(url))) if entry else None
+            if entry and modified and modified <= _parse_time(entry["fetched_at"]):
+                self.stats["sitemap_unchanged"] += 1
+                return await self.cached_record(entry)
+            return await self.fetch_product(url)
+
+        return await self._fetch_in_order(links(), visit, on_record)
+
+
+def crawl_shl_assessments_async(
+    base_url: str = BASE_URL,
+    catalog_url: str = BASE_CATALOG_URL,
+    concurrency: int = MAX_CONCURRENCY_PER_HOST,
+    rate: float = RATE_LIMIT,
+    max_pages: int = MAX_PAGES,
+    cache: HttpCache | None = None,
+    discovery: str = "listing",
+    parser: str = PARSER,
+    parse_workers: int = PARSE_WORKERS,
+    on_record=None,
+) -> list[dict]:
+    """
+    discovery="listing" walks the catalog pages; "sitemap" also reads
+    sitemap.xml and skips cached products whose lastmod is not newer
+    (falls back to the listing walk if there is no usable sitemap), so it
+    needs a cache. A cache turns repeat runs into conditional, incremental
+    crawls.
+    parser / parse_workers pick the product page parser and its process pool.
+    on_record(record) streams records out while the crawl is running
+    (in both discovery modes); they are then not collected.
+    """
+    if discovery == "sitemap" and cache is None:
+        raise ValueError("sitemap discovery skips cached products: pass a cache")
+
+    async def run():
+        async with AsyncCrawler(
+            base_url, catalog_url, concurrency, rate, cache, parser, parse_workers
+        ) as crawler:
+            lastmods = None
+            if discovery == "sitemap":
+                products = await crawler.discover_sitemap()
+                if products:
+                    # The sitemap also lists pre-packaged job solutions: the
+                    # product set still comes from the type=1 listing pages
+                    lastmods = {_url_key(url): lm for url, lm in products}
+                else:
+                    print("Sitemap discovery failed, walking listing pages")
+            assessments = await crawler.crawl(max_pages, on_record, lastmods)
+            print(f"Crawler stats: {dict(crawler.stats)}")
+            return assessments
+
+    return asyncio.run(run())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent SHL catalog crawl")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="conditional requests against the on-disk HTTP cache",
+    )
+    parser.add_argument(
+        "--discovery",
+        choices=["listing", "sitemap"],
+        default="listing",
+        help="sitemap implies --incremental",
+    )
+    parser.add_argument("--parser", choices=["lxml", "bs4"], default=PARSER)
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=PARSE_WORKERS,
+        help="process pool size for product page parsing (0 = inline)",
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    data = crawl_shl_assessments_async(
+        cache=HttpCache() if args.incremental or args.discovery == "sitemap" else None,
+        discovery=args.discovery,
+        parser=args.parser,
+        parse_workers=args.parse_workers,
+    )
+    print(
+        f"Total assessments scraped: {len(data)} "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+
+    with open("assessments_data.json", "w") as f:
+        json.dump(data, f, indent=4)
+
+    if len(data) < 100:
+        print("WARNING: Data count low. Check for blocks.")
+    else:
+        print("SUCCESS.")
@@ -7,7 +7,9 @@ from urllib.parse import urljoin
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 import re
-import json
+import argparse
+
+from journal import DEFAULT_JOURNAL, CrawlJournal, iter_records, replay
 
 BASE_URL = "https://www.shl.com"
 BASE_CATALOG_URL = "https://www.shl.com/products/product-catalog/"
@@ -45,7 +47,13 @@ def get_soup(url: str) -> BeautifulSoup:
     return BeautifulSoup(resp.text, "html.parser")
 
 
-def extract_individual_test_links(page_soup: BeautifulSoup) -> list[str]:
+def catalog_page_url(offset: int, catalog_url: str = BASE_CATALOG_URL) -> str:
+    return f"{catalog_url}?start={offset}&type=1"
+
+
+def extract_individual_test_links(
+    page_soup: BeautifulSoup, base_url: str = BASE_URL
+) -> list[str]:
     links = set()
     product_rows = page_soup.find_all("tr", attrs={"data-entity-id": True})
 
@@ -54,82 +62,14 @@ def extract_individual_test_links(page_soup: BeautifulSoup) -> list[str]:
         if title_col:
             a_tag = title_col.find("a", href=True)
             if a_tag:
-                links.add(urljoin(BASE_URL, a_tag["href"]))
+                links.add(urljoin(base_url, a_tag["href"]))
     return list(links)
 
 
 def extract_test_details(url: str) -> dict | None:
     try:
         soup = get_soup(url)
-
-        # --- 1. NAME ---
-        name_tag = soup.find("h1")
-        if not name_tag:
-            return None
-        name = name_tag.get_text(strip=True)
-
-        # --- 2. DESCRIPTION ---
-        description = ""
-        desc_header = soup.find("h4", string=re.compile("Description", re.I))
-        if desc_header:
-            desc_content = desc_header.find_next("p")
-            if desc_content:
-                description = desc_content.get_text(" ", strip=True)
-
-        if not description:
-            rich_text = soup.find("div", class_="rich-text")
-            if rich_text:
-                description = rich_text.get_text(" ", strip=True)
-
-        # --- 3. DURATION ---
-        duration = 0
-        length_header = soup.find("h4", string=re.compile("Assessment length", re.I))
-        if length_header:
-            length_text_tag = length_header.find_next("p")
-            if length_text_tag:
-                match = re.search(r"(\d+)", length_text_tag.get_text(strip=True))
-                if match:
-                    duration = int(match.group(1))
-
-        # --- 4. REMOTE SUPPORT ---
-        remote_support = "No"
-        remote_label = soup.find(string=re.compile("Remote Testing", re.I))
-        if remote_label:
-            parent = remote_label.parent
-            if parent:
-                yes_circle = parent.find("span", class_=lambda x: x and "-yes" in x)
-                if not yes_circle and parent.parent:
-                    yes_circle = parent.parent.find(
-                        "span", class_=lambda x: x and "-yes" in x
-                    )
-                if yes_circle:
-                    remote_support = "Yes"
-
-        # --- 5. TEST TYPE (FIXED & SCOPED) ---
-        test_type_list = []
-
-        type_label = soup.find(string=re.compile(r"Test Type\s*:", re.I))
-        if type_label:
-            container_p = type_label.find_parent("p")
-            if container_p:
-                key_spans = container_p.select("span.product-catalogue__key")
-                test_type_list = [
-                    span.get_text(strip=True)
-                    for span in key_spans
-                    if span.get_text(strip=True)
-                ]
-
-        test_type_list = list(set(test_type_list))
-
-        return {
-            "name": name,
-            "url": url,
-            "adaptive_support": "No",
-            "description": description,
-            "duration": duration,
-            "remote_support": remote_support,
-            "test_type": test_type_list,
-        }
+        return parse_test_details(soup, url)
 
     except requests.exceptions.HTTPError as e:
         print(f"Skipping {url}: {e}")
@@ -139,18 +79,101 @@ def extract_test_details(url: str) -> dict | None:
         return None
 
 
-def crawl_shl_assessments() -> list[dict]:
-    assessments = []
+def parse_test_details(soup: BeautifulSoup, url: str) -> dict | None:
+    """Field extraction from an already-fetched product page (no I/O)."""
+    # --- 1. NAME ---
+    name_tag = soup.find("h1")
+    if not name_tag:
+        return None
+    name = name_tag.get_text(strip=True)
+
+    # --- 2. DESCRIPTION ---
+    description = ""
+    desc_header = soup.find("h4", string=re.compile("Description", re.I))
+    if desc_header:
+        desc_content = desc_header.find_next("p")
+        if desc_content:
+            description = desc_content.get_text(" ", strip=True)
+
+    if not description:
+        rich_text = soup.find("div", class_="rich-text")
+        if rich_text:
+            description = rich_text.get_text(" ", strip=True)
+
+    # --- 3. DURATION ---
+    duration = 0
+    length_header = soup.find("h4", string=re.compile("Assessment length", re.I))
+    if length_header:
+        length_text_tag = length_header.find_next("p")
+        if length_text_tag:
+            match = re.search(r"(\d+)", length_text_tag.get_text(strip=True))
+            if match:
+                duration = int(match.group(1))
+
+    # --- 4. REMOTE SUPPORT ---
+    remote_support = "No"
+    remote_label = soup.find(string=re.compile("Remote Testing", re.I))
+    if remote_label:
+        parent = remote_label.parent
+        if parent:
+            yes_circle = parent.find("span", class_=lambda x: x and "-yes" in x)
+            if not yes_circle and parent.parent:
+                yes_circle = parent.parent.find(
+                    "span", class_=lambda x: x and "-yes" in x
+                )
+            if yes_circle:
+                remote_support = "Yes"
+
+    # --- 5. TEST TYPE (FIXED & SCOPED) ---
+    test_type_list = []
+
+    type_label = soup.find(string=re.compile(r"Test Type\s*:", re.I))
+    if type_label:
+        container_p = type_label.find_parent("p")
+        if container_p:
+            key_spans = container_p.select("span.product-catalogue__key")
+            test_type_list = [
+                span.get_text(strip=True)
+                for span in key_spans
+                if span.get_text(strip=True)
+            ]
+
+    test_type_list = list(set(test_type_list))
+
+    return {
+        "name": name,
+        "url": url,
+        "adaptive_support": "No",
+        "description": description,
+        "duration": duration,
+        "remote_support": remote_support,
+        "test_type": test_type_list,
+    }
+
+
+def crawl_shl_assessments(
+    journal_path=DEFAULT_JOURNAL, resume: bool = False, on_record=None
+) -> list[dict]:
+    """
+    Serial crawl, journaled to an append-only JSONL file as it goes.
+    resume=True continues an interrupted crawl from the journal.
+    on_record(record) is called for each new record (streaming consumers).
+    """
     seen_urls = set()
-
     offset = 0
+    total = 0
     items_per_page = 12
-    page_number = 1
+
+    if resume:
+        seen_urls, offset, total = replay(journal_path)
+        print(f"Resuming at offset {offset} ({total} records journaled)")
+    page_number = offset // items_per_page + 1
 
     print("Starting robust ingestion...")
+    journal = CrawlJournal(journal_path, resume=resume)
 
     while True:
-        current_url = f"{BASE_CATALOG_URL}?start={offset}&type=1"
+        current_url = catalog_page_url(offset)
         print(f"Crawling Page {page_number} (offset={offset})...")
 
         try:
@@ -171,17 +194,18 @@ def crawl_shl_assessments() -> list[dict]:
 
             seen_urls.add(link)
             data = extract_test_details(link)
+            journal.append(offset, link, data)
             if data:
-                assessments.append(data)
                 count_new_on_page += 1
+                if on_record:
+                    on_record(data)
 
             time.sleep(random.uniform(2.5, 4.5))
 
-        print(f" -> Added {count_new_on_page} items. (Total: {len(assessments)})")
-
-        with open("assessments_data.json", "w") as f:
-            json.dump(assessments, f, indent=4)
+        total += count_new_on_page
+        print(f" -> Added {count_new_on_page} items. (Total: {total})")
 
+        journal.page_done(offset, offset + items_per_page)
         offset += items_per_page
         page_number += 1
         time.sleep(2)
@@ -189,11 +213,18 @@ def crawl_shl_assessments() -> list[dict]:
         if page_number > 60:
             break
 
-    return assessments
+    journal.close()
+    return list(iter_records(journal_path))
 
 
 if __name__ == "__main__":
-    data = crawl_shl_assessments()
+    parser = argparse.ArgumentParser(description="Serial SHL catalog crawl")
+    parser.add_argument(
+        "--resume", action="store_true", help="continue from the crawl journal"
+    )
+    args = parser.parse_args()
+
+    data = crawl_shl_assessments(resume=args.resume)
     print(f"Total assessments scraped: {len(data)}")
 
     if len(data) < 100:
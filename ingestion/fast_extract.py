@@ -0,0 +1,168 @@
+import re
+
+import lxml.html
+from lxml import etree
+
+# Precompiled patterns and selectors (built once per process)
+_DESCRIPTION_RE = re.compile("Description", re.I)
+_LENGTH_RE = re.compile("Assessment length", re.I)
+_REMOTE_RE = re.compile("Remote Testing", re.I)
+_TEST_TYPE_RE = re.compile(r"Test Type\s*:", re.I)
+_DIGITS_RE = re.compile(r"(\d+)")
+
+# Scope: from the product title to the page footer (the last <footer>: one
+# inside the product body, e.g. a quote's attribution, must not cut it short)
+_SCOPE_START_RE = re.compile(r"<h1[\s>]", re.I)
+_SCOPE_END_RE = re.compile(r"<footer[\s>]", re.I)
+
+_FIRST_H1 = etree.XPath("(//h1)[1]")
+_H4S = etree.XPath("//h4")
+# find(string=...) also matches comments; get_text() skips them and script/style
+_STRING_NODES = etree.XPath("//text() | //comment()")
+_INNER_TEXT = etree.XPath(".//text()")
+_NON_TEXT_TAGS = {"script", "style", "template"}
+_NEXT_P = etree.XPath("(descendant::p | following::p)[1]")
+_RICH_TEXT = etree.XPath(
+    "(//div[contains(concat(' ', normalize-space(@class), ' '), ' rich-text ')])[1]"
+)
+_YES_SPAN = etree.XPath(".//span[contains(@class, '-yes')]")
+_KEY_SPANS = etree.XPath(
+    ".//span[contains(concat(' ', normalize-space(@class), ' '),"
+    " ' product-catalogue__key ')]"
+)
+_PARENT_P = etree.XPath("ancestor-or-self::p[1]")
+
+
+def _get_text(el, separator: str = "") -> str:
+    """BeautifulSoup get_text(separator, strip=True) over an lxml element."""
+    parts = []
+    for text in _INNER_TEXT(el):
+        if not text.is_tail and text.getparent().tag in _NON_TEXT_TAGS:
+            continue
+        text = text.strip()
+        if text:
+            parts.append(text)
+    return separator.join(parts)
+
+
+def _tag_string(el) -> str | None:
+    """BeautifulSoup Tag.string: the text of a tag with exactly one child."""
+    children = (1 if el.text else 0) + sum(1 + (1 if c.tail else 0) for c in el)
+    if children != 1:
+        return None
+    if el.text:
+        return el.text
+    child = el[0]
+    if child.tag is etree.Comment:
+        return child.text
+    return _tag_string(child)
+
+
+def _string_parent(node):
+    """Element that contains a text / comment node (a tail's owner's parent)."""
+    parent = node.getparent()
+    return parent.getparent() if getattr(node, "is_tail", False) else parent
+
+
+def _first_string(root, pattern):
+    for node in _STRING_NODES(root):
+        value = node.text if isinstance(node, etree._Comment) else node
+        if value and pattern.search(value):
+            return node
+    return None
+
+
+def _header_value(root, pattern) -> str | None:
+    """Text of the first <p> after the first <h4> whose string matches."""
+    for h4 in _H4S(root):
+        string = _tag_string(h4)
+        if string is not None and pattern.search(string):
+            nxt = _NEXT_P(h4)
+            return nxt[0] if nxt else None
+    return None
+
+
+def _scope(html: str) -> str | None:
+    """Only the product detail region: first <h1> up to the page <footer>."""
+    start = _SCOPE_START_RE.search(html)
+    if not start:
+        return None
+    end = len(html)
+    for match in _SCOPE_END_RE.finditer(html, start.start()):
+        end = match.start()
+    return html[start.start() : end]
+
+
+def parse_test_details_html(html: str, url: str, scoped: bool = True) -> dict | None:
+    """
+    lxml (C) port of crawl.parse_test_details with identical field rules.
+    scoped=True parses only the product detail region of the page.
+    """
+    if scoped:
+        html = _scope(html)
+        if html is None:
+            return None
+    if not html.strip():
+        return None
+
+    root = lxml.html.document_fromstring(html)
+
+    # --- 1. NAME ---
+    h1 = _FIRST_H1(root)
+    if not h1:
+        return None
+    name = _get_text(h1[0])
+
+    # --- 2. DESCRIPTION ---
+    description = ""
+    desc_p = _header_value(root, _DESCRIPTION_RE)
+    if desc_p is not None:
+        description = _get_text(desc_p, " ")
+
+    if not description:
+        rich_text = _RICH_TEXT(root)
+        if rich_text:
+            description = _get_text(rich_text[0], " ")
+
+    # --- 3. DURATION ---
+    duration = 0
+    length_p = _header_value(root, _LENGTH_RE)
+    if length_p is not None:
+        match = _DIGITS_RE.search(_get_text(length_p))
+        if match:
+            duration = int(match.group(1))
+
+    # --- 4. REMOTE SUPPORT ---
+    remote_support = "No"
+    remote_label = _first_string(root, _REMOTE_RE)
+    if remote_label is not None:
+        parent = _string_parent(remote_label)
+        if parent is not None:
+            yes_circle = _YES_SPAN(parent)
+            if not yes_circle and parent.getparent() is not None:
+                yes_circle = _YES_SPAN(parent.getparent())
+            if yes_circle:
+                remote_support = "Yes"
+
+    # --- 5. TEST TYPE ---
+    test_type_list = []
+
+    type_label = _first_string(root, _TEST_TYPE_RE)
+    if type_label is not None:
+        container_p = _PARENT_P(_string_parent(type_label))
+        if container_p:
+            test_type_list = [
+                text for text in map(_get_text, _KEY_SPANS(container_p[0])) if text
+            ]
+
+    test_type_list = list(set(test_type_list))
+
+    return {
+        "name": name,
+        "url": url,
+        "adaptive_support": "No",
+        "description": description,
+        "duration": duration,
+        "remote_support": remote_support,
+        "test_type": test_type_list,
+    }
@@ -0,0 +1,100 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parents[1] / "data" / "raw" / "http_cache"
+
+# Bump when parse_test_details output changes: cached records are re-parsed
+# from the cached HTML (no network) instead of being served stale
+PARSER_VERSION = 1
+
+
+def content_hash(html: str) -> str:
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+
+def utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+class HttpCache:
+    """
+    On-disk cache of raw product HTML plus HTTP validators.
+    One <sha1(url)>.html body and one <sha1(url)>.json entry per URL:
+    {url, etag, last_modified, content_hash, fetched_at, parser_version, record}
+    """
+
+    def __init__(self, cache_dir: Path = DEFAULT_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _key(self, url: str) -> str:
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    def _write(self, path: Path, text: str) -> None:
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+    def get(self, url: str) -> dict | None:
+        path = self.cache_dir / f"{self._key(url)}.json"
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def html(self, url: str) -> str | None:
+        path = self.cache_dir / f"{self._key(url)}.html"
+        if not path.exists():
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    @staticmethod
+    def conditional_headers(entry: dict | None) -> dict:
+        """If-None-Match / If-Modified-Since for a cached entry."""
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url: str, html: str, headers, record: dict | None) -> dict:
+        key = self._key(url)
+        entry = {
+            "url": url,
+            "etag": headers.get("etag"),
+            "last_modified": headers.get("last-modified"),
+            "content_hash": content_hash(html),
+            "fetched_at": utc_now(),
+            "parser_version": PARSER_VERSION,
+            "record": record,
+        }
+        self._write(self.cache_dir / f"{key}.html", html)
+        self._write(self.cache_dir / f"{key}.json", json.dumps(entry))
+        return entry
+
+    def revalidated(self, entry: dict, headers=None) -> dict:
+        """Record a 304 / unchanged body: refresh validators and fetch time."""
+        entry = dict(entry)
+        if headers is not None:
+            entry["etag"] = headers.get("etag") or entry.get("etag")
+            lm = headers.get("last-modified")
+            entry["last_modified"] = lm or entry.get("last_modified")
+        entry["fetched_at"] = utc_now()
+        path = self.cache_dir / f"{self._key(entry['url'])}.json"
+        self._write(path, json.dumps(entry))
+        return entry
+
+    def entries(self):
+        """All cached entries (used by offline re-parsing and parity checks)."""
+        for path in sorted(self.cache_dir.glob("*.json")):
+            with open(path, "r", encoding="utf-8") as f:
+                yield json.load(f)
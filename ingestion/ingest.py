@@ -1,80 +1,194 @@
+import argparse
 import json
-import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import os
 
 # Ensure these imports point to your actual files
 from crawl import crawl_shl_assessments
+from async_crawl import crawl_shl_assessments_async
+from http_cache import HttpCache
+from journal import DEFAULT_JOURNAL, CrawlJournal, iter_records
 from clean import clean_records
-from validate import validate_assessments
-
-
-def save_json(data, filepath):
-    """Helper to save JSON data safely."""
-    os.makedirs(os.path.dirname(filepath), exist_ok=True)
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(
-            data, f, indent=4, ensure_ascii=False
-        )  # Changed indent to 4 for better readability
-    print(f" -> Saved: {filepath}")
+from validate import AssessmentValidator
+
+
+class JsonArrayWriter:
+    """Writes a JSON list one item at a time (json.dump indent=4 layout)."""
+
+    def __init__(self, f):
+        self.f = f
+        self.count = 0
+        f.write("[")
+
+    def write(self, item: dict) -> None:
+        text = json.dumps(item, indent=4, ensure_ascii=False)
+        self.f.write(",\n    " if self.count else "\n    ")
+        self.f.write(text.replace("\n", "\n    "))
+        self.count += 1
+
+    def close(self) -> None:
+        self.f.write("\n]" if self.count else "]")
+
+
+class ParquetChunkWriter:
+    """
+    Writes records to Parquet one row group of `chunk_rows` at a time, so
+    only that chunk is held in memory. The schema comes from the first
+    chunk (all-null columns are stored as strings). Parquet is a side
+    output: a failure is kept in `error` and the partial file removed.
+    """
+
+    def __init__(self, path: str, chunk_rows: int = 1024):
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.rows: list[dict] = []
+        self.writer = None
+        self.error = None
+
+    def write(self, item: dict) -> None:
+        if self.error is None:
+            self.rows.append(item)
+            if len(self.rows) >= self.chunk_rows:
+                self._flush()
+
+    def _flush(self) -> None:
+        try:
+            if self.writer is None:
+                schema = pa.Table.from_pylist(self.rows).schema
+                for i, field in enumerate(schema):
+                    if pa.types.is_null(field.type):
+                        schema = schema.set(i, field.with_type(pa.string()))
+                self.writer = pq.ParquetWriter(self.path, schema)
+            table = pa.Table.from_pylist(self.rows, schema=self.writer.schema)
+            self.writer.write_table(table)
+        except Exception as e:
+            self.error = e
+        self.rows = []
+
+    def close(self) -> None:
+        if self.error is None and self.rows:
+            self._flush()
+        if self.writer is not None:
+            self.writer.close()
+        if self.error is not None and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def compact_journal(
+    journal_path,
+    raw_path: str,
+    proc_path: str,
+    parquet_path: str,
+    validator: AssessmentValidator,
+) -> int:
+    """
+    Single streaming pass over the crawl journal: each record is written
+    to the raw JSON, cleaned, given its stable ID, validated and written to
+    the processed JSON and Parquet. Nothing is collected; returns the
+    number of records.
+    """
+    for path in (raw_path, proc_path, parquet_path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    count = 0
+    parquet_out = ParquetChunkWriter(parquet_path)
+    with open(raw_path, "w", encoding="utf-8") as raw_f, open(
+        proc_path, "w", encoding="utf-8"
+    ) as proc_f:
+        raw_out, proc_out = JsonArrayWriter(raw_f), JsonArrayWriter(proc_f)
+        for record in iter_records(journal_path):
+            raw_out.write(record)
+            try:
+                item = clean_records([record])[0]
+            except Exception as e:
+                print(f"⚠️ Warning: Cleaning failed for {record.get('url')}: {e}")
+                item = dict(record)
+            # Stable IDs AFTER cleaning, in crawl order
+            item["assessment_id"] = f"shl_{count:05d}"
+            validator.check(item)
+            proc_out.write(item)
+            parquet_out.write(item)
+            count += 1
+        raw_out.close()
+        proc_out.close()
+    parquet_out.close()
+
+    print(f" -> Saved: {raw_path}")
+    print(f" -> Saved: {proc_path}")
+    if parquet_out.error is None:
+        print(f" -> Saved: {parquet_path}")
+    else:
+        print(f"⚠️ Could not save Parquet: {parquet_out.error}")
+    return count
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Phase 1 ingestion")
+    parser.add_argument(
+        "--async-crawl",
+        action="store_true",
+        help="rate-controlled crawler (async_crawl.py); polite by default, "
+        "SHL_CRAWL_RATE / SHL_CRAWL_CONCURRENCY opt into a faster pace",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="conditional requests against the HTTP cache (implies --async-crawl)",
+    )
+    parser.add_argument(
+        "--sitemap",
+        action="store_true",
+        help="skip cached products whose sitemap.xml lastmod is unchanged "
+        "(implies --incremental)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue an interrupted serial crawl from its journal",
+    )
+    args = parser.parse_args()
+
     print("Starting Phase 1 ingestion...")
 
-    # --- STEP 1: CRAWL ---
+    # --- STEP 1: CRAWL (into the append-only journal) ---
     # The crawler now has a timeout of 60s and random delays to prevent the 30s/it hang.
-    records = crawl_shl_assessments()
-
-    if not records:
-        print("❌ CRITICAL: No records captured. Exiting ingestion.")
-        return
-
-    print(f"\nCrawl complete. Captured {len(records)} records.")
-
-    # --- STEP 2: SAVE RAW DATA IMMEDIATELY ---
+    if args.async_crawl or args.incremental or args.sitemap:
+        if args.resume:
+            print("⚠️ --resume applies to the serial crawl; use --incremental here")
+        # Records stream into the journal as they arrive; none are collected
+        with CrawlJournal(DEFAULT_JOURNAL) as journal:
+            crawl_shl_assessments_async(
+                cache=HttpCache() if args.incremental or args.sitemap else None,
+                discovery="sitemap" if args.sitemap else "listing",
+                on_record=lambda r: journal.append(0, r["url"], r),
+            )
+    else:
+        crawl_shl_assessments(DEFAULT_JOURNAL, resume=args.resume)
+
+    # --- STEPS 2-5: RAW BACKUP, CLEAN & ASSIGN IDs, SAVE PROCESSED, VALIDATE ---
     # Always keep the raw scrape untouched.
     raw_path = "data/raw/shl_assessments_raw.json"
-    print("Saving raw backup...")
-    save_json(records, raw_path)
-
-    # --- STEP 3: CLEAN & ASSIGN IDs ---
-    print("Cleaning records...")
-    try:
-        # 1. Run the safe cleaning logic (Option 2 we discussed)
-        records = clean_records(records)
-
-        # 2. Assign stable IDs AFTER cleaning
-        for i, r in enumerate(records):
-            r["assessment_id"] = f"shl_{i:05d}"
-
-    except Exception as e:
-        print(f"⚠️ Warning: Cleaning routine failed: {e}")
-        print("Continuing with raw records to ensure data preservation.")
-
-    # --- STEP 4: SAVE PROCESSED DATA ---
     proc_path = "data/processed/shl_assessments.json"
     parquet_path = "data/processed/shl_assessments.parquet"
 
-    print("Saving processed data...")
-    save_json(records, proc_path)
-
-    try:
-        # Convert list of dicts to DataFrame for Parquet
-        df = pd.DataFrame(records)
+    # Nothing captured: exit before overwriting the previous outputs
+    if next(iter_records(DEFAULT_JOURNAL), None) is None:
+        print("❌ CRITICAL: No records captured. Exiting ingestion.")
+        return
 
-        # Parquet doesn't like lists (test_type) in some older versions.
-        # Modern pandas handles it fine, but we'll wrap it in a try just in case.
-        os.makedirs(os.path.dirname(parquet_path), exist_ok=True)
-        df.to_parquet(parquet_path, index=False)
-        print(f" -> Saved: {parquet_path}")
-    except Exception as e:
-        print(f"⚠️ Could not save Parquet: {e}")
+    # Validation (safe mode) checks records as they stream, reports at the end
+    validator = AssessmentValidator()
+    print("Compacting crawl journal...")
+    count = compact_journal(
+        DEFAULT_JOURNAL, raw_path, proc_path, parquet_path, validator
+    )
+    print(f"\nCrawl complete. Captured {count} records.")
 
-    # --- STEP 5: VALIDATE (SAFE MODE) ---
-    # Our new validation script flags issues without crashing the whole process.
     print("\nRunning Validation...")
     try:
-        validate_assessments(records)
+        print(f"\n--- Starting Validation for {count} items ---")
+        validator.report()
         print("\n✅ Ingestion process finished.")
     except Exception as e:
         print(f"\n❌ UNEXPECTED VALIDATION ERROR: {e}")
@@ -0,0 +1,114 @@
+import json
+import os
+from pathlib import Path
+
+DEFAULT_JOURNAL = (
+    Path(__file__).resolve().parents[1] / "data" / "raw" / "crawl_journal.jsonl"
+)
+
+# fsync after this many product lines (and always at the end of a catalog page)
+FSYNC_EVERY = int(os.getenv("SHL_JOURNAL_FSYNC_EVERY", "50"))
+
+
+class CrawlJournal:
+    """
+    Append-only JSONL log of a catalog crawl. One line per product link,
+    {"offset", "url", "record"} (record is null when extraction failed),
+    plus {"page_done": offset, "next_offset"} once a listing page is finished.
+    Each append is O(record), unlike rewriting the whole JSON every page.
+    """
+
+    def __init__(
+        self,
+        path: Path = DEFAULT_JOURNAL,
+        resume: bool = False,
+        fsync_every: int = FSYNC_EVERY,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.fsync_every = fsync_every
+        self.unsynced = 0
+
+        if resume:
+            _truncate_torn_tail(self.path)
+            self.file = open(self.path, "a", encoding="utf-8")
+        else:
+            self.file = open(self.path, "w", encoding="utf-8")
+
+    def __enter__(self) -> "CrawlJournal":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _write(self, entry: dict) -> None:
+        self.file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def sync(self) -> None:
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.unsynced = 0
+
+    def append(self, offset: int, url: str, record: dict | None) -> None:
+        self._write({"offset": offset, "url": url, "record": record})
+        self.unsynced += 1
+        if self.unsynced >= self.fsync_every:
+            self.sync()
+
+    def page_done(self, offset: int, next_offset: int) -> None:
+        self._write({"page_done": offset, "next_offset": next_offset})
+        self.sync()
+
+    def close(self) -> None:
+        if not self.file.closed:
+            self.sync()
+            self.file.close()
+
+
+def _truncate_torn_tail(path: Path) -> None:
+    """Drop a partial last line left by a crash mid-write."""
+    if not path.exists():
+        return
+    with open(path, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end != len(data):
+            f.truncate(end)
+
+
+def read_entries(path: Path = DEFAULT_JOURNAL):
+    """Journal lines in order; a torn last line is ignored."""
+    path = Path(path)
+    if not path.exists():
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def iter_records(path: Path = DEFAULT_JOURNAL):
+    """Extracted records in crawl order (streaming)."""
+    for entry in read_entries(path):
+        if entry.get("record"):
+            yield entry["record"]
+
+
+def replay(path: Path = DEFAULT_JOURNAL) -> tuple[set, int, int]:
+    """
+    Crawl position for --resume: (seen_urls, next_offset, records).
+    Products of a half-finished page are already in seen_urls, so the
+    crawl restarts at that page without fetching them again.
+    """
+    seen_urls = set()
+    next_offset = 0
+    records = 0
+    for entry in read_entries(path):
+        if "page_done" in entry:
+            next_offset = max(next_offset, entry["next_offset"])
+        elif "url" in entry:
+            seen_urls.add(entry["url"])
+            records += 1 if entry.get("record") else 0
+    return seen_urls, next_offset, records
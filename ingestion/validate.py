@@ -1,59 +1,62 @@
 import json
 
+# All known SHL Test Type codes
+VALID_CODES = {"A", "B", "C", "D", "E", "K", "P", "S"}
 
-def validate_assessments(records: list[dict]) -> None:
+
+class AssessmentValidator:
     """
-    Validates data quality without stopping execution or raising errors.
-    Logs issues to the console for manual review.
+    Row-by-row form of validate_assessments, for streamed records:
+    check() each record as it arrives, report() once at the end.
     """
-    total_count = len(records)
 
-    # 1. BASELINE CHECK (Will not crash, just alert)
-    if total_count == 0:
-        print("❌ ERROR: The records list is completely empty!")
-        return
+    def __init__(self):
+        self.total_count = 0
 
-    print(f"\n--- Starting Validation for {total_count} items ---")
+        # TRACKING COUNTERS
+        self.missing_names = []
+        self.bad_urls = []
+        self.invalid_types = []
+        self.invalid_metadata = []
 
-    # 2. TRACKING COUNTERS
-    missing_names = []
-    bad_urls = []
-    invalid_types = []
-    invalid_metadata = []
+        self.stats = {code: 0 for code in VALID_CODES}
+        self.timed = 0
+        self.remote_yes = 0
 
-    # All known SHL Test Type codes
-    VALID_CODES = {"A", "B", "C", "D", "E", "K", "P", "S"}
-
-    for i, r in enumerate(records):
+    def check(self, r: dict) -> None:
+        i = self.total_count
+        self.total_count += 1
         try:
             # Check Name
             name = r.get("name")
             if not name:
-                missing_names.append(f"Row {i} (URL: {r.get('url')})")
+                self.missing_names.append(f"Row {i} (URL: {r.get('url')})")
 
             # Check URL
             url = r.get("url", "")
             if not url or not url.startswith("http"):
-                bad_urls.append(f"Row {i} (Name: {name})")
+                self.bad_urls.append(f"Row {i} (Name: {name})")
 
             # Check Test Type (STRICT but non-crashing)
             tt = r.get("test_type")
             if not isinstance(tt, list):
-                invalid_types.append(f"Row {i}: Type is {type(tt)}, expected list")
+                self.invalid_types.append(f"Row {i}: Type is {type(tt)}, expected list")
             elif len(tt) == 0:
                 # Flagged because we removed the default 'K'
-                invalid_types.append(f"Row {i}: No test types found (Empty List)")
+                self.invalid_types.append(f"Row {i}: No test types found (Empty List)")
             else:
                 unrecognized = [code for code in tt if code not in VALID_CODES]
                 if unrecognized:
-                    invalid_types.append(f"Row {i}: Unrecognized codes {unrecognized}")
+                    self.invalid_types.append(
+                        f"Row {i}: Unrecognized codes {unrecognized}"
+                    )
 
             # Check Metadata (Duration/Remote/Adaptive)
             if not isinstance(r.get("duration"), (int, float)):
-                invalid_metadata.append(f"Row {i}: Duration is not a number")
+                self.invalid_metadata.append(f"Row {i}: Duration is not a number")
 
             if r.get("remote_support") not in {"Yes", "No"}:
-                invalid_metadata.append(
+                self.invalid_metadata.append(
                     f"Row {i}: remote_support is '{r.get('remote_support')}'"
                 )
 
@@ -61,38 +64,62 @@ def validate_assessments(records: list[dict]) -> None:
             # Catch-all for a specific row so the loop continues
             print(f"⚠️ Unexpected error validating row {i}: {e}")
 
-    # 3. PRINT ISSUES (Instead of raising Assertions)
-    if missing_names:
-        print(f"🚩 MISSING NAMES: {len(missing_names)} items")
+        # STATS
+        try:
+            for code in r.get("test_type", []):
+                if code in self.stats:
+                    self.stats[code] += 1
+            self.timed += 1 if r.get("duration", 0) > 0 else 0
+            self.remote_yes += 1 if r.get("remote_support") == "Yes" else 0
+        except TypeError as e:
+            print(f"⚠️ Unexpected error counting row {i}: {e}")
+
+    def report(self) -> None:
+        # 1. BASELINE CHECK (Will not crash, just alert)
+        if self.total_count == 0:
+            print("❌ ERROR: The records list is completely empty!")
+            return
+
+        # 3. PRINT ISSUES (Instead of raising Assertions)
+        if self.missing_names:
+            print(f"🚩 MISSING NAMES: {len(self.missing_names)} items")
+
+        if self.bad_urls:
+            print(f"🚩 BAD URLs: {len(self.bad_urls)} items")
+
+        if self.invalid_types:
+            # Just print the first 5 to avoid flooding the console
+            print(f"🚩 TEST TYPE ISSUES: {len(self.invalid_types)} items")
+            for issue in self.invalid_types[:5]:
+                print(f"   - {issue}")
+            if len(self.invalid_types) > 5:
+                print(f"   - ... and {len(self.invalid_types) - 5} more")
+
+        # 4. STATS SUMMARY
+        print("\n--------------------------------")
+        print("VALIDATION SUMMARY (SAFE MODE)")
+        print(f"Total Scraped:    {self.total_count}")
+        print(f"Remote Ready:     {self.remote_yes}")
+        print(f"Duration Found:   {self.timed}")
+        print("\nCODE BREAKDOWN:")
+        for code, count in sorted(self.stats.items()):
+            print(f"  [{code}]: {count}")
+        print("--------------------------------")
+        print("✅ Validation complete. Data has been preserved.")
+
 
-    if bad_urls:
-        print(f"🚩 BAD URLs: {len(bad_urls)} items")
+def validate_assessments(records: list[dict]) -> None:
+    """
+    Validates data quality without stopping execution or raising errors.
+    Logs issues to the console for manual review.
+    """
+    if len(records) == 0:
+        print("❌ ERROR: The records list is completely empty!")
+        return
 
-    if invalid_types:
-        # Just print the first 5 to avoid flooding the console
-        print(f"🚩 TEST TYPE ISSUES: {len(invalid_types)} items")
-        for issue in invalid_types[:5]:
-            print(f"   - {issue}")
-        if len(invalid_types) > 5:
-            print(f"   - ... and {len(invalid_types) - 5} more")
+    print(f"\n--- Starting Validation for {len(records)} items ---")
 
-    # 4. STATS CALCULATION
-    stats = {code: 0 for code in VALID_CODES}
+    validator = AssessmentValidator()
     for r in records:
-        for code in r.get("test_type", []):
-            if code in stats:
-                stats[code] += 1
-
-    timed = sum(1 for r in records if r.get("duration", 0) > 0)
-    remote_yes = sum(1 for r in records if r.get("remote_support") == "Yes")
-
-    print("\n--------------------------------")
-    print("VALIDATION SUMMARY (SAFE MODE)")
-    print(f"Total Scraped:    {total_count}")
-    print(f"Remote Ready:     {remote_yes}")
-    print(f"Duration Found:   {timed}")
-    print("\nCODE BREAKDOWN:")
-    for code, count in sorted(stats.items()):
-        print(f"  [{code}]: {count}")
-    print("--------------------------------")
-    print("✅ Validation complete. Data has been preserved.")
+        validator.check(r)
+    validator.report()
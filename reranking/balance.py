@@ -1,33 +1,133 @@
-def enforce_balance(candidates, final_k=10):
+import numpy as np
+
+from retrieval.catalog import get_catalog
+from retrieval.catalogs import current_bundle
+
+
+# =========================================================
+# TEST TYPE CODES (SHL Appendix)
+# =========================================================
+TYPE_CODES = "ABCDEKPS"
+TYPE_BITS = {code: 1 << i for i, code in enumerate(TYPE_CODES)}
+
+TYPE_CODE_BY_NAME = {
+    "ability and aptitude": "A",
+    "ability & aptitude": "A",
+    "biodata and situational judgement": "B",
+    "biodata & situational judgement": "B",
+    "competencies": "C",
+    "development and 360": "D",
+    "development & 360": "D",
+    "assessment exercises": "E",
+    "assessment excercises": "E",
+    "knowledge and skills": "K",
+    "knowledge & skills": "K",
+    "personality and behavior": "P",
+    "personality and behaviour": "P",
+    "personality & behaviour": "P",
+    "simulations": "S",
+}
+
+# Rule: at least 50% Knowledge, at least 20% Personality.
+# Bounds: float = fraction of final_k, int = absolute count, None = unbounded.
+# Order matters: a candidate counts toward the FIRST listed code it has.
+DEFAULT_QUOTAS = {
+    "K": {"min": 0.5, "max": None},
+    "P": {"min": 0.2, "max": None},
+}
+
+
+def type_code(label: str):
+    """Map a test_type label or code to its single-letter code."""
+    label = (label or "").strip()
+    if label.upper() in TYPE_BITS:
+        return label.upper()
+    return TYPE_CODE_BY_NAME.get(label.lower())
+
+
+# =========================================================
+# PRECOMPUTED TYPE BITMASKS (ONE PER CATALOG ROW)
+# =========================================================
+def get_type_masks() -> np.ndarray:
+    def build():
+        catalog = get_catalog()
+        masks = np.zeros(len(catalog), dtype="uint8")
+        for row in range(len(catalog)):
+            for label in catalog.get("test_type", row) or []:
+                code = type_code(label)
+                if code:
+                    masks[row] |= TYPE_BITS[code]
+        return masks
+
+    return current_bundle().derived("type_masks", build)
+
+
+def _resolve_bound(bound, final_k: int, minimum: bool):
+    if bound is None:
+        return None
+    if isinstance(bound, float):
+        count = int(bound * final_k)
+        return max(1, count) if minimum else count
+    return int(bound)
+
+
+# =========================================================
+# SELECTOR
+# =========================================================
+def balanced_positions(rows: np.ndarray, final_k=10, quotas=None):
     """
-    Enforce Knowledge / Personality balance.
-    Deterministic, rule-based.
+    Enforce per-test-type quotas over ranked candidate rows.
+    Returns the positions (into rows) of the selection, in output order.
+    Deterministic, rule-based, O(n):
+    - each candidate belongs to the first quota code in its type mask
+    - minimums are filled first, in quota order
+    - the rest is filled in rank order, respecting maximums
     """
 
-    knowledge = []
-    personality = []
-    others = []
+    quotas = DEFAULT_QUOTAS if quotas is None else quotas
+    codes = list(quotas)
+
+    rows = np.asarray(rows, dtype="int64")
+    masks = get_type_masks()[rows] if len(rows) else np.zeros(0, dtype="uint8")
+
+    # Group index: position of the first matching quota code, -1 = others
+    group = np.full(len(rows), -1, dtype="int64")
+    for g in reversed(range(len(codes))):
+        group[(masks & TYPE_BITS[codes[g]]) > 0] = g
 
-    for c in candidates:
-        test_type = str(c.get("test_type", "")).lower()
+    mins = [_resolve_bound(quotas[c].get("min"), final_k, True) or 0 for c in codes]
+    maxs = [_resolve_bound(quotas[c].get("max"), final_k, False) for c in codes]
 
-        if "knowledge" in test_type:
-            knowledge.append(c)
-        elif "personality" in test_type:
-            personality.append(c)
-        else:
-            others.append(c)
+    selected = np.zeros(len(rows), dtype=bool)
+    counts = [0] * len(codes)
+    picked = []
 
-    result = []
+    # 1️⃣ Minimum quotas
+    for g in range(len(codes)):
+        want = mins[g] if maxs[g] is None else min(mins[g], maxs[g])
+        for i in np.flatnonzero(group == g)[:want]:
+            selected[i] = True
+            counts[g] += 1
+            picked.append(int(i))
 
-    # Rule: at least 50% Knowledge, at least 20% Personality
-    k_quota = max(1, int(0.5 * final_k))
-    p_quota = max(1, int(0.2 * final_k))
+    # 2️⃣ Fill in rank order, respecting maximums
+    for i in range(len(rows)):
+        if len(picked) >= final_k:
+            break
+        if selected[i]:
+            continue
+        g = group[i]
+        if g >= 0 and maxs[g] is not None and counts[g] >= maxs[g]:
+            continue
+        selected[i] = True
+        if g >= 0:
+            counts[g] += 1
+        picked.append(i)
 
-    result.extend(knowledge[:k_quota])
-    result.extend(personality[:p_quota])
+    return picked[:final_k]
 
-    remaining = [c for c in candidates if c not in result]
-    result.extend(remaining)
 
-    return result[:final_k]
+def enforce_balance(candidates, final_k=10, quotas=None):
+    """balanced_positions() over row-addressed candidate dicts."""
+    rows = np.fromiter((c["row"] for c in candidates), dtype="int64")
+    return [candidates[i] for i in balanced_positions(rows, final_k, quotas)]
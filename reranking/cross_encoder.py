@@ -0,0 +1,177 @@
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List
+
+import numpy as np
+
+from retrieval.catalog import get_catalog
+from retrieval.catalogs import current_bundle
+
+
+# =========================================================
+# CONFIG
+# =========================================================
+CROSS_ENCODER_ENABLED = os.getenv("SHL_CROSS_ENCODER", "0") == "1"
+CROSS_ENCODER_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+# Per-request budget: at most TOP_N pairs and roughly BUDGET_MS of compute
+CROSS_ENCODER_TOP_N = int(os.getenv("SHL_CE_TOP_N", "20"))
+CROSS_ENCODER_BUDGET_MS = float(os.getenv("SHL_CE_BUDGET_MS", "150"))
+
+# Blend weight of the cross-encoder probability into the retrieval score
+CROSS_ENCODER_WEIGHT = 0.6
+
+CACHE_SIZE = 20_000
+MAX_LENGTH = 256
+
+
+# =========================================================
+# LAZY GLOBALS
+# =========================================================
+_model = None
+_model_lock = threading.Lock()
+
+_cache: "OrderedDict[tuple, float]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+# Running estimate of per-pair latency (ms), drives the time budget
+_ms_per_pair = None
+_stats = {"requests": 0, "pairs_scored": 0, "cache_hits": 0, "budget_trimmed": 0}
+
+
+def get_cross_encoder():
+    global _model
+
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                from sentence_transformers import CrossEncoder
+
+                print(f"🔹 Loading cross-encoder: {CROSS_ENCODER_MODEL}")
+                _model = CrossEncoder(
+                    CROSS_ENCODER_MODEL, max_length=MAX_LENGTH, device="cpu"
+                )
+
+    return _model
+
+
+def query_hash(query: str) -> str:
+    return hashlib.sha1(query.strip().lower().encode("utf-8")).hexdigest()
+
+
+def _pair_text(catalog, row: int) -> str:
+    return f"{catalog.get('name', row) or ''}. {catalog.get('description', row) or ''}"
+
+
+def _allowed_pairs(top_n: int, budget_ms: float) -> int:
+    """Shrink N so the forward pass fits the time budget."""
+    if _ms_per_pair is None or budget_ms is None:
+        return top_n
+    return max(1, min(top_n, int(budget_ms / _ms_per_pair)))
+
+
+# =========================================================
+# SCORING
+# =========================================================
+def cross_encoder_scores(
+    query: str,
+    rows: np.ndarray,
+    assessment_ids: List[str],
+    top_n: int = CROSS_ENCODER_TOP_N,
+    budget_ms: float = CROSS_ENCODER_BUDGET_MS,
+) -> np.ndarray:
+    """
+    Relevance probabilities for the first top_n candidates (rank order),
+    NaN for candidates outside the budget.
+    - Cached pairs are free
+    - Uncached pairs go through ONE batched forward pass
+    """
+    global _ms_per_pair
+
+    catalog = get_catalog()
+    # Assessment ids are only unique within one catalog; probabilities
+    # belong to one model
+    qh = (current_bundle().name, CROSS_ENCODER_MODEL, query_hash(query))
+    probs = np.full(len(rows), np.nan)
+
+    n = min(_allowed_pairs(top_n, budget_ms), len(rows))
+
+    missing: Dict[int, str] = {}
+    with _cache_lock:
+        _stats["requests"] += 1
+        if n < min(top_n, len(rows)):
+            _stats["budget_trimmed"] += 1
+
+        for i in range(n):
+            key = (qh, assessment_ids[i])
+            if key in _cache:
+                _cache.move_to_end(key)
+                probs[i] = _cache[key]
+                _stats["cache_hits"] += 1
+            else:
+                missing[i] = assessment_ids[i]
+
+    if missing:
+        idxs = list(missing)
+        pairs = [(query, _pair_text(catalog, int(rows[i]))) for i in idxs]
+
+        start = time.perf_counter()
+        logits = np.asarray(get_cross_encoder().predict(pairs), dtype="float64")
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+
+        per_pair = elapsed_ms / len(pairs)
+        scored = 1.0 / (1.0 + np.exp(-logits))
+
+        with _cache_lock:
+            if _ms_per_pair is None:
+                _ms_per_pair = per_pair
+            else:
+                _ms_per_pair = 0.8 * _ms_per_pair + 0.2 * per_pair
+            _stats["pairs_scored"] += len(pairs)
+
+            for i, p in zip(idxs, scored):
+                probs[i] = float(p)
+                _cache[(qh, missing[i])] = float(p)
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+
+    return probs
+
+
+def blend_retrieval_scores(retrieval: np.ndarray, probs: np.ndarray) -> np.ndarray:
+    """
+    Cross-encoder probability blended into the scored candidates only.
+    Probabilities are mapped onto the scored rows' retrieval score range,
+    so the cross-encoder reorders within the top-N but cannot push them
+    above or below the rest. Unscored candidates keep their retrieval score.
+    """
+    blended = np.array(retrieval, dtype="float64")
+    scored = ~np.isnan(probs)
+    if not scored.any():
+        return blended
+
+    base = blended[scored]
+    low, high = base.min(), base.max()
+    rescaled = low + np.asarray(probs)[scored] * (high - low)
+    blended[scored] = (
+        1.0 - CROSS_ENCODER_WEIGHT
+    ) * base + CROSS_ENCODER_WEIGHT * rescaled
+    return blended
+
+
+def clear_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
+
+
+def get_stats() -> dict:
+    with _cache_lock:
+        cache_size = len(_cache)
+    return {
+        **_stats,
+        "cache_size": cache_size,
+        "ms_per_pair": None if _ms_per_pair is None else round(_ms_per_pair, 3),
+    }
@@ -0,0 +1,60 @@
+import numpy as np
+
+from retrieval.search import get_embeddings
+
+
+# =========================================================
+# CONFIG
+# =========================================================
+# Trade-off: 1.0 = pure relevance, 0.0 = pure novelty
+MMR_LAMBDA = 0.7
+
+# How many positions MMR reorders, as a multiple of final_k
+MMR_DEPTH = 3
+
+
+# =========================================================
+# MAXIMAL MARGINAL RELEVANCE
+# =========================================================
+def mmr_order(
+    rows: np.ndarray, relevance: np.ndarray, k: int, lambda_: float = MMR_LAMBDA
+) -> np.ndarray:
+    """
+    Greedy MMR over candidate rows using the stored embeddings.
+    - Pairwise cosine matrix computed once (embeddings are normalized)
+    - Each step is one masked argmax: O(k * n) vector work
+    Returns a permutation of range(n): the k MMR picks first,
+    then the remaining candidates in their original order.
+    """
+
+    n = len(rows)
+    k = min(k, n)
+    if n == 0 or k == 0:
+        return np.arange(n)
+
+    vectors = get_embeddings()[np.asarray(rows, dtype="int64")]
+    sim = vectors @ vectors.T
+
+    # Relevance on the same 0..1 scale as cosine similarity
+    rel = np.asarray(relevance, dtype="float64")
+    spread = rel.max() - rel.min()
+    rel = (rel - rel.min()) / spread if spread > 0 else np.ones(n)
+
+    max_sim = np.full(n, -np.inf)
+    available = np.ones(n, dtype=bool)
+    picks = []
+
+    for step in range(k):
+        if step == 0:
+            mmr = rel.copy()
+        else:
+            mmr = lambda_ * rel - (1.0 - lambda_) * max_sim
+        mmr[~available] = -np.inf
+
+        best = int(np.argmax(mmr))
+        picks.append(best)
+        available[best] = False
+        max_sim = np.maximum(max_sim, sim[:, best])
+
+    rest = np.flatnonzero(available)
+    return np.concatenate([np.array(picks, dtype="int64"), rest])
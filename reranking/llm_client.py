@@ -0,0 +1,286 @@
+import os
+import time
+import random
+import threading
+from typing import Any, Dict, List, Optional
+
+import httpx
+from groq import Groq
+import groq
+
+
+# =========================================================
+# CONFIG (MATCH THE GROQ QUOTA OF THE DEPLOYED KEY)
+# =========================================================
+LLM_MODEL = "llama-3.1-8b-instant"
+
+REQUESTS_PER_MINUTE = float(os.getenv("GROQ_RPM", "30"))
+BURST = int(os.getenv("GROQ_BURST", "5"))
+MAX_CONCURRENCY = int(os.getenv("GROQ_MAX_CONCURRENCY", "4"))
+
+REQUEST_TIMEOUT_S = float(os.getenv("GROQ_TIMEOUT_S", "8"))
+CONNECT_TIMEOUT_S = 2.0
+# Max time a request waits for a rate / concurrency slot before falling back
+ACQUIRE_TIMEOUT_S = float(os.getenv("GROQ_ACQUIRE_TIMEOUT_S", "2"))
+
+MAX_RETRIES = 3
+BACKOFF_BASE_S = 0.5
+BACKOFF_CAP_S = 8.0
+# Time one call may spend backing off; a longer Retry-After sheds instead
+RETRY_BUDGET_S = float(os.getenv("GROQ_RETRY_BUDGET_S", str(REQUEST_TIMEOUT_S)))
+
+BREAKER_FAILURES = 5
+BREAKER_RESET_S = 30.0
+
+POOL_CONNECTIONS = 20
+POOL_KEEPALIVE = 10
+KEEPALIVE_EXPIRY_S = 60.0
+
+
+class LLMUnavailableError(RuntimeError):
+    """Raised instead of calling Groq when the client must shed the request."""
+
+
+# =========================================================
+# TOKEN BUCKET (RATE LIMIT)
+# =========================================================
+class TokenBucket:
+    def __init__(self, rate_per_s: float, capacity: int):
+        self.rate = rate_per_s
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        refill = (now - self.updated) * self.rate
+        self.tokens = min(self.capacity, self.tokens + refill)
+        self.updated = now
+
+    def acquire(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def available(self) -> float:
+        with self.lock:
+            self._refill()
+            return round(self.tokens, 2)
+
+
+# =========================================================
+# CIRCUIT BREAKER
+# =========================================================
+class CircuitBreaker:
+    """
+    closed    -> calls go through
+    open      -> calls rejected until reset_s elapsed
+    half_open -> one probe call; success closes, failure re-opens
+    """
+
+    def __init__(self, failure_threshold: int, reset_s: float):
+        self.failure_threshold = failure_threshold
+        self.reset_s = reset_s
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self.lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.reset_s:
+                    return False
+                self.state = "half_open"
+                self.probing = False
+            if self.probing:
+                return False
+            self.probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self.lock:
+            self.state = "closed"
+            self.failures = 0
+            self.probing = False
+
+    def cancel_probe(self) -> None:
+        """The probe call was shed locally: let the next request probe."""
+        with self.lock:
+            self.probing = False
+
+    def record_failure(self) -> None:
+        with self.lock:
+            self.failures += 1
+            self.probing = False
+            tripped = self.failures >= self.failure_threshold
+            if self.state == "half_open" or tripped:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+# =========================================================
+# MANAGED CLIENT
+# =========================================================
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMClient:
+    """
+    Groq chat client with:
+    - pooled keep-alive HTTP connections
+    - token-bucket rate limiting + bounded concurrency
+    - jittered retries on 429 / transient errors
+    - a circuit breaker that sheds load while Groq is degraded
+      (timeouts, connection errors, 5xx, 429s that outlast the retries)
+    """
+
+    def __init__(self, api_key: str):
+        self.http = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=POOL_CONNECTIONS,
+                max_keepalive_connections=POOL_KEEPALIVE,
+                keepalive_expiry=KEEPALIVE_EXPIRY_S,
+            ),
+            timeout=httpx.Timeout(REQUEST_TIMEOUT_S, connect=CONNECT_TIMEOUT_S),
+        )
+        # Retries are ours (jittered, breaker-aware), not the SDK's
+        self.client = Groq(
+            api_key=api_key,
+            http_client=self.http,
+            max_retries=0,
+            timeout=REQUEST_TIMEOUT_S,
+        )
+
+        self.bucket = TokenBucket(REQUESTS_PER_MINUTE / 60.0, BURST)
+        self.slots = threading.BoundedSemaphore(MAX_CONCURRENCY)
+        self.breaker = CircuitBreaker(BREAKER_FAILURES, BREAKER_RESET_S)
+
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "calls": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "retries": 0,
+            "rate_limited_429": 0,
+            "shed_breaker_open": 0,
+            "shed_rate_limit": 0,
+            "shed_concurrency": 0,
+            "shed_retry_budget": 0,
+            "in_flight": 0,
+            "total_latency_ms": 0.0,
+        }
+
+    def _count(self, key: str, value: float = 1) -> None:
+        with self._stats_lock:
+            self._stats[key] += value
+
+    def chat(self, messages: List[Dict[str, str]], **kwargs: Any) -> str:
+        """Return the completion text or raise (LLMUnavailableError when shed)."""
+        self._count("calls")
+
+        if not self.breaker.allow():
+            self._count("shed_breaker_open")
+            raise LLMUnavailableError("circuit open")
+
+        if not self.slots.acquire(timeout=ACQUIRE_TIMEOUT_S):
+            self.breaker.cancel_probe()
+            self._count("shed_concurrency")
+            raise LLMUnavailableError("no concurrency slot")
+
+        self._count("in_flight")
+        start = time.perf_counter()
+        try:
+            return self._call_with_retries(messages, **kwargs)
+        except LLMUnavailableError:
+            self.breaker.cancel_probe()
+            raise
+        finally:
+            self._count("in_flight", -1)
+            self._count("total_latency_ms", (time.perf_counter() - start) * 1000.0)
+            self.slots.release()
+
+    def _call_with_retries(self, messages, **kwargs) -> str:
+        kwargs.setdefault("model", LLM_MODEL)
+        deadline = time.monotonic() + RETRY_BUDGET_S
+
+        for attempt in range(MAX_RETRIES + 1):
+            if not self.bucket.acquire(timeout=ACQUIRE_TIMEOUT_S):
+                self._count("shed_rate_limit")
+                raise LLMUnavailableError("rate limit budget exhausted")
+
+            try:
+                response = self.client.chat.completions.create(
+                    messages=messages, **kwargs
+                )
+                self.breaker.record_success()
+                self._count("succeeded")
+                return response.choices[0].message.content
+
+            except groq.RateLimitError as e:
+                self._count("rate_limited_429")
+                error, delay_hint = e, _retry_after(e)
+
+            except (
+                groq.APITimeoutError,
+                groq.APIConnectionError,
+                groq.InternalServerError,
+            ) as e:
+                error, delay_hint = e, None
+
+            except Exception:
+                # Non-transient (bad request, auth): no retry, and not a sign
+                # that Groq is degraded, so the breaker does not count it
+                self.breaker.cancel_probe()
+                self._count("failed")
+                raise
+
+            if attempt == MAX_RETRIES:
+                break
+
+            # Full jitter, honouring Retry-After when Groq sends it
+            ceiling = min(BACKOFF_CAP_S, BACKOFF_BASE_S * 2**attempt)
+            delay = max(random.uniform(0, ceiling), delay_hint or 0.0)
+            if delay > deadline - time.monotonic():
+                # Waiting would hold the slot past the budget: fall back now
+                self.breaker.record_failure()
+                self._count("failed")
+                self._count("shed_retry_budget")
+                raise LLMUnavailableError(f"retry in {delay:.1f}s exceeds budget")
+            self._count("retries")
+            time.sleep(min(delay, BACKOFF_CAP_S))
+
+        self.breaker.record_failure()
+        self._count("failed")
+        raise error
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+
+        done = stats["succeeded"] + stats["failed"]
+        total_ms = stats.pop("total_latency_ms")
+        stats["avg_latency_ms"] = round(total_ms / done, 1) if done else None
+        stats["breaker_state"] = self.breaker.state
+        stats["rate_tokens_available"] = self.bucket.available()
+        return stats
@@ -1,21 +1,34 @@
 import os
 import json
-from typing import Dict, Any
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List
 
-from groq import Groq
 from dotenv import load_dotenv
 
+from reranking.llm_client import LLM_MODEL, LLMClient, LLMUnavailableError
+
 
 # =========================================================
 # ENV + CLIENT
 # =========================================================
 load_dotenv()
 
+# SHL_LLM_ENABLED=0 skips Groq entirely (offline benchmarks): DEFAULT_INTENT
+LLM_ENABLED = os.getenv("SHL_LLM_ENABLED", "1") == "1"
+
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-if not GROQ_API_KEY:
+if LLM_ENABLED and not GROQ_API_KEY:
     raise RuntimeError("GROQ_API_KEY not found in environment")
 
-client = Groq(api_key=GROQ_API_KEY)
+# Pooled, rate-limited, circuit-breaking client (see llm_client.py)
+client = LLMClient(api_key=GROQ_API_KEY) if LLM_ENABLED else None
+
+
+def get_llm_stats() -> Dict[str, Any]:
+    if client is None:
+        return {"enabled": False}
+    return client.stats()
 
 
 # =========================================================
@@ -68,6 +81,79 @@ Input text:
 """
 
 
+def _build_batch_prompt(queries: List[str]) -> str:
+    inputs = "\n".join(f'{i}: """{q}"""' for i, q in enumerate(queries))
+    return f"""
+You are an expert hiring assistant.
+
+Extract structured hiring intent from EACH numbered input text below.
+Each input may be a short query, a long job description or informal
+hiring language. Treat every input independently.
+
+Return ONLY a valid JSON array with exactly {len(queries)} objects,
+in input order. Do NOT add explanations or markdown.
+
+Each object follows this schema:
+{{
+  "id": number,
+  "technical_skills": [string],
+  "behavioral_traits": [string],
+  "role_signals": [string],
+  "constraints": {{
+    "max_duration": number | null,
+    "seniority": string | null
+  }}
+}}
+
+Rules:
+- "id" is the number of the input the object belongs to
+- Normalize skills (e.g., "Java developer" → "Java")
+- Behavioral traits are soft skills (communication, teamwork, leadership, etc.)
+- role_signals include role type or domain (developer, sales, manager, analyst)
+- max_duration is in minutes if mentioned, else null
+- If information is missing, return empty lists or nulls
+
+Inputs:
+{inputs}
+"""
+
+
+def get_intent_version() -> str:
+    """Short hash of model + prompts: cached intents are valid while it holds."""
+    h = hashlib.sha256()
+    h.update(LLM_MODEL.encode("utf-8"))
+    h.update(_build_prompt("").encode("utf-8"))
+    h.update(_build_batch_prompt([]).encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+# =========================================================
+# DEFENSIVE PARSING
+# =========================================================
+def _parse_intent(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate one raw LLM object into the intent schema."""
+
+    intent = DEFAULT_INTENT.copy()
+
+    intent["technical_skills"] = list(
+        set(map(str, parsed.get("technical_skills", [])))
+    )
+
+    intent["behavioral_traits"] = list(
+        set(map(str, parsed.get("behavioral_traits", [])))
+    )
+
+    intent["role_signals"] = list(set(map(str, parsed.get("role_signals", []))))
+
+    constraints = parsed.get("constraints", {}) or {}
+    intent["constraints"] = {
+        "max_duration": constraints.get("max_duration"),
+        "seniority": constraints.get("seniority"),
+    }
+
+    return intent
+
+
 # =========================================================
 # MAIN FUNCTION
 # =========================================================
@@ -79,44 +165,117 @@ def extract_intent(query: str) -> Dict[str, Any]:
     Never raises on LLM parsing issues.
     """
 
-    if not query or not query.strip():
+    if not LLM_ENABLED or not query or not query.strip():
         return DEFAULT_INTENT.copy()
 
     try:
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
+        content = client.chat(
             messages=[{"role": "user", "content": _build_prompt(query)}],
             temperature=0,
             max_tokens=400,
-        )
-
-        content = response.choices[0].message.content.strip()
+        ).strip()
 
         # Attempt strict JSON parse
         parsed = json.loads(content)
 
         # ---- Defensive validation ----
-        intent = DEFAULT_INTENT.copy()
+        return _parse_intent(parsed)
 
-        intent["technical_skills"] = list(
-            set(map(str, parsed.get("technical_skills", [])))
-        )
+    except LLMUnavailableError:
+        # Groq degraded / over quota: go straight to the fallback
+        return DEFAULT_INTENT.copy()
 
-        intent["behavioral_traits"] = list(
-            set(map(str, parsed.get("behavioral_traits", [])))
-        )
+    except Exception as e:
+        # 🚨 NEVER break Phase-3 because of LLM
+        print(f"[WARN] Query understanding failed: {e}")
+        return DEFAULT_INTENT.copy()
 
-        intent["role_signals"] = list(set(map(str, parsed.get("role_signals", []))))
 
-        constraints = parsed.get("constraints", {}) or {}
-        intent["constraints"] = {
-            "max_duration": constraints.get("max_duration"),
-            "seniority": constraints.get("seniority"),
-        }
+# =========================================================
+# BATCH FUNCTION (BULK / EVAL WORKLOADS)
+# =========================================================
+BATCH_SIZE = 8
+
 
-        return intent
+def _extract_batch(queries: List[str]) -> List[Dict[str, Any]]:
+    """
+    One chat completion for several queries.
+    Items that fail validation are re-asked one by one.
+    """
+
+    try:
+        content = client.chat(
+            messages=[{"role": "user", "content": _build_batch_prompt(queries)}],
+            temperature=0,
+            max_tokens=400 * len(queries),
+        ).strip()
+
+        parsed = json.loads(content)
+        if isinstance(parsed, dict):
+            # Some models wrap the array: {"results": [...]}
+            parsed = next((v for v in parsed.values() if isinstance(v, list)), None)
+        if not isinstance(parsed, list):
+            raise ValueError("batch response is not a JSON array")
+
+    except LLMUnavailableError:
+        # Per-query calls would be shed too
+        return [DEFAULT_INTENT.copy() for _ in queries]
 
     except Exception as e:
-        # 🚨 NEVER break Phase-3 because of LLM
-        print(f"[WARN] Query understanding failed: {e}")
-        return DEFAULT_INTENT.copy()
+        print(f"[WARN] Batch query understanding failed, falling back: {e}")
+        return [extract_intent(q) for q in queries]
+
+    # Match items by "id" when present, else by position
+    by_id: Dict[int, Dict[str, Any]] = {}
+    for pos, item in enumerate(parsed):
+        if not isinstance(item, dict):
+            continue
+        key = item.get("id", pos)
+        if isinstance(key, int) and 0 <= key < len(queries) and key not in by_id:
+            by_id[key] = item
+
+    intents = []
+    for i, query in enumerate(queries):
+        try:
+            intents.append(_parse_intent(by_id[i]))
+        except Exception:
+            intents.append(extract_intent(query))
+
+    return intents
+
+
+def extract_intents_batch(
+    queries: List[str], batch_size: int = BATCH_SIZE, workers: int = 1
+) -> List[Dict[str, Any]]:
+    """
+    Batched extract_intent: packs batch_size queries per LLM call.
+    workers > 1 keeps that many calls in flight (still bounded by the
+    client's rate limit and concurrency slots).
+    Returns one intent per query, in order. Never raises.
+    """
+
+    intents: List[Dict[str, Any]] = [DEFAULT_INTENT.copy() for _ in queries]
+    if not LLM_ENABLED:
+        return intents
+
+    todo = [i for i, q in enumerate(queries) if q and q.strip()]
+    chunks = [
+        todo[start : start + batch_size] for start in range(0, len(todo), batch_size)
+    ]
+
+    def run(chunk: List[int]) -> List[Dict[str, Any]]:
+        if len(chunk) == 1:
+            return [extract_intent(queries[chunk[0]])]
+        return _extract_batch([queries[i] for i in chunk])
+
+    if workers > 1 and len(chunks) > 1:
+        with ThreadPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+            results = list(pool.map(run, chunks))
+    else:
+        results = [run(chunk) for chunk in chunks]
+
+    for chunk, chunk_intents in zip(chunks, results):
+        for i, intent in zip(chunk, chunk_intents):
+            intents[i] = intent
+
+    return intents
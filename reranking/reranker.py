@@ -1,22 +1,98 @@
+import os
+
+import numpy as np
+
 from reranking.query_understanding import extract_intent
-from reranking.scoring import compute_score
-from reranking.balance import enforce_balance
+from reranking.scoring import score_candidates
+from reranking.balance import balanced_positions
+from reranking.diversity import MMR_DEPTH, mmr_order
+from reranking import cross_encoder
+from retrieval.candidates import Candidates
+from retrieval.catalog import get_catalog
+from common.tracing import span
+
+# Off by default: MMR reorders candidates before the type quotas
+DIVERSIFY = os.getenv("SHL_MMR", "0") == "1"
 
 
-def rerank(query: str, candidates: list, final_k: int = 10) -> list:
+def rerank(
+    query: str,
+    candidates: list,
+    final_k: int = 10,
+    quotas=None,
+    diversify: bool = None,
+    use_cross_encoder: bool = None,
+    intent: dict = None,
+) -> list:
     """
     Full Phase-3 reranking pipeline.
+    Candidates are a retrieval.Candidates pool, or row-addressed dicts
+    (row, assessment_id, retrieval_score), in retrieval rank order.
+    Returns the same kind: the top final_k as Candidates (with
+    final_score), or the selected input dicts with "final_score" set.
+    quotas overrides balance.DEFAULT_QUOTAS (per test-type code min / max).
+    diversify applies MMR over the stored embeddings (default: DIVERSIFY).
+    use_cross_encoder rescores the top-N with a CPU cross-encoder
+    (default: cross_encoder.CROSS_ENCODER_ENABLED).
+    intent skips the LLM call when already extracted.
     """
 
+    if diversify is None:
+        diversify = DIVERSIFY
+    if use_cross_encoder is None:
+        use_cross_encoder = cross_encoder.CROSS_ENCODER_ENABLED
+
+    if isinstance(candidates, Candidates):
+        pool, dicts = candidates, None
+    else:
+        pool, dicts = Candidates.from_dicts(candidates), candidates
+
     # 1️⃣ Understand query (1 LLM call)
-    intent = extract_intent(query)
+    if intent is None:
+        intent = extract_intent(query)
+
+    rows = pool.rows
+    if pool.retrieval_score is None:
+        retrieval = np.zeros(len(pool), dtype="float64")
+    else:
+        retrieval = pool.retrieval_score
+
+    # 1️⃣b Optional cross-encoder on the top-N (budgeted, cached)
+    if use_cross_encoder and len(pool):
+        catalog = get_catalog()
+        with span("cross_encoder"):
+            probs = cross_encoder.cross_encoder_scores(
+                query,
+                rows,
+                [catalog.assessment_id(int(row)) for row in rows],
+                top_n=cross_encoder.CROSS_ENCODER_TOP_N,
+                budget_ms=cross_encoder.CROSS_ENCODER_BUDGET_MS,
+            )
+        retrieval = cross_encoder.blend_retrieval_scores(retrieval, probs)
+
+    # 2️⃣ Score candidates (one vectorized pass)
+    with span("compute_score"):
+        scores = score_candidates(rows, retrieval, intent)
+
+    # 3️⃣ Sort by final score (stable, like sorted(..., reverse=True))
+    order = np.argsort(-scores, kind="stable")
+
+    # 3️⃣b Optional MMR: push near-duplicates (e.g. .NET variants) down
+    if diversify:
+        with span("mmr"):
+            mmr = mmr_order(rows[order], scores[order], MMR_DEPTH * final_k)
+        order = order[mmr]
 
-    # 2️⃣ Score candidates
-    for c in candidates:
-        c["final_score"] = compute_score(c, intent)
+    # 4️⃣ Enforce test-type balance
+    with span("enforce_balance"):
+        picked = order[balanced_positions(rows[order], final_k, quotas)]
 
-    # 3️⃣ Sort by final score
-    candidates = sorted(candidates, key=lambda x: x.get("final_score", 0), reverse=True)
+    # Only the final k carry a final score out
+    if dicts is None:
+        ranked = pool.take(picked)
+        ranked.final_score = scores[picked]
+        return ranked
 
-    # 4️⃣ Enforce K/P balance
-    return enforce_balance(candidates, final_k)
+    for i in picked:
+        dicts[i]["final_score"] = float(scores[i])
+    return [dicts[i] for i in picked]
@@ -1,43 +1,155 @@
-def compute_score(candidate: dict, intent: dict) -> float:
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from retrieval.catalog import get_catalog
+from retrieval.catalogs import current_bundle
+
+
+# =========================================================
+# CONFIG
+# =========================================================
+RETRIEVAL_WEIGHT = 0.5
+SKILL_BONUS = 0.1
+TRAIT_BONUS = 0.05
+DURATION_BONUS = 0.05
+
+# Candidate rows repeat a lot across requests (popular assessments)
+ROW_CACHE_SIZE = 16384
+
+
+# =========================================================
+# TEXT INDEX (BUILT ONCE PER CATALOG)
+# =========================================================
+class TextIndex:
     """
-    Compute final relevance score for a candidate.
-    Fully safe for missing or None fields.
+    Per-row scoring data for one catalog. Term matching only reads the
+    candidate rows' normalized name + description (from the memory-mapped
+    store, LRU-cached), so its cost follows the pool size, not the catalog.
     """
 
-    score = 0.0
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.num_rows = len(catalog)
 
-    # 1️⃣ Base similarity score (Phase-2)
-    retrieval_score = candidate.get("retrieval_score")
-    if retrieval_score is None:
-        retrieval_score = 0.0
+        # Duration (None -> no constraint bonus)
+        if catalog.kinds.get("duration") == "int":
+            self.duration = np.asarray(catalog.column("duration"))
+            self.has_duration = ~np.asarray(catalog.is_null("duration"))
+        else:
+            self.duration = np.zeros(self.num_rows, dtype="int64")
+            self.has_duration = np.zeros(self.num_rows, dtype=bool)
+            for i in range(self.num_rows):
+                try:
+                    self.duration[i] = int(catalog.get("duration", i))
+                    self.has_duration[i] = True
+                except (ValueError, TypeError):
+                    pass
+
+        self._texts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def row_text(self, row: int) -> str:
+        """Lowercased name + description of one row."""
+        with self._lock:
+            text = self._texts.get(row)
+            if text is not None:
+                self._texts.move_to_end(row)
+                return text
+
+        catalog = self.catalog
+        text = (
+            (catalog.get("name", row) or "")
+            + " "
+            + (catalog.get("description", row) or "")
+        ).lower()
+
+        with self._lock:
+            self._texts[row] = text
+            if len(self._texts) > ROW_CACHE_SIZE:
+                self._texts.popitem(last=False)
+
+        return text
+
+    def term_hits(self, terms, rows: np.ndarray) -> np.ndarray:
+        """Number of terms (duplicates count) found in each candidate row."""
+        hits = np.zeros(len(rows), dtype="float64")
+        terms = [str(term).lower() for term in terms or [] if term]
+        if not terms:
+            return hits
+
+        texts = [self.row_text(int(row)) for row in rows]
+        for term in terms:
+            hits += np.fromiter((term in text for text in texts), bool, len(texts))
+        return hits
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._texts.clear()
 
-    score += 0.5 * float(retrieval_score)
 
-    # Safe text aggregation
-    text = (
-        (candidate.get("name") or "") + " " + (candidate.get("description") or "")
-    ).lower()
+def get_text_index() -> TextIndex:
+    def build():
+        print("🔹 Building scoring text index")
+        return TextIndex(get_catalog())
+
+    return current_bundle().derived("text_index", build)
+
+
+# =========================================================
+# SCORING
+# =========================================================
+def score_candidates(
+    rows: np.ndarray, retrieval_scores: np.ndarray, intent: dict
+) -> np.ndarray:
+    """
+    Vectorized final score for a pool of candidate rows.
+    Same rule set as compute_score, one NumPy expression per rule.
+    """
+
+    index = get_text_index()
+    rows = np.asarray(rows, dtype="int64")
+
+    # 1️⃣ Base similarity score (Phase-2)
+    retrieval = np.nan_to_num(np.asarray(retrieval_scores, dtype="float64"))
+    score = RETRIEVAL_WEIGHT * retrieval
 
     # 2️⃣ Technical skill overlap
-    for skill in intent.get("technical_skills", []):
-        if skill and skill.lower() in text:
-            score += 0.1
+    score += SKILL_BONUS * index.term_hits(intent.get("technical_skills"), rows)
 
     # 3️⃣ Behavioral traits
-    for trait in intent.get("behavioral_traits", []):
-        if trait and trait.lower() in text:
-            score += 0.05
+    score += TRAIT_BONUS * index.term_hits(intent.get("behavioral_traits"), rows)
 
     # 4️⃣ Duration constraint
     constraints = intent.get("constraints") or {}
     max_duration = constraints.get("max_duration")
 
-    duration = candidate.get("duration")
-    if max_duration is not None and duration is not None:
+    if max_duration is not None:
         try:
-            if int(duration) <= int(max_duration):
-                score += 0.05
+            limit = int(max_duration)
         except (ValueError, TypeError):
-            pass
+            limit = None
+
+        if limit is not None:
+            within = index.has_duration[rows] & (index.duration[rows] <= limit)
+            score += DURATION_BONUS * within
+
+    return np.round(score, 4)
+
+
+def compute_score(candidate: dict, intent: dict) -> float:
+    """
+    Compute final relevance score for a candidate.
+    Candidate fields are read from the catalog store by row.
+    Fully safe for missing or None fields.
+    """
+
+    retrieval_score = candidate.get("retrieval_score")
+    if retrieval_score is None:
+        retrieval_score = 0.0
 
-    return round(score, 4)
+    scores = score_candidates(
+        np.array([candidate["row"]]), np.array([float(retrieval_score)]), intent
+    )
+    return float(scores[0])
@@ -0,0 +1,87 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+# =========================================================
+# COMPACT CANDIDATE POOL
+# =========================================================
+class Candidates:
+    """
+    Ranked candidates as parallel arrays, one entry per candidate:
+    catalog row, vector / BM25 / fused retrieval score and final score.
+    Carried from search through rerank to formatting; per-candidate
+    dicts are only built for the final results (to_dicts()).
+    Optional score arrays are None when a source did not provide them
+    (e.g. precomputed results only keep rows and final scores).
+    """
+
+    __slots__ = ("rows", "retrieval_score", "vector_score", "bm25_score", "final_score")
+
+    def __init__(
+        self,
+        rows: np.ndarray,
+        retrieval_score: Optional[np.ndarray] = None,
+        vector_score: Optional[np.ndarray] = None,
+        bm25_score: Optional[np.ndarray] = None,
+        final_score: Optional[np.ndarray] = None,
+    ):
+        self.rows = np.asarray(rows, dtype="int64")
+        self.retrieval_score = retrieval_score
+        self.vector_score = vector_score
+        self.bm25_score = bm25_score
+        self.final_score = final_score
+
+    @classmethod
+    def empty(cls) -> "Candidates":
+        return cls(np.zeros(0, dtype="int64"))
+
+    @classmethod
+    def from_dicts(cls, candidates: List[Dict]) -> "Candidates":
+        """Pool from row-addressed dicts (retrieval_score may be missing)."""
+
+        def column(key: str) -> np.ndarray:
+            values = (c.get(key) or 0.0 for c in candidates)
+            return np.fromiter(values, dtype="float64", count=len(candidates))
+
+        rows = np.fromiter(
+            (c["row"] for c in candidates), dtype="int64", count=len(candidates)
+        )
+        return cls(rows, column("retrieval_score"))
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def take(self, index) -> "Candidates":
+        """Subset / reorder by position (array, list or slice)."""
+
+        def pick(values):
+            return None if values is None else values[index]
+
+        return Candidates(
+            self.rows[index],
+            pick(self.retrieval_score),
+            pick(self.vector_score),
+            pick(self.bm25_score),
+            pick(self.final_score),
+        )
+
+    def head(self, k: int) -> "Candidates":
+        return self.take(slice(0, k))
+
+    def _value(self, values, i: int):
+        return None if values is None else float(values[i])
+
+    def to_dicts(self, catalog) -> List[Dict]:
+        """Row-addressed dicts, as rerank() returns for dict input."""
+        return [
+            {
+                "row": int(row),
+                "assessment_id": catalog.assessment_id(int(row)),
+                "retrieval_score": self._value(self.retrieval_score, i),
+                "vector_score": self._value(self.vector_score, i),
+                "bm25_score": self._value(self.bm25_score, i),
+                "final_score": self._value(self.final_score, i),
+            }
+            for i, row in enumerate(self.rows)
+        ]
@@ -0,0 +1,270 @@
+import os
+import json
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+# =========================================================
+# CONFIG
+# =========================================================
+BASE_DIR = Path(__file__).resolve().parents[1]
+DATA_DIR = BASE_DIR / "data"
+
+PROCESSED_DIR = DATA_DIR / "processed"
+ASSESSMENTS_JSON = PROCESSED_DIR / "shl_assessments.json"
+ASSESSMENTS_PARQUET = PROCESSED_DIR / "shl_assessments.parquet"
+
+INDEX_DIR = Path(os.getenv("SHL_INDEX_DIR", DATA_DIR / "index"))
+CATALOG_DIR = INDEX_DIR / "catalog"
+MANIFEST_FILE = "manifest.json"
+# meta.json "input_hash_version" of compute_file_hash (line endings normalized)
+INPUT_HASH_VERSION = 2
+
+# Separator for list cells (never appears in scraped text)
+LIST_SEP = "\x1f"
+
+
+# =========================================================
+# SOURCE LOADING
+# =========================================================
+def _clean_value(value: Any) -> Any:
+    """Undo pandas artefacts (NaN, numpy scalars / arrays)."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+def compute_file_hash(path: Path) -> str:
+    """sha256 of a file, line endings normalized (CRLF checkouts hash the same)."""
+    h = hashlib.sha256()
+    carry = b""
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(8192), b""):
+            chunk = carry + chunk
+            # A CRLF may straddle two chunks
+            carry = b"\r" if chunk.endswith(b"\r") else b""
+            h.update(chunk[: len(chunk) - len(carry)].replace(b"\r\n", b"\n"))
+    h.update(carry)
+    return h.hexdigest()
+
+
+def default_source() -> Path:
+    """The parquet written by ingest.py if present, else the JSON."""
+    return ASSESSMENTS_PARQUET if ASSESSMENTS_PARQUET.exists() else ASSESSMENTS_JSON
+
+
+def load_source_records(source: Optional[Path] = None) -> List[Dict]:
+    """
+    Canonical records from the ingestion output.
+    Prefers the parquet written by ingest.py, falls back to JSON.
+    """
+    source = source or default_source()
+
+    if source.suffix == ".parquet":
+        import pandas as pd
+
+        df = pd.read_parquet(source)
+        return [
+            {k: _clean_value(v) for k, v in row.items()}
+            for row in df.to_dict("records")
+        ]
+
+    with open(source, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _infer_kind(values: List[Any]) -> str:
+    present = [v for v in values if v is not None]
+    if any(isinstance(v, (list, tuple)) for v in present):
+        return "list"
+    if present and all(type(v) is int for v in present):
+        return "int"
+    if present and all(isinstance(v, (int, float)) for v in present):
+        return "float"
+    return "str"
+
+
+# =========================================================
+# BUILD
+# =========================================================
+def _write_text_column(out_dir: Path, col: str, texts: List[Optional[str]]) -> None:
+    encoded = [(t or "").encode("utf-8") for t in texts]
+
+    offsets = np.zeros(len(encoded) + 1, dtype="int64")
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+
+    np.save(out_dir / f"{col}.offsets.npy", offsets)
+    data = np.frombuffer(b"".join(encoded), dtype="uint8")
+    np.save(out_dir / f"{col}.data.npy", data)
+
+
+def build_catalog_store(
+    records: Optional[List[Dict]] = None,
+    out_dir: Path = CATALOG_DIR,
+    source: Optional[Path] = None,
+    source_hash: Optional[str] = None,
+) -> Path:
+    """
+    Write the catalog as memory-mappable columns, one .npy per array.
+    Row i is the i-th assessment in assessment_id order, i.e. the same
+    row as embeddings.npy and id_map.json.
+    source_hash is the hash of the JSON the rows came from (meta.json's
+    input_hash); it is computed when the rows are read from a JSON source.
+    """
+    if records is None:
+        source = source or default_source()
+        records = load_source_records(source)
+        if source_hash is None and source.suffix == ".json":
+            source_hash = compute_file_hash(source)
+
+    if not records:
+        raise ValueError("Cannot build catalog store from empty records")
+
+    records = sorted(records, key=lambda x: x["assessment_id"])
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    columns: List[str] = []
+    for r in records:
+        for key in r:
+            if key not in columns:
+                columns.append(key)
+
+    kinds: Dict[str, str] = {}
+    for col in columns:
+        values = [_clean_value(r.get(col)) for r in records]
+        kind = _infer_kind(values)
+        kinds[col] = kind
+
+        np.save(out_dir / f"{col}.null.npy", np.array([v is None for v in values]))
+
+        if kind == "int":
+            np.save(out_dir / f"{col}.npy", np.array([v or 0 for v in values], "int64"))
+        elif kind == "float":
+            np.save(
+                out_dir / f"{col}.npy", np.array([v or 0.0 for v in values], "float64")
+            )
+        elif kind == "list":
+            texts = [LIST_SEP.join(map(str, v)) if v else "" for v in values]
+            _write_text_column(out_dir, col, texts)
+        else:
+            texts = [None if v is None else str(v) for v in values]
+            _write_text_column(out_dir, col, texts)
+
+    manifest = {
+        "num_rows": len(records),
+        "source_hash": source_hash or "",
+        "columns": kinds,
+        "content_hash": hashlib.sha256(
+            json.dumps(records, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest(),
+    }
+    with open(out_dir / MANIFEST_FILE, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    return out_dir
+
+
+# =========================================================
+# STORE
+# =========================================================
+class CatalogStore:
+    """
+    Read-only, memory-mapped columnar catalog addressed by integer row.
+    Nothing is decoded until a cell is asked for.
+    """
+
+    def __init__(self, directory: Path = CATALOG_DIR):
+        with open(directory / MANIFEST_FILE, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        self.directory = directory
+        self.num_rows: int = manifest["num_rows"]
+        self.kinds: Dict[str, str] = manifest["columns"]
+        self.content_hash: str = manifest.get("content_hash", "")
+        # Empty for stores written before it was recorded (or from parquet)
+        self.source_hash: str = manifest.get("source_hash", "")
+
+        self._nulls = {}
+        self._values = {}
+        self._offsets = {}
+        self._data = {}
+
+        for col, kind in self.kinds.items():
+            self._nulls[col] = np.load(directory / f"{col}.null.npy", mmap_mode="r")
+            if kind in ("int", "float"):
+                self._values[col] = np.load(directory / f"{col}.npy", mmap_mode="r")
+            else:
+                self._offsets[col] = np.load(
+                    directory / f"{col}.offsets.npy", mmap_mode="r"
+                )
+                self._data[col] = np.load(directory / f"{col}.data.npy", mmap_mode="r")
+
+        self._row_by_id: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return self.num_rows
+
+    # ---- cells ----
+    def _text(self, col: str, row: int) -> str:
+        offsets = self._offsets[col]
+        raw = self._data[col][offsets[row] : offsets[row + 1]]
+        return raw.tobytes().decode("utf-8")
+
+    def get(self, col: str, row: int) -> Any:
+        kind = self.kinds.get(col)
+        if kind is None or self._nulls[col][row]:
+            return None
+        if kind == "int":
+            return int(self._values[col][row])
+        if kind == "float":
+            return float(self._values[col][row])
+        if kind == "list":
+            text = self._text(col, row)
+            return text.split(LIST_SEP) if text else []
+        return self._text(col, row)
+
+    def column(self, col: str) -> np.ndarray:
+        """Raw numeric column (mmap); nulls read as 0."""
+        return self._values[col]
+
+    def is_null(self, col: str) -> np.ndarray:
+        return self._nulls[col]
+
+    # ---- ids ----
+    def assessment_id(self, row: int) -> str:
+        return self._text("assessment_id", row)
+
+    def row_of(self, assessment_id: str) -> Optional[int]:
+        if self._row_by_id is None:
+            self._row_by_id = {
+                self.assessment_id(i): i for i in range(self.num_rows)
+            }
+        return self._row_by_id.get(assessment_id)
+
+    # ---- rows ----
+    def materialize(self, row: int) -> Dict[str, Any]:
+        """Full record dict for one row (only for final results)."""
+        return {col: self.get(col, row) for col in self.kinds}
+
+
+# =========================================================
+# ACCESSOR
+# =========================================================
+def get_catalog() -> CatalogStore:
+    """Store of the active catalog (default unless inside use_catalog())."""
+    from retrieval.catalogs import current_bundle
+
+    return current_bundle().catalog
+
+
+if __name__ == "__main__":
+    out = build_catalog_store()
+    store = CatalogStore(out)
+    print(f"✅ Catalog store: {len(store)} rows, {len(store.kinds)} columns in {out}")
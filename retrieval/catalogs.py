@@ -0,0 +1,289 @@
+import os
+import json
+import threading
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+from retrieval.catalog import (
+    CATALOG_DIR,
+    DATA_DIR,
+    INDEX_DIR,
+    INPUT_HASH_VERSION,
+    MANIFEST_FILE,
+    CatalogStore,
+    build_catalog_store,
+)
+
+
+# =========================================================
+# CONFIG
+# =========================================================
+DEFAULT_CATALOG = "default"
+
+# Named catalogs: one index directory each (embed.py --index-dir),
+# data/catalogs/<name>/ {embeddings.npy, meta.json, id_map.json, catalog/}
+CATALOGS_DIR = Path(os.getenv("SHL_CATALOGS_DIR", DATA_DIR / "catalogs"))
+
+# Resident size allowed for all loaded bundles together; least recently
+# used bundles are dropped past it (the one being requested always stays)
+INDEX_MEMORY_BUDGET_MB = float(os.getenv("SHL_INDEX_MEMORY_MB", "1024"))
+
+
+class UnknownCatalogError(KeyError):
+    pass
+
+
+def _estimate_nbytes(obj: Any) -> int:
+    """Approximate resident size of a derived index structure."""
+    if isinstance(obj, np.memmap):
+        # Page cache, not heap: the kernel reclaims it under pressure
+        return 0
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if hasattr(obj, "ntotal") and hasattr(obj, "d"):
+        # faiss.IndexFlat* keeps a float32 copy of every vector
+        return int(obj.ntotal) * int(obj.d) * 4
+    if hasattr(obj, "doc_freqs"):
+        # BM25Okapi: one {term: count} dict per document
+        return sum(len(d) for d in obj.doc_freqs) * 120 + len(obj.idf) * 120
+    total = 0
+    for value in getattr(obj, "__dict__", {}).values():
+        if isinstance(value, np.ndarray) and not isinstance(value, np.memmap):
+            total += value.nbytes
+        elif isinstance(value, (str, bytes)):
+            total += len(value)
+    return total
+
+
+# =========================================================
+# BUNDLE (ONE CATALOG + ITS INDEXES)
+# =========================================================
+class IndexBundle:
+    """
+    Everything search and rerank need for one catalog, built lazily:
+    the memory-mapped catalog store plus derived structures
+    (embeddings, FAISS, BM25, scoring text index, type masks) that the
+    owning modules register through derived(). on_grow is called after
+    each new structure so the owning cache can re-check its budget.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        index_dir: Path,
+        on_grow: Optional[Callable[["IndexBundle"], None]] = None,
+    ):
+        self.name = name
+        self.index_dir = Path(index_dir)
+        self.embeddings_file = self.index_dir / "embeddings.npy"
+        self.meta_file = self.index_dir / "meta.json"
+        self.catalog_dir = self.index_dir / "catalog"
+
+        self.on_grow = on_grow
+        self._derived: Dict[str, Any] = {}
+        self._sizes: Dict[str, int] = {}
+        # Reentrant: FAISS is built from the (derived) embeddings
+        self._lock = threading.RLock()
+
+        if not (self.catalog_dir / MANIFEST_FILE).exists():
+            if self.catalog_dir != CATALOG_DIR:
+                raise FileNotFoundError(f"No catalog store in {self.catalog_dir}")
+            print("🔹 Catalog store missing, building from processed data")
+            build_catalog_store()
+
+        print(f"🔹 Memory-mapping catalog store ({name})")
+        self.catalog = CatalogStore(self.catalog_dir)
+        self._check_artifacts()
+
+    def _check_artifacts(self) -> None:
+        """
+        Catalog rows must line up with embedding rows, and both must come
+        from the same processed data; otherwise results point at wrong rows.
+        """
+        if self.embeddings_file.exists():
+            # Header only: the mmap reads no vector data
+            num_vectors = np.load(self.embeddings_file, mmap_mode="r").shape[0]
+            if num_vectors != len(self.catalog):
+                raise ValueError(
+                    f"{self.index_dir}: catalog has {len(self.catalog)} rows "
+                    f"but embeddings.npy has {num_vectors}; rebuild the index"
+                )
+
+        if self.catalog.source_hash and self.meta_file.exists():
+            with open(self.meta_file, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            input_hash = meta.get("input_hash")
+            if not input_hash or input_hash == self.catalog.source_hash:
+                return
+            message = (
+                f"{self.index_dir}: catalog and embeddings were built from "
+                "different processed data; rebuild the index"
+            )
+            # Older meta.json hashed raw bytes, so a CRLF checkout of the
+            # same data differs: only hashes written by compute_file_hash fail
+            if meta.get("input_hash_version") != INPUT_HASH_VERSION:
+                print(f"⚠️ {message}")
+                return
+            raise ValueError(message)
+
+    def derived(self, key: str, build: Callable[[], Any]) -> Any:
+        """Build-once structure owned by this catalog (thread-safe)."""
+        value = self._derived.get(key)
+        if value is None:
+            built = False
+            with self._lock:
+                value = self._derived.get(key)
+                if value is None:
+                    value = build()
+                    self._derived[key] = value
+                    self._sizes[key] = _estimate_nbytes(value)
+                    built = True
+            # Outside the bundle lock: the cache takes its own lock to evict
+            if built and self.on_grow is not None:
+                self.on_grow(self)
+        return value
+
+    def nbytes(self) -> int:
+        return sum(self._sizes.values())
+
+    def to_dict(self) -> dict:
+        return {
+            "rows": len(self.catalog),
+            "index_dir": str(self.index_dir),
+            "resident_mb": round(self.nbytes() / 2**20, 2),
+            "built": sorted(self._derived),
+        }
+
+
+# =========================================================
+# REGISTRY + LRU
+# =========================================================
+def available_catalogs() -> Dict[str, Path]:
+    """name -> index directory (default first, then data/catalogs/*)."""
+    catalogs = {DEFAULT_CATALOG: INDEX_DIR}
+    if CATALOGS_DIR.is_dir():
+        for path in sorted(CATALOGS_DIR.iterdir()):
+            if (path / "catalog" / MANIFEST_FILE).exists():
+                catalogs.setdefault(path.name, path)
+    return catalogs
+
+
+class IndexCache:
+    """LRU of loaded bundles under a memory budget."""
+
+    def __init__(self, budget_mb: float = INDEX_MEMORY_BUDGET_MB):
+        self.budget_bytes = int(budget_mb * 2**20)
+        self.bundles: "OrderedDict[str, IndexBundle]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "loads": 0, "evictions": 0}
+
+    def get(self, name: str) -> IndexBundle:
+        with self.lock:
+            bundle = self.bundles.get(name)
+            if bundle is not None:
+                self.bundles.move_to_end(name)
+                self.stats["hits"] += 1
+                self._evict()
+                return bundle
+
+            index_dir = available_catalogs().get(name)
+            if index_dir is None:
+                raise UnknownCatalogError(name)
+
+            bundle = IndexBundle(name, index_dir, on_grow=self._on_grow)
+            self.bundles[name] = bundle
+            self.stats["loads"] += 1
+            self._evict()
+            return bundle
+
+    def peek(self, name: str) -> IndexBundle:
+        """
+        A loaded bundle without counting a hit or running an eviction
+        pass (default-catalog lookups); loads through get() on a miss.
+        """
+        with self.lock:
+            bundle = self.bundles.get(name)
+            if bundle is not None:
+                self.bundles.move_to_end(name)
+                return bundle
+        return self.get(name)
+
+    def _on_grow(self, bundle: IndexBundle) -> None:
+        """A bundle built a new structure: it is in use, others may go."""
+        with self.lock:
+            if self.bundles.get(bundle.name) is bundle:
+                self.bundles.move_to_end(bundle.name)
+                self._evict()
+
+    def _evict(self) -> None:
+        """
+        Drop least recently used bundles until under budget. Requests
+        already holding a bundle keep using it; it is freed after them.
+        """
+        while len(self.bundles) > 1 and self.resident_bytes() > self.budget_bytes:
+            name, _ = self.bundles.popitem(last=False)
+            self.stats["evictions"] += 1
+            print(f"🔹 Evicted catalog index: {name}")
+
+    def resident_bytes(self) -> int:
+        return sum(b.nbytes() for b in self.bundles.values())
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            return {
+                **self.stats,
+                "budget_mb": round(self.budget_bytes / 2**20, 2),
+                "resident_mb": round(self.resident_bytes() / 2**20, 2),
+                "loaded": {n: b.to_dict() for n, b in self.bundles.items()},
+                "available": list(available_catalogs()),
+            }
+
+
+_index_cache = IndexCache()
+
+# Bundle pinned for the current request; copied into pipeline stage
+# threads with the rest of the context
+_active_bundle: contextvars.ContextVar = contextvars.ContextVar(
+    "shl_active_bundle", default=None
+)
+
+
+# =========================================================
+# ACCESSORS
+# =========================================================
+def get_bundle(name: Optional[str] = None) -> IndexBundle:
+    return _index_cache.get(name or DEFAULT_CATALOG)
+
+
+def current_bundle() -> IndexBundle:
+    """The request's catalog, or the default one outside use_catalog()."""
+    bundle = _active_bundle.get()
+    return bundle if bundle is not None else _index_cache.peek(DEFAULT_CATALOG)
+
+
+@contextmanager
+def use_bundle(bundle: IndexBundle):
+    """
+    Route search / rerank in this context to one catalog's bundle.
+    Pinned by reference, so eviction mid-request cannot swap indexes
+    under a running query.
+    """
+    token = _active_bundle.set(bundle)
+    try:
+        yield bundle
+    finally:
+        _active_bundle.reset(token)
+
+
+def use_catalog(name: Optional[str] = None):
+    """use_bundle() by catalog name (raises UnknownCatalogError)."""
+    return use_bundle(get_bundle(name))
+
+
+def get_index_stats() -> dict:
+    return _index_cache.to_dict()
@@ -1,12 +1,18 @@
+import os
 import json
-import hashlib
+import argparse
 from pathlib import Path
 from typing import Dict, List
 
 import numpy as np
-from sentence_transformers import SentenceTransformer
 from tqdm import tqdm
 
+from retrieval.catalog import (
+    INPUT_HASH_VERSION,
+    build_catalog_store,
+    compute_file_hash,
+)
+
 
 # ============================================================
 # CONFIG
@@ -14,27 +20,19 @@ from tqdm import tqdm
 BASE_DIR = Path(__file__).resolve().parents[1]
 
 INPUT_JSON = BASE_DIR / "data" / "processed" / "shl_assessments.json"
-INDEX_DIR = BASE_DIR / "data" / "index"
-
-EMBEDDINGS_FILE = INDEX_DIR / "embeddings.npy"
-ID_MAP_FILE = INDEX_DIR / "id_map.json"
-META_FILE = INDEX_DIR / "meta.json"
+INDEX_DIR = Path(os.getenv("SHL_INDEX_DIR", BASE_DIR / "data" / "index"))
 
 MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+VECTOR_DIM = 384
 BATCH_SIZE = 32
 
+# Random-vector mode writes in chunks so 1M-row indexes never sit in RAM twice
+RANDOM_CHUNK = 65_536
+
 
 # ============================================================
 # UTILS
 # ============================================================
-def compute_file_hash(path: Path) -> str:
-    h = hashlib.sha256()
-    with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            h.update(chunk)
-    return h.hexdigest()
-
-
 def normalize_text(value: str | None) -> str:
     if not value:
         return "Not specified"
@@ -60,94 +58,182 @@ def build_embedding_text(assessment: Dict) -> str:
     return " ".join(parts)
 
 
-# ============================================================
-# MAIN
-# ============================================================
-def main():
-    print("🔹 Phase-2 Embedding Pipeline (Canonical-Safe)")
-    print("🔹 Loading canonical data...")
-
-    if not INPUT_JSON.exists():
-        raise FileNotFoundError(f"Missing input file: {INPUT_JSON}")
-
-    INDEX_DIR.mkdir(parents=True, exist_ok=True)
-
-    with open(INPUT_JSON, "r", encoding="utf-8") as f:
-        assessments: List[Dict] = json.load(f)
-
-    if not assessments:
-        raise ValueError("Input JSON is empty")
+def random_unit_vectors(path: Path, n: int, dim: int, seed: int) -> np.ndarray:
+    """
+    Benchmark-only embeddings: normalized Gaussian vectors, no model needed.
+    Written straight to a memory-mapped .npy file.
+    """
+    rng = np.random.default_rng(seed)
+    out = np.lib.format.open_memmap(path, mode="w+", dtype="float32", shape=(n, dim))
 
-    # --------------------------------------------------------
-    # Deterministic ordering (CRITICAL)
-    # --------------------------------------------------------
-    assessments = sorted(assessments, key=lambda x: x["assessment_id"])
+    for start in tqdm(range(0, n, RANDOM_CHUNK), desc="random vectors"):
+        stop = min(start + RANDOM_CHUNK, n)
+        block = rng.standard_normal((stop - start, dim), dtype="float32")
+        block /= np.linalg.norm(block, axis=1, keepdims=True)
+        out[start:stop] = block
 
-    embedding_texts: List[str] = []
-    id_map: Dict[int, str] = {}
+    out.flush()
+    return out
 
-    for idx, assessment in enumerate(assessments):
-        text = build_embedding_text(assessment)
-        embedding_texts.append(text)
-        id_map[idx] = assessment["assessment_id"]
 
-    print(f"🔹 Assessments to embed: {len(embedding_texts)}")
+def load_model():
+    from sentence_transformers import SentenceTransformer
 
-    # --------------------------------------------------------
-    # Load model
-    # --------------------------------------------------------
     print(f"🔹 Loading embedding model: {MODEL_NAME}")
-    model = SentenceTransformer(MODEL_NAME)
+    return SentenceTransformer(MODEL_NAME)
 
-    # --------------------------------------------------------
-    # Generate embeddings
-    # --------------------------------------------------------
-    print("🔹 Generating embeddings...")
-    embeddings = model.encode(
-        embedding_texts,
-        batch_size=BATCH_SIZE,
-        show_progress_bar=True,
-        normalize_embeddings=True,
-    )
 
-    embeddings = np.asarray(embeddings, dtype="float32")
+def write_index_artifacts(
+    index_dir: Path,
+    assessments: List[Dict],
+    embeddings: np.ndarray,
+    model_name: str,
+    input_json: Path,
+) -> None:
+    """
+    id_map / meta / columnar catalog next to an already-written
+    embeddings.npy, then the anti-silent-failure checks.
+    `assessments` must be in assessment_id order (the embedding row order).
+    """
+    id_map: Dict[int, str] = {
+        idx: assessment["assessment_id"] for idx, assessment in enumerate(assessments)
+    }
 
     # --------------------------------------------------------
     # Save artifacts
     # --------------------------------------------------------
     print("🔹 Saving index artifacts...")
 
-    np.save(EMBEDDINGS_FILE, embeddings)
-
-    with open(ID_MAP_FILE, "w", encoding="utf-8") as f:
+    with open(index_dir / "id_map.json", "w", encoding="utf-8") as f:
         json.dump(id_map, f, indent=2)
 
     meta = {
-        "model": MODEL_NAME,
+        "model": model_name,
         "vector_dim": embeddings.shape[1],
         "num_vectors": embeddings.shape[0],
-        "input_file": str(INPUT_JSON),
-        "input_hash": compute_file_hash(INPUT_JSON),
+        "input_file": str(input_json),
+        "input_hash": compute_file_hash(input_json),
+        "input_hash_version": INPUT_HASH_VERSION,
         "schema_version": "v2-canonical",
     }
 
-    with open(META_FILE, "w", encoding="utf-8") as f:
+    with open(index_dir / "meta.json", "w", encoding="utf-8") as f:
         json.dump(meta, f, indent=2)
 
+    # Columnar catalog rows line up 1:1 with the embedding rows
+    print("🔹 Building columnar catalog store...")
+    build_catalog_store(
+        assessments, index_dir / "catalog", source_hash=meta["input_hash"]
+    )
+
     # --------------------------------------------------------
     # Safety checks (ANTI-SILENT-FAILURE)
     # --------------------------------------------------------
     print("🔹 Running sanity checks...")
 
     assert embeddings.shape[0] == len(id_map), "Mismatch: vectors vs id_map"
-    assert embeddings.shape[1] == 384, "Unexpected embedding dimension"
+    assert embeddings.shape[1] == VECTOR_DIM, "Unexpected embedding dimension"
 
     norms = np.linalg.norm(embeddings, axis=1)
     assert np.allclose(norms.mean(), 1.0, atol=1e-2), "Embeddings not normalized"
 
+
+def warm_new_index(index_dir: Path) -> None:
+    """Precompute popular query results so the new index goes live warm."""
+    try:
+        from api.warm_cache import warm_index
+
+        warm_index(index_dir)
+    except Exception as e:
+        # The index itself is complete; it just starts cold
+        print(f"⚠️ Cache warming skipped: {e}")
+
+
+# ============================================================
+# MAIN
+# ============================================================
+def main():
+    parser = argparse.ArgumentParser(description="Build Phase-2 index artifacts")
+    parser.add_argument("--input", type=Path, default=INPUT_JSON)
+    parser.add_argument("--index-dir", type=Path, default=INDEX_DIR)
+    parser.add_argument(
+        "--random-vectors",
+        action="store_true",
+        help="random unit vectors instead of the model (benchmarks only)",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--no-warm",
+        action="store_true",
+        help="skip precomputing popular query results (api/warm_cache.py)",
+    )
+    args = parser.parse_args()
+
+    input_json, index_dir = args.input, args.index_dir
+    embeddings_file = index_dir / "embeddings.npy"
+
+    print("🔹 Phase-2 Embedding Pipeline (Canonical-Safe)")
+    print("🔹 Loading canonical data...")
+
+    if not input_json.exists():
+        raise FileNotFoundError(f"Missing input file: {input_json}")
+
+    index_dir.mkdir(parents=True, exist_ok=True)
+
+    with open(input_json, "r", encoding="utf-8") as f:
+        assessments: List[Dict] = json.load(f)
+
+    if not assessments:
+        raise ValueError("Input JSON is empty")
+
+    # --------------------------------------------------------
+    # Deterministic ordering (CRITICAL)
+    # --------------------------------------------------------
+    assessments = sorted(assessments, key=lambda x: x["assessment_id"])
+
+    print(f"🔹 Assessments to embed: {len(assessments)}")
+
+    if args.random_vectors:
+        # --------------------------------------------------------
+        # Random unit vectors (scaling benchmarks)
+        # --------------------------------------------------------
+        print("🔹 Generating random unit vectors (no model)...")
+        model_name = "random-unit-vectors"
+        embeddings = random_unit_vectors(
+            embeddings_file, len(assessments), VECTOR_DIM, args.seed
+        )
+
+    else:
+        embedding_texts = [build_embedding_text(a) for a in assessments]
+
+        # --------------------------------------------------------
+        # Load model
+        # --------------------------------------------------------
+        model_name = MODEL_NAME
+        model = load_model()
+
+        # --------------------------------------------------------
+        # Generate embeddings
+        # --------------------------------------------------------
+        print("🔹 Generating embeddings...")
+        embeddings = model.encode(
+            embedding_texts,
+            batch_size=BATCH_SIZE,
+            show_progress_bar=True,
+            normalize_embeddings=True,
+        )
+
+        embeddings = np.asarray(embeddings, dtype="float32")
+        np.save(embeddings_file, embeddings)
+
+    write_index_artifacts(index_dir, assessments, embeddings, model_name, input_json)
+
+    if not (args.random_vectors or args.no_warm):
+        warm_new_index(index_dir)
+
     print("✅ Embedding pipeline complete")
     print(f"📦 vectors: {embeddings.shape}")
-    print(f"📁 saved in: {INDEX_DIR}")
+    print(f"📁 saved in: {index_dir}")
 
 
 if __name__ == "__main__":
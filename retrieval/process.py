@@ -1,6 +1,6 @@
 import re
 import unicodedata
-from typing import Optional
+from typing import List, Optional
 
 
 # =========================================================
@@ -13,6 +13,9 @@ MAX_CHARS = 3500
 # Minimum useful query length
 MIN_CHARS = 5
 
+# Token overlap between consecutive long-query chunks
+CHUNK_OVERLAP_TOKENS = 32
+
 # Common JD boilerplate patterns (CONSERVATIVE)
 BOILERPLATE_PATTERNS = [
     r"\babout us\b",
@@ -97,3 +100,48 @@ def preprocess_query(raw_query: Optional[str]) -> str:
         return ""
 
     return text
+
+
+# =========================================================
+# LONG QUERY CHUNKING
+# =========================================================
+
+
+def split_token_chunks(
+    text: str,
+    tokenizer,
+    max_tokens: int,
+    max_chunks: int,
+    overlap: int = CHUNK_OVERLAP_TOKENS,
+) -> List[str]:
+    """
+    Split text into windows of at most max_tokens word-pieces.
+    - Boundaries come from the tokenizer's offsets (no mid-token cuts)
+    - At most max_chunks windows, spread evenly so the tail still counts
+    """
+
+    if not text:
+        return []
+
+    enc = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)
+    offsets = enc["offset_mapping"]
+    n_tokens = len(offsets)
+
+    if n_tokens <= max_tokens or max_chunks <= 1:
+        return [text]
+
+    stride = max(1, max_tokens - overlap)
+    last_start = n_tokens - max_tokens
+    starts = list(range(0, last_start, stride)) + [last_start]
+
+    # Keep latency bounded: evenly spaced windows across the whole text
+    if len(starts) > max_chunks:
+        step = last_start / (max_chunks - 1)
+        starts = [round(i * step) for i in range(max_chunks)]
+
+    chunks = []
+    for start in starts:
+        end = min(start + max_tokens, n_tokens) - 1
+        chunks.append(text[offsets[start][0] : offsets[end][1]])
+
+    return chunks
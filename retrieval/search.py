@@ -1,13 +1,17 @@
-import json
+import os
+import hashlib
+import threading
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Tuple
 
 import numpy as np
 import faiss
 from rank_bm25 import BM25Okapi
-from sentence_transformers import SentenceTransformer
 
-from retrieval.process import preprocess_query
+from retrieval.candidates import Candidates
+from retrieval.catalog import get_catalog
+from retrieval.catalogs import DEFAULT_CATALOG, current_bundle, use_catalog
+from retrieval.process import preprocess_query, split_token_chunks
 
 
 # =========================================================
@@ -16,13 +20,11 @@ from retrieval.process import preprocess_query
 BASE_DIR = Path(__file__).resolve().parents[1]
 DATA_DIR = BASE_DIR / "data"
 
-INDEX_DIR = DATA_DIR / "index"
-PROCESSED_DIR = DATA_DIR / "processed"
+# Overridable so benchmarks can point the service at a synthetic index
+INDEX_DIR = Path(os.getenv("SHL_INDEX_DIR", DATA_DIR / "index"))
 
 EMBEDDINGS_FILE = INDEX_DIR / "embeddings.npy"
-ID_MAP_FILE = INDEX_DIR / "id_map.json"
 META_FILE = INDEX_DIR / "meta.json"
-ASSESSMENTS_FILE = PROCESSED_DIR / "shl_assessments.json"
 
 MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 
@@ -33,66 +35,52 @@ TOP_K_BM25 = 100
 VECTOR_WEIGHT = 0.7
 BM25_WEIGHT = 0.3
 
+# Long-query mode: "off" | "mean" | "max" | "multi" (multi-vector FAISS search)
+LONG_QUERY_MODE = os.getenv("SHL_LONG_QUERY_MODE", "off")
+MAX_QUERY_CHUNKS = int(os.getenv("SHL_MAX_QUERY_CHUNKS", "4"))
 
-# =========================================================
-# LAZY GLOBALS (CRITICAL FOR MEMORY)
-# =========================================================
-_embeddings = None
-_faiss_index = None
-_bm25 = None
-_model = None
-_id_map = None
-_assessment_lookup = None
+# Scatter-gather sharding (1 = single in-process index)
+NUM_SHARDS = int(os.getenv("SHL_NUM_SHARDS", "1"))
+SHARD_BACKEND = os.getenv("SHL_SHARD_BACKEND", "process")  # "process" | "local"
 
 
 # =========================================================
-# LOAD STATIC FILES (LIGHTWEIGHT)
+# LAZY GLOBALS (CRITICAL FOR MEMORY)
 # =========================================================
-def load_metadata():
-    global _id_map, _assessment_lookup
-
-    if _id_map is None:
-        with open(ID_MAP_FILE, "r", encoding="utf-8") as f:
-            _id_map = json.load(f)
-
-    if _assessment_lookup is None:
-        with open(ASSESSMENTS_FILE, "r", encoding="utf-8") as f:
-            assessments = json.load(f)
-        _assessment_lookup = {a["assessment_id"]: a for a in assessments}
-
-    return _id_map, _assessment_lookup
+# Per-catalog indexes live in the active IndexBundle (retrieval.catalogs);
+# the query encoder is shared by all catalogs
+_model = None
+_sharded_index = None
+_sharded_lock = threading.Lock()
 
 
 # =========================================================
 # EMBEDDINGS
 # =========================================================
 def get_embeddings():
-    global _embeddings
+    bundle = current_bundle()
 
-    if _embeddings is None:
-        print("🔹 Loading embeddings.npy")
-        _embeddings = np.load(EMBEDDINGS_FILE)
+    def load():
+        print(f"🔹 Loading embeddings.npy ({bundle.name})")
+        return np.load(bundle.embeddings_file)
 
-    return _embeddings
+    return bundle.derived("embeddings", load)
 
 
 # =========================================================
 # FAISS INDEX (COSINE / IP)
 # =========================================================
 def get_faiss_index():
-    global _faiss_index
-
-    if _faiss_index is None:
+    def build():
         embeddings = get_embeddings()
         dim = embeddings.shape[1]
 
         print("🔹 Building FAISS index")
         index = faiss.IndexFlatIP(dim)
         index.add(embeddings)
+        return index
 
-        _faiss_index = index
-
-    return _faiss_index
+    return current_bundle().derived("faiss", build)
 
 
 # =========================================================
@@ -111,21 +99,18 @@ def bm25_text(a: Dict) -> str:
 
 
 def get_bm25():
-    global _bm25
-
-    if _bm25 is None:
+    def build():
         print("🔹 Building BM25 index")
 
-        id_map, assessment_lookup = load_metadata()
+        catalog = get_catalog()
 
         corpus = [
-            bm25_text(assessment_lookup[id_map[str(i)]]).split()
-            for i in range(len(id_map))
+            bm25_text(catalog.materialize(i)).split() for i in range(len(catalog))
         ]
 
-        _bm25 = BM25Okapi(corpus)
+        return BM25Okapi(corpus)
 
-    return _bm25
+    return current_bundle().derived("bm25", build)
 
 
 # =========================================================
@@ -135,6 +120,9 @@ def get_model():
     global _model
 
     if _model is None:
+        # Imported lazily so shard workers never pay for torch
+        from sentence_transformers import SentenceTransformer
+
         print("🔹 Loading SentenceTransformer model")
         _model = SentenceTransformer(MODEL_NAME)
 
@@ -142,39 +130,122 @@ def get_model():
 
 
 # =========================================================
-# SEARCH (PHASE-2 PURE)
+# QUERY ENCODING
 # =========================================================
-def search(query: str) -> List[Dict]:
-    clean_query = preprocess_query(query)
-    if not clean_query:
-        return []
-
-    id_map, _ = load_metadata()
+def encode_query(clean_query: str) -> np.ndarray:
+    """
+    Encode a cleaned query into a (n, dim) float32 matrix.
+    - Short queries: one vector
+    - Long queries (LONG_QUERY_MODE != "off"): token-bounded chunks
+      encoded in one batch, pooled to one vector ("mean" / "max")
+      or kept as several vectors for a multi-vector search ("multi")
+    """
     model = get_model()
-    embeddings = get_embeddings()
-    faiss_index = get_faiss_index()
-    bm25 = get_bm25()
 
-    # ---- Vector Search ----
-    q_vec = model.encode([clean_query], normalize_embeddings=True).astype("float32")
+    chunks = [clean_query]
+    if LONG_QUERY_MODE != "off":
+        # Reserve room for [CLS] / [SEP]
+        max_tokens = model.max_seq_length - 2
+        chunks = split_token_chunks(
+            clean_query, model.tokenizer, max_tokens, MAX_QUERY_CHUNKS
+        )
 
-    vec_scores, vec_ids = faiss_index.search(q_vec, TOP_K_VECTOR)
+    q_vecs = model.encode(chunks, normalize_embeddings=True).astype("float32")
 
-    vector_results = {
-        int(idx): float(score) for idx, score in zip(vec_ids[0], vec_scores[0])
-    }
+    if len(chunks) == 1 or LONG_QUERY_MODE == "multi":
+        return q_vecs
 
-    # ---- BM25 Search ----
-    tokens = clean_query.lower().split()
-    bm25_raw = bm25.get_scores(tokens)
+    if LONG_QUERY_MODE == "max":
+        pooled = q_vecs.max(axis=0)
+    else:
+        pooled = q_vecs.mean(axis=0)
 
-    bm25_max = max(bm25_raw) if max(bm25_raw) > 0 else 1.0
-    bm25_scores = bm25_raw / bm25_max
+    pooled /= max(float(np.linalg.norm(pooled)), 1e-12)
+    return pooled.reshape(1, -1).astype("float32")
 
-    top_bm25_ids = np.argsort(bm25_scores)[::-1][:TOP_K_BM25]
-    bm25_results = {int(idx): float(bm25_scores[idx]) for idx in top_bm25_ids}
 
-    # ---- Hybrid Merge ----
+def collect_vector_hits(
+    vec_scores: np.ndarray, vec_ids: np.ndarray, k: int, offset: int = 0
+) -> Dict[int, float]:
+    """
+    Flatten FAISS results for one or more query vectors.
+    A row hit by several chunk vectors keeps its best score.
+    """
+    hits: Dict[int, float] = {}
+    for scores, ids in zip(vec_scores, vec_ids):
+        for idx, score in zip(ids, scores):
+            if idx < 0:
+                continue
+            row = offset + int(idx)
+            score = float(score)
+            if score > hits.get(row, -np.inf):
+                hits[row] = score
+
+    if len(hits) > k:
+        hits = dict(sorted(hits.items(), key=lambda x: (-x[1], x[0]))[:k])
+
+    return hits
+
+
+# =========================================================
+# SHARDED INDEX (SCATTER-GATHER)
+# =========================================================
+def use_shards() -> bool:
+    """Scatter-gather covers the default catalog; named ones search in-process."""
+    return NUM_SHARDS > 1 and current_bundle().name == DEFAULT_CATALOG
+
+
+def get_sharded_index():
+    """
+    Shards of the active catalog (the default one, see use_shards()).
+    Locked: concurrent requests and stage threads must neither start a
+    second set of workers nor close a set another thread is using.
+    """
+    global _sharded_index
+
+    bundle = current_bundle()
+    with _sharded_lock:
+        if _sharded_index is not None and _sharded_index.broken:
+            # A worker died or hung: restart the whole set rather than reuse pipes
+            print("⚠️ Shard worker lost, restarting index shards")
+            _sharded_index.close()
+            _sharded_index = None
+
+        if _sharded_index is None:
+            from retrieval.shards import ShardedIndex
+
+            print(f"🔹 Starting {NUM_SHARDS} index shards ({SHARD_BACKEND})")
+            _sharded_index = ShardedIndex(
+                NUM_SHARDS, bundle.index_dir, backend=SHARD_BACKEND
+            )
+        elif _sharded_index.index_dir != bundle.index_dir:
+            raise ValueError(
+                f"Index shards serve {_sharded_index.index_dir}, "
+                f"not catalog {bundle.name!r}"
+            )
+
+        return _sharded_index
+
+
+# =========================================================
+# HYBRID MERGE
+# =========================================================
+def top_bm25(bm25_raw: np.ndarray, k: int) -> List[int]:
+    """
+    Indices of the k highest raw BM25 scores.
+    Ties resolve to the higher index so shards can reproduce the order.
+    """
+    order = np.argsort(bm25_raw, kind="stable")[::-1][:k]
+    return [int(i) for i in order]
+
+
+def hybrid_merge(
+    vector_results: Dict[int, float], bm25_results: Dict[int, float]
+) -> List[Tuple[int, float]]:
+    """
+    Weighted fusion of cosine and max-normalized BM25 scores.
+    Ties are broken by row index so the output is deterministic.
+    """
     all_ids = set(vector_results) | set(bm25_results)
     merged = []
 
@@ -184,21 +255,190 @@ def search(query: str) -> List[Dict]:
         ) + BM25_WEIGHT * bm25_results.get(idx, 0.0)
         merged.append((idx, score))
 
-    merged.sort(key=lambda x: x[1], reverse=True)
+    merged.sort(key=lambda x: (-x[1], x[0]))
+    return merged
 
-    # ---- Phase-2 Output ----
-    results = []
-    for idx, score in merged[:TOP_K]:
-        results.append(
-            {
-                "assessment_id": id_map[str(idx)],
-                "score": round(score, 4),
-            }
-        )
+
+# =========================================================
+# SEARCH STAGES (INDEPENDENT, CAN RUN CONCURRENTLY)
+# =========================================================
+def query_tokens(clean_query: str) -> List[str]:
+    return clean_query.lower().split()
+
+
+def vector_search(q_vec: np.ndarray) -> Dict[int, float]:
+    vec_scores, vec_ids = get_faiss_index().search(q_vec, TOP_K_VECTOR)
+    return collect_vector_hits(vec_scores, vec_ids, TOP_K_VECTOR)
+
+
+def vector_search_batch(q_vecs: List[np.ndarray]) -> List[Dict[int, float]]:
+    """vector_search() for many queries with a single FAISS call."""
+    if not q_vecs:
+        return []
+    vec_scores, vec_ids = get_faiss_index().search(np.vstack(q_vecs), TOP_K_VECTOR)
+    bounds = np.cumsum([0] + [len(v) for v in q_vecs])
+    return [
+        collect_vector_hits(vec_scores[lo:hi], vec_ids[lo:hi], TOP_K_VECTOR)
+        for lo, hi in zip(bounds[:-1], bounds[1:])
+    ]
+
+
+def bm25_search(tokens: List[str]) -> Dict[int, float]:
+    bm25_raw = get_bm25().get_scores(tokens)
+
+    bm25_max = max(bm25_raw) if max(bm25_raw) > 0 else 1.0
+    bm25_scores = bm25_raw / bm25_max
+
+    return {idx: float(bm25_scores[idx]) for idx in top_bm25(bm25_raw, TOP_K_BM25)}
+
+
+def sharded_search(
+    q_vec: np.ndarray, tokens: List[str]
+) -> Tuple[Dict[int, float], Dict[int, float]]:
+    return get_sharded_index().search(q_vec, tokens, TOP_K_VECTOR, TOP_K_BM25)
+
+
+def fuse_candidates(
+    vector_results: Dict[int, float], bm25_results: Dict[int, float]
+) -> Candidates:
+    """Hybrid merge as a compact pool: top TOP_K rows + score arrays."""
+    merged = hybrid_merge(vector_results, bm25_results)[:TOP_K]
+    rows = [idx for idx, _ in merged]
+
+    def rounded(values) -> np.ndarray:
+        return np.array([round(v, 4) for v in values], dtype="float64")
+
+    return Candidates(
+        np.array(rows, dtype="int64"),
+        retrieval_score=rounded(score for _, score in merged),
+        # Components of the fused score (explain mode)
+        vector_score=rounded(vector_results.get(idx, 0.0) for idx in rows),
+        bm25_score=rounded(bm25_results.get(idx, 0.0) for idx in rows),
+    )
+
+
+def fuse(
+    vector_results: Dict[int, float], bm25_results: Dict[int, float]
+) -> List[Dict]:
+    """Hybrid merge + Phase-2 output (rows stay integer positions)."""
+    catalog = get_catalog()
+    pool = fuse_candidates(vector_results, bm25_results)
+
+    return [
+        {
+            "row": int(row),
+            "assessment_id": catalog.assessment_id(int(row)),
+            "score": float(pool.retrieval_score[i]),
+            "vector_score": float(pool.vector_score[i]),
+            "bm25_score": float(pool.bm25_score[i]),
+        }
+        for i, row in enumerate(pool.rows)
+    ]
+
+
+# =========================================================
+# SEARCH (PHASE-2 PURE)
+# =========================================================
+def search(query: str, catalog: str = None) -> List[Dict]:
+    """catalog: named catalog to search (default: the active one)."""
+    if catalog is not None:
+        with use_catalog(catalog):
+            return search(query)
+
+    clean_query = preprocess_query(query)
+    if not clean_query:
+        return []
+
+    q_vec = encode_query(clean_query)
+    tokens = query_tokens(clean_query)
+
+    if use_shards():
+        # ---- Fan out to shards, merge globally ----
+        vector_results, bm25_results = sharded_search(q_vec, tokens)
+    else:
+        # ---- Vector Search ----
+        vector_results = vector_search(q_vec)
+
+        # ---- BM25 Search ----
+        bm25_results = bm25_search(tokens)
+
+    # ---- Hybrid Merge ----
+    return fuse(vector_results, bm25_results)
+
+
+# =========================================================
+# BATCH SEARCH (EVAL / OFFLINE WORKLOADS)
+# =========================================================
+def encode_queries(clean_queries: List[str]) -> List[np.ndarray]:
+    """One batched encode for many queries (chunked per query in long mode)."""
+    if LONG_QUERY_MODE != "off":
+        return [encode_query(q) for q in clean_queries]
+
+    if not clean_queries:
+        return []
+
+    vecs = get_model().encode(clean_queries, normalize_embeddings=True)
+    vecs = np.asarray(vecs, dtype="float32")
+    return [vecs[i : i + 1] for i in range(len(vecs))]
+
+
+def search_hits_batch(
+    q_vecs: List[np.ndarray], tokens: List[List[str]]
+) -> List[Tuple[Dict[int, float], Dict[int, float]]]:
+    """(vector, BM25) hits per query; one FAISS call unless sharded."""
+    if use_shards():
+        return [sharded_search(v, t) for v, t in zip(q_vecs, tokens)]
+    return list(zip(vector_search_batch(q_vecs), map(bm25_search, tokens)))
+
+
+def search_batch(queries: List[str], catalog: str = None) -> List[List[Dict]]:
+    """search() for many queries with a single encode pass and FAISS call."""
+    if catalog is not None:
+        with use_catalog(catalog):
+            return search_batch(queries)
+
+    clean = [preprocess_query(q) for q in queries]
+    todo = [i for i, c in enumerate(clean) if c]
+    q_vecs = encode_queries([clean[i] for i in todo])
+
+    results: List[List[Dict]] = [[] for _ in queries]
+    hits = search_hits_batch(q_vecs, [query_tokens(clean[i]) for i in todo])
+    for i, (vector_results, bm25_results) in zip(todo, hits):
+        results[i] = fuse(vector_results, bm25_results)
 
     return results
 
 
+# =========================================================
+# INDEX VERSION (CACHE KEYS)
+# =========================================================
+def get_index_version() -> str:
+    """
+    Short hash of everything that changes search() output:
+    index artifacts, catalog content and retrieval config.
+    """
+    h = hashlib.sha256()
+    meta_file = current_bundle().meta_file
+    if meta_file.exists():
+        h.update(meta_file.read_bytes())
+    h.update(get_catalog().content_hash.encode("utf-8"))
+    h.update(
+        repr(
+            (
+                MODEL_NAME,
+                TOP_K,
+                TOP_K_VECTOR,
+                TOP_K_BM25,
+                VECTOR_WEIGHT,
+                BM25_WEIGHT,
+                LONG_QUERY_MODE,
+                MAX_QUERY_CHUNKS,
+            )
+        ).encode("utf-8")
+    )
+    return h.hexdigest()[:16]
+
+
 # =========================================================
 # MANUAL SMOKE TEST
 # =========================================================
@@ -0,0 +1,341 @@
+import os
+import math
+import time
+import threading
+import multiprocessing as mp
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+import faiss
+from rank_bm25 import BM25Okapi
+
+
+# =========================================================
+# CONFIG
+# =========================================================
+# Worker start-up builds FAISS + BM25 for its slice; queries answer fast
+START_TIMEOUT_S = float(os.getenv("SHL_SHARD_START_TIMEOUT_S", "300"))
+REPLY_TIMEOUT_S = float(os.getenv("SHL_SHARD_REPLY_TIMEOUT_S", "30"))
+POLL_INTERVAL_S = 0.5
+
+
+# =========================================================
+# SHARD (ONE SLICE OF THE CATALOG)
+# =========================================================
+class Shard:
+    """
+    Contiguous slice [start, stop) of one catalog's index directory with
+    its own FAISS and BM25 index. Row ids returned are GLOBAL.
+    """
+
+    def __init__(self, start: int, stop: int, index_dir: Path):
+        from retrieval.catalog import CatalogStore
+        from retrieval.search import bm25_text
+
+        self.start = start
+        self.stop = stop
+
+        # Only this shard's rows are materialized in memory
+        embeddings = np.load(Path(index_dir) / "embeddings.npy", mmap_mode="r")
+        vectors = np.ascontiguousarray(embeddings[start:stop], dtype="float32")
+
+        self.faiss_index = faiss.IndexFlatIP(vectors.shape[1])
+        self.faiss_index.add(vectors)
+
+        catalog = CatalogStore(Path(index_dir) / "catalog")
+        corpus = [bm25_text(catalog.materialize(i)).split() for i in range(start, stop)]
+        self.bm25 = BM25Okapi(corpus)
+
+    def corpus_stats(self) -> Tuple[Dict[str, int], int, int]:
+        """Document frequencies, total token count and doc count."""
+        nd = Counter(word for doc in self.bm25.doc_freqs for word in doc)
+        return dict(nd), int(sum(self.bm25.doc_len)), self.bm25.corpus_size
+
+    def set_global_stats(self, idf: Dict[str, float], avgdl: float) -> None:
+        """Score with corpus-wide statistics so shards agree with one big index."""
+        self.bm25.idf = idf
+        self.bm25.avgdl = avgdl
+
+    def search(self, q_vec: np.ndarray, tokens: List[str], k_vec: int, k_bm25: int):
+        from retrieval.search import collect_vector_hits, top_bm25
+
+        vec_scores, vec_ids = self.faiss_index.search(q_vec, k_vec)
+        vector_hits = list(
+            collect_vector_hits(vec_scores, vec_ids, k_vec, self.start).items()
+        )
+
+        bm25_raw = self.bm25.get_scores(tokens)
+        bm25_hits = [
+            (self.start + idx, float(bm25_raw[idx]))
+            for idx in top_bm25(bm25_raw, k_bm25)
+        ]
+        bm25_max = float(max(bm25_raw)) if len(bm25_raw) else 0.0
+
+        return vector_hits, bm25_hits, bm25_max
+
+
+# =========================================================
+# GLOBAL BM25 STATISTICS
+# =========================================================
+def global_bm25_stats(stats, epsilon: float = 0.25) -> Tuple[Dict[str, float], float]:
+    """
+    Merge per-shard (nd, total_len, n_docs) into the idf / avgdl that
+    BM25Okapi would have computed over the full corpus.
+    """
+    nd = Counter()
+    total_len = 0
+    corpus_size = 0
+    for shard_nd, shard_len, shard_docs in stats:
+        nd.update(shard_nd)
+        total_len += shard_len
+        corpus_size += shard_docs
+
+    # Same formula as BM25Okapi._calc_idf
+    idf = {}
+    idf_sum = 0.0
+    negative_idfs = []
+    for word, freq in nd.items():
+        value = math.log(corpus_size - freq + 0.5) - math.log(freq + 0.5)
+        idf[word] = value
+        idf_sum += value
+        if value < 0:
+            negative_idfs.append(word)
+
+    eps = epsilon * (idf_sum / len(idf)) if idf else 0.0
+    for word in negative_idfs:
+        idf[word] = eps
+
+    return idf, total_len / corpus_size
+
+
+# =========================================================
+# WORKER PROCESS (SIMPLE PIPE RPC)
+# =========================================================
+def _shard_worker(conn, start: int, stop: int, index_dir: Path) -> None:
+    try:
+        shard = Shard(start, stop, index_dir)
+    except Exception as e:
+        conn.send(("error", repr(e)))
+        conn.close()
+        return
+    conn.send(("ready", None))
+
+    while True:
+        cmd, payload = conn.recv()
+        try:
+            if cmd == "stats":
+                conn.send(("ok", shard.corpus_stats()))
+            elif cmd == "set_stats":
+                shard.set_global_stats(*payload)
+                conn.send(("ok", None))
+            elif cmd == "search":
+                conn.send(("ok", shard.search(*payload)))
+            elif cmd == "close":
+                conn.send(("ok", None))
+                break
+        except Exception as e:
+            conn.send(("error", repr(e)))
+
+    conn.close()
+
+
+class _RemoteShard:
+    """
+    Proxy with the same surface as Shard, backed by a worker process.
+    A worker that exits or stops answering marks the proxy dead: its pipe
+    can no longer be trusted to pair requests with replies.
+    """
+
+    def __init__(self, ctx, start: int, stop: int, index_dir: Path):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_shard_worker,
+            args=(child_conn, start, stop, index_dir),
+            daemon=True,
+        )
+        self.process.start()
+        # Only the worker holds the child end, so its exit shows up as EOF
+        child_conn.close()
+        self.dead = False
+        try:
+            self._recv(START_TIMEOUT_S)
+        except Exception:
+            self.process.kill()
+            raise
+
+    def _read(self, timeout: float = REPLY_TIMEOUT_S):
+        """(status, payload); ("error", ...) when the worker is gone or hung."""
+        deadline = time.monotonic() + timeout
+        try:
+            while not self.conn.poll(POLL_INTERVAL_S):
+                if not self.process.is_alive() and not self.conn.poll():
+                    raise EOFError
+                if time.monotonic() > deadline:
+                    self.dead = True
+                    return "error", f"no reply within {timeout:.0f}s"
+            return self.conn.recv()
+        except (EOFError, OSError):
+            self.dead = True
+            self.process.join(timeout=POLL_INTERVAL_S)
+            return "error", f"worker exited (code {self.process.exitcode})"
+
+    def _recv(self, timeout: float = REPLY_TIMEOUT_S):
+        status, payload = self._read(timeout)
+        if status == "error":
+            raise RuntimeError(f"Shard worker failed: {payload}")
+        return payload
+
+    def send(self, cmd: str, payload=None) -> None:
+        try:
+            self.conn.send((cmd, payload))
+        except OSError as e:
+            self.dead = True
+            raise RuntimeError(f"Shard worker failed: {e!r}") from e
+
+    def call(self, cmd: str, payload=None):
+        self.send(cmd, payload)
+        return self._recv()
+
+    def corpus_stats(self):
+        return self.call("stats")
+
+    def set_global_stats(self, idf, avgdl):
+        return self.call("set_stats", (idf, avgdl))
+
+    def search(self, q_vec, tokens, k_vec, k_bm25):
+        return self.call("search", (q_vec, tokens, k_vec, k_bm25))
+
+    def close(self):
+        try:
+            if not self.dead:
+                self.call("close")
+        finally:
+            self.process.join(timeout=5)
+            if self.process.is_alive():
+                self.process.kill()
+
+
+# =========================================================
+# SCATTER-GATHER COORDINATOR
+# =========================================================
+class ShardedIndex:
+    """
+    Fans a query out to N shards and merges their top-k into the
+    same (vector_results, bm25_results) the single index produces.
+    Shards load the embeddings and catalog of `index_dir` (one bundle's
+    directory), not the module-level default.
+    """
+
+    def __init__(self, num_shards: int, index_dir: Path, backend: str = "process"):
+        from retrieval.catalog import CatalogStore
+
+        self.index_dir = Path(index_dir)
+        num_rows = len(CatalogStore(self.index_dir / "catalog"))
+        bounds = np.array_split(np.arange(num_rows), num_shards)
+        ranges = [(int(b[0]), int(b[-1]) + 1) for b in bounds if len(b)]
+
+        self.backend = backend
+        self.shards = []
+        # Worker pipes carry one request at a time
+        self._lock = threading.Lock()
+        if backend == "process":
+            ctx = mp.get_context("spawn")
+            try:
+                for start, stop in ranges:
+                    self.shards.append(_RemoteShard(ctx, start, stop, self.index_dir))
+            except Exception:
+                self.close()
+                raise
+        elif backend == "local":
+            self.shards = [Shard(start, stop, self.index_dir) for start, stop in ranges]
+        else:
+            raise ValueError(f"Unknown shard backend: {backend}")
+
+        self._pool = ThreadPoolExecutor(max_workers=len(self.shards))
+
+        idf, avgdl = global_bm25_stats(self._map(lambda s: s.corpus_stats()))
+        self._map(lambda s: s.set_global_stats(idf, avgdl))
+
+    def _map(self, fn) -> list:
+        return list(self._pool.map(fn, self.shards))
+
+    def search(
+        self, q_vec: np.ndarray, tokens: List[str], k_vec: int, k_bm25: int
+    ) -> Tuple[Dict[int, float], Dict[int, float]]:
+        if self.backend == "process":
+            # Scatter first, then gather: workers run concurrently
+            with self._lock:
+                if self.broken:
+                    raise RuntimeError("Sharded index is broken: rebuild it")
+                results, sent = [], []
+                for shard in self.shards:
+                    try:
+                        shard.send("search", (q_vec, tokens, k_vec, k_bm25))
+                        sent.append(shard)
+                    except RuntimeError as e:
+                        results.append(("error", repr(e.__cause__)))
+                # Drain every pipe before raising, so no stale reply is left
+                # behind to answer the next query
+                results += [shard._read() for shard in sent]
+            errors = [payload for status, payload in results if status == "error"]
+            if errors:
+                raise RuntimeError(f"Shard worker failed: {errors[0]}")
+            replies = [payload for _, payload in results]
+        else:
+            replies = self._map(lambda s: s.search(q_vec, tokens, k_vec, k_bm25))
+
+        vector_hits = [hit for reply in replies for hit in reply[0]]
+        bm25_hits = [hit for reply in replies for hit in reply[1]]
+        bm25_max = max(reply[2] for reply in replies)
+
+        # ---- Global top-k (same ordering as the unsharded index) ----
+        # Equal scores resolve to the lower row, whatever the shard layout
+        vector_hits.sort(key=lambda x: (-x[1], x[0]))
+        vector_results = dict(vector_hits[:k_vec])
+
+        bm25_hits.sort(key=lambda x: (x[1], x[0]), reverse=True)
+        bm25_norm = bm25_max if bm25_max > 0 else 1.0
+        bm25_results = {idx: raw / bm25_norm for idx, raw in bm25_hits[:k_bm25]}
+
+        return vector_results, bm25_results
+
+    @property
+    def broken(self) -> bool:
+        """A worker died or hung: the index must be rebuilt."""
+        return any(getattr(shard, "dead", False) for shard in self.shards)
+
+    def close(self) -> None:
+        # Waits for a search in flight on the worker pipes
+        with self._lock:
+            if self.backend == "process":
+                for shard in self.shards:
+                    try:
+                        shard.close()
+                    except Exception:
+                        pass
+        if hasattr(self, "_pool"):
+            self._pool.shutdown(wait=False)
+
+
+# =========================================================
+# MANUAL PARITY CHECK
+# =========================================================
+if __name__ == "__main__":
+    import sys
+
+    from retrieval import search as s
+
+    shards = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    q = "I need a test for .NET 4.5 developer"
+
+    single = s.search(q)
+
+    s.NUM_SHARDS = shards
+    sharded = s.search(q)
+    s.get_sharded_index().close()
+
+    same = [a["assessment_id"] for a in single] == [b["assessment_id"] for b in sharded]
+    print(f"🔹 {shards} shards, identical ranking: {same}")
@@ -0,0 +1,314 @@
+import os
+import sys
+import time
+import queue
+import argparse
+import threading
+from pathlib import Path
+from typing import Dict, List
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+
+from retrieval.embed import (
+    BATCH_SIZE,
+    INDEX_DIR,
+    MODEL_NAME,
+    VECTOR_DIM,
+    build_embedding_text,
+    load_model,
+    warm_new_index,
+    write_index_artifacts,
+)
+
+# ingestion/ modules import each other by bare name
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR / "ingestion"))
+
+from async_crawl import crawl_shl_assessments_async
+from clean import clean_records
+from crawl import BASE_CATALOG_URL, crawl_shl_assessments
+from http_cache import HttpCache
+from ingest import JsonArrayWriter
+from validate import AssessmentValidator
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+PROCESSED_DIR = BASE_DIR / "data" / "processed"
+RAW_JSON = BASE_DIR / "data" / "raw" / "shl_assessments_raw.json"
+
+# Records buffered between stages: a slow stage blocks the one before it
+QUEUE_SIZE = int(os.getenv("SHL_STREAM_QUEUE", "64"))
+
+_DONE = object()
+
+
+# ============================================================
+# STAGES
+# ============================================================
+class Stage(threading.Thread):
+    """
+    One pipeline stage on its own thread. The stage always ends its
+    output queue with _DONE (also on failure); errors re-raise in join().
+    """
+
+    def __init__(self, name: str, target, out_q: queue.Queue, *args):
+        super().__init__(name=name, daemon=True)
+        self.target = target
+        self.out_q = out_q
+        self.args = args
+        self.error = None
+
+    def run(self) -> None:
+        try:
+            self.target(*self.args)
+        except BaseException as e:
+            self.error = e
+        finally:
+            self.out_q.put(_DONE)
+
+    def join(self, timeout=None) -> None:
+        super().join(timeout)
+        if self.error is not None:
+            raise RuntimeError(f"{self.name} stage failed") from self.error
+
+
+def drain(in_q: queue.Queue):
+    while (item := in_q.get()) is not _DONE:
+        yield item
+
+
+def crawl_stage(out_q: queue.Queue, args) -> None:
+    if args.serial:
+        crawl_shl_assessments(on_record=out_q.put)
+        return
+
+    crawl_kwargs = {}
+    if args.base_url:
+        crawl_kwargs["base_url"] = args.base_url
+        catalog_path = urlsplit(BASE_CATALOG_URL).path
+        crawl_kwargs["catalog_url"] = args.base_url.rstrip("/") + catalog_path
+    crawl_shl_assessments_async(
+        cache=HttpCache() if args.incremental else None,
+        on_record=out_q.put,
+        **crawl_kwargs,
+    )
+
+
+def process_stage(
+    in_q: queue.Queue,
+    out_q: queue.Queue,
+    raw_f,
+    proc_f,
+    validator: AssessmentValidator,
+    records: List[Dict],
+) -> None:
+    """
+    clean_records -> stable ID -> validate, one record at a time.
+
+    Cleaned records are also kept in `records`: the id map, catalog store
+    and parquet are written from the full list at the end, so this part of
+    memory grows linearly with the catalog (crawl and embedding stay bounded).
+    """
+    raw_out, proc_out = JsonArrayWriter(raw_f), JsonArrayWriter(proc_f)
+    for record in drain(in_q):
+        raw_out.write(record)
+        try:
+            item = clean_records([record])[0]
+        except Exception as e:
+            print(f"⚠️ Warning: Cleaning failed for {record.get('url')}: {e}")
+            item = dict(record)
+
+        # IDs follow stream order, so rows come out in assessment_id order
+        item["assessment_id"] = f"shl_{len(records):05d}"
+        validator.check(item)
+        proc_out.write(item)
+        records.append(item)
+        out_q.put(item)
+    raw_out.close()
+    proc_out.close()
+
+
+# ============================================================
+# EMBEDDING SINK
+# ============================================================
+class EmbeddingWriter:
+    """
+    Appends normalized float32 rows to a flat file as batches arrive;
+    finalize() turns it into embeddings.npy (row count unknown up front).
+    """
+
+    def __init__(self, path: Path, dim: int = VECTOR_DIM):
+        self.path = path
+        self.dim = dim
+        self.rows = 0
+        self.file = open(path, "wb")
+
+    def append(self, vectors: np.ndarray) -> None:
+        vectors = np.ascontiguousarray(vectors, dtype="float32")
+        assert vectors.shape[1] == self.dim, "Unexpected embedding dimension"
+        self.file.write(vectors.tobytes())
+        self.rows += vectors.shape[0]
+
+    def finalize(self, npy_path: Path) -> np.ndarray:
+        self.file.close()
+        shape = (self.rows, self.dim)
+        out = np.lib.format.open_memmap(npy_path, "w+", "float32", shape)
+        if self.rows:
+            out[:] = np.memmap(self.path, dtype="float32", mode="r", shape=shape)
+        out.flush()
+        os.remove(self.path)
+        return out
+
+
+def random_encoder(seed: int):
+    rng = np.random.default_rng(seed)
+
+    def encode(texts: List[str]) -> np.ndarray:
+        block = rng.standard_normal((len(texts), VECTOR_DIM), dtype="float32")
+        return block / np.linalg.norm(block, axis=1, keepdims=True)
+
+    return encode
+
+
+def model_encoder():
+    model = load_model()
+
+    def encode(texts: List[str]) -> np.ndarray:
+        return model.encode(texts, batch_size=BATCH_SIZE, normalize_embeddings=True)
+
+    return encode
+
+
+# ============================================================
+# MAIN
+# ============================================================
+def main():
+    parser = argparse.ArgumentParser(
+        description="Streaming crawl -> clean -> validate -> embed index build"
+    )
+    parser.add_argument("--serial", action="store_true", help="serial crawler")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="conditional requests against the HTTP cache (async crawler)",
+    )
+    parser.add_argument(
+        "--base-url", default=None, help="crawl another host (e.g. a fixture)"
+    )
+    parser.add_argument("--processed-dir", type=Path, default=PROCESSED_DIR)
+    parser.add_argument("--raw-json", type=Path, default=RAW_JSON)
+    parser.add_argument("--index-dir", type=Path, default=INDEX_DIR)
+    parser.add_argument(
+        "--random-vectors",
+        action="store_true",
+        help="random unit vectors instead of the model (benchmarks only)",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--no-warm",
+        action="store_true",
+        help="skip precomputing popular query results (api/warm_cache.py)",
+    )
+    args = parser.parse_args()
+
+    proc_json = args.processed_dir / "shl_assessments.json"
+    parquet_path = args.processed_dir / "shl_assessments.parquet"
+    index_dir = args.index_dir
+    for directory in (args.processed_dir, args.raw_json.parent, index_dir):
+        directory.mkdir(parents=True, exist_ok=True)
+
+    print("🔹 Streaming ingestion -> index pipeline")
+    start = time.perf_counter()
+
+    # Outputs are written to .tmp files and only swapped in at the end,
+    # so a failed crawl never replaces the previous data
+    raw_tmp = args.raw_json.with_suffix(".json.tmp")
+    proc_tmp = proc_json.with_suffix(".json.tmp")
+    crawled_q = queue.Queue(QUEUE_SIZE)
+    cleaned_q = queue.Queue(QUEUE_SIZE)
+    validator = AssessmentValidator()
+    records: List[Dict] = []
+
+    with open(raw_tmp, "w", encoding="utf-8") as raw_f, open(
+        proc_tmp, "w", encoding="utf-8"
+    ) as proc_f:
+        crawler = Stage("crawl", crawl_stage, crawled_q, crawled_q, args)
+        processor = Stage(
+            "process",
+            process_stage,
+            cleaned_q,
+            crawled_q,
+            cleaned_q,
+            raw_f,
+            proc_f,
+            validator,
+            records,
+        )
+        crawler.start()
+        processor.start()
+
+        # The model loads while the first pages are being crawled
+        if args.random_vectors:
+            model_name, encode = "random-unit-vectors", random_encoder(args.seed)
+        else:
+            model_name, encode = MODEL_NAME, model_encoder()
+
+        writer = EmbeddingWriter(index_dir / "embeddings.f32.tmp")
+        batch: List[str] = []
+        first_batch_at = None
+        for item in drain(cleaned_q):
+            batch.append(build_embedding_text(item))
+            if len(batch) == BATCH_SIZE:
+                writer.append(encode(batch))
+                batch = []
+                first_batch_at = first_batch_at or time.perf_counter() - start
+        if batch:
+            writer.append(encode(batch))
+
+        # The processor drains the crawl queue, so join it first
+        processor.join()
+        crawler.join()
+
+    if not records:
+        print("❌ CRITICAL: No records captured. Previous outputs kept.")
+        for path in (raw_tmp, proc_tmp, writer.path):
+            path.unlink(missing_ok=True)
+        return
+
+    # --------------------------------------------------------
+    # Finalize: swap in the data files, then the index artifacts
+    # --------------------------------------------------------
+    os.replace(raw_tmp, args.raw_json)
+    os.replace(proc_tmp, proc_json)
+    print(f" -> Saved: {args.raw_json}")
+    print(f" -> Saved: {proc_json}")
+
+    try:
+        pd.DataFrame(records).to_parquet(parquet_path, index=False)
+        print(f" -> Saved: {parquet_path}")
+    except Exception as e:
+        print(f"⚠️ Could not save Parquet: {e}")
+
+    print(f"\n--- Validation for {validator.total_count} items ---")
+    validator.report()
+
+    embeddings = writer.finalize(index_dir / "embeddings.npy")
+    write_index_artifacts(index_dir, records, embeddings, model_name, proc_json)
+
+    if not (args.random_vectors or args.no_warm):
+        warm_new_index(index_dir)
+
+    elapsed = time.perf_counter() - start
+    if first_batch_at is not None:
+        print(f"🔹 First embedding batch after {first_batch_at:.1f}s")
+    print(f"✅ Servable index in {elapsed:.1f}s")
+    print(f"📦 vectors: {embeddings.shape}")
+    print(f"📁 saved in: {index_dir}")
+
+
+if __name__ == "__main__":
+    main()
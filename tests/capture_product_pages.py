@@ -0,0 +1,93 @@
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+from urllib.parse import urlsplit
+
+# =========================================================
+# ADD PROJECT ROOT
+# =========================================================
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT))
+# ingestion/ modules import each other by bare name
+sys.path.append(str(PROJECT_ROOT / "ingestion"))
+
+from async_crawl import crawl_shl_assessments_async
+from http_cache import DEFAULT_CACHE_DIR, HttpCache
+
+
+# =========================================================
+# CONFIG
+# =========================================================
+PAGES_DIR = PROJECT_ROOT / "tests" / "fixtures" / "product_pages"
+URLS_FILE = "urls.json"
+
+NUM_PAGES = 40
+
+
+def page_name(url: str) -> str:
+    slug = urlsplit(url).path.rstrip("/").rsplit("/", 1)[-1]
+    return re.sub(r"[^A-Za-z0-9_-]+", "-", slug) + ".html"
+
+
+def capture(cache_dir: Path, out_dir: Path, num_pages: int) -> int:
+    """
+    Copy real product pages saved by an --incremental crawl into the
+    parity fixture set, spread evenly over the catalog (by URL).
+    """
+    cache = HttpCache(cache_dir)
+    entries = sorted(
+        (e for e in cache.entries() if e.get("record")), key=lambda e: e["url"]
+    )
+    step = max(1, len(entries) // num_pages)
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    urls_path = out_dir / URLS_FILE
+    urls = {}
+    if urls_path.exists():
+        with open(urls_path, "r", encoding="utf-8") as f:
+            urls = json.load(f)
+
+    for entry in entries[::step][:num_pages]:
+        html = cache.html(entry["url"])
+        if html is None:
+            continue
+        name = page_name(entry["url"])
+        with open(out_dir / name, "w", encoding="utf-8") as f:
+            f.write(html)
+        urls[name] = entry["url"]
+
+    with open(urls_path, "w", encoding="utf-8") as f:
+        json.dump(dict(sorted(urls.items())), f, indent=2)
+        f.write("\n")
+    return len(urls)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Save real SHL product pages for tests/test_extract_parity.py"
+    )
+    parser.add_argument("--cache-dir", type=Path, default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--out-dir", type=Path, default=PAGES_DIR)
+    parser.add_argument("--pages", type=int, default=NUM_PAGES)
+    parser.add_argument(
+        "--crawl-pages",
+        type=int,
+        default=0,
+        help="first crawl this many catalog listing pages into the cache "
+        "(polite async crawl; needs network access to shl.com)",
+    )
+    args = parser.parse_args()
+
+    if args.crawl_pages:
+        crawl_shl_assessments_async(
+            cache=HttpCache(args.cache_dir), max_pages=args.crawl_pages
+        )
+
+    total = capture(args.cache_dir, args.out_dir, args.pages)
+    print(f"✅ {total} captured pages in {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+import sys
+from pathlib import Path
+
+# =========================================================
+# ADD PROJECT ROOT
+# =========================================================
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT))
+# ingestion/ modules import each other by bare name
+sys.path.append(str(PROJECT_ROOT / "ingestion"))
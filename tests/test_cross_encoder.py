@@ -0,0 +1,22 @@
+import numpy as np
+
+from reranking.cross_encoder import blend_retrieval_scores
+
+
+def test_unscored_candidates_keep_retrieval_score():
+    retrieval = np.array([0.9, 0.8, 0.7, 0.6, 0.5])
+    probs = np.array([0.1, 0.9, np.nan, np.nan, np.nan])
+
+    blended = blend_retrieval_scores(retrieval, probs)
+
+    assert blended[2:].tolist() == retrieval[2:].tolist()
+    # The cross-encoder reorders the scored rows...
+    assert blended[1] > blended[0]
+    # ...inside their own retrieval range, above every unscored row
+    assert blended[:2].min() >= 0.8 and blended[:2].max() <= 0.9
+
+
+def test_no_scored_candidates_is_identity():
+    retrieval = np.array([0.4, 0.3])
+    blended = blend_retrieval_scores(retrieval, np.full(2, np.nan))
+    assert blended.tolist() == retrieval.tolist()
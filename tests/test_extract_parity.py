@@ -0,0 +1,134 @@
+import json
+from pathlib import Path
+
+import pytest
+from bs4 import BeautifulSoup
+
+from common.crawl_fixtures import product_html
+from crawl import parse_test_details
+from fast_extract import parse_test_details_html
+
+
+# =========================================================
+# CONFIG
+# =========================================================
+# Real product pages (tests/capture_product_pages.py) and their URLs
+PAGES_DIR = Path(__file__).resolve().parent / "fixtures" / "product_pages"
+URLS_FILE = PAGES_DIR / "urls.json"
+
+NUM_FIXTURES = 24
+FIELDS = [
+    "name",
+    "url",
+    "adaptive_support",
+    "description",
+    "duration",
+    "remote_support",
+    "test_type",
+]
+
+# Markup variants the field rules have to agree on (fragments: unscoped)
+EDGE_CASES = {
+    "no h1": "<html><body><h4>Description</h4><p>x</p></body></html>",
+    "empty": "   ",
+    "rich-text fallback": """<html><body><h1>Fallback <b>Test</b></h1>
+<div class="intro rich-text"><p>First  para.</p><script>var x = 1;</script>
+<p>Second &amp; last.</p></div></body></html>""",
+    "nested h4 string": """<html><body><h1>Nested</h1>
+<h4><span>Description</span></h4><div><p>Inside <em>the</em> div</p></div>
+<h4>Assessment length</h4><p>No digits here</p></body></html>""",
+    "h4 with two children": """<html><body><h1>Two</h1>
+<h4>Descr<b>iption</b></h4><p>skipped</p>
+<div class="rich-text">used instead</div></body></html>""",
+    "remote in grandparent": """<html><body><h1>Remote</h1>
+<div><p><span>Remote Testing:</span></p><span class="catalogue__circle -yes">
+</span></div></body></html>""",
+    "remote label in comment": """<html><body><h1>Comment</h1>
+<div><!-- Remote Testing --><span class="x -yes"></span></div></body></html>""",
+    "remote without badge": """<html><body><h1>No badge</h1>
+<p>Remote Testing: <span class="catalogue__circle -no"></span></p></body></html>""",
+    "test type duplicates": """<html><body><h1>Types</h1>
+<p>Test Type: <span class="product-catalogue__key">K</span>
+<span class="product-catalogue__key">K</span>
+<span class="product-catalogue__key other">P</span>
+<span class="product-catalogue__keys">X</span></p></body></html>""",
+    "test type label in span": """<html><body><h1>Span label</h1>
+<p><span>Test Type:</span> <span class="product-catalogue__key">A</span></p>
+</body></html>""",
+    "test type outside p": """<html><body><h1>Div label</h1>
+<div>Test Type: <span class="product-catalogue__key">S</span></div>
+</body></html>""",
+    "duration in nested tag": """<html><body><h1>Length</h1>
+<h4>Assessment length</h4><p>Approx <b>= 35</b> minutes, max 40</p>
+</body></html>""",
+}
+
+
+# =========================================================
+# HELPERS
+# =========================================================
+def comparable(record):
+    if record is None:
+        return None
+    # test_type comes out of a set: order is not part of the contract
+    return {**record, "test_type": sorted(record["test_type"])}
+
+
+def assert_parity(html: str, url: str, scoped: bool) -> None:
+    expected = comparable(parse_test_details(BeautifulSoup(html, "html.parser"), url))
+    got = comparable(parse_test_details_html(html, url, scoped=scoped))
+
+    if expected is None or got is None:
+        assert got == expected
+        return
+    mismatches = {
+        field: (got[field], expected[field])
+        for field in FIELDS
+        if got[field] != expected[field]
+    }
+    assert not mismatches, f"lxml != bs4 (got, expected): {mismatches}"
+
+
+def captured_pages():
+    if not URLS_FILE.exists():
+        return []
+    with open(URLS_FILE, "r", encoding="utf-8") as f:
+        urls = json.load(f)
+    return sorted(urls.items())
+
+
+# =========================================================
+# TESTS
+# =========================================================
+@pytest.mark.parametrize("name", sorted(EDGE_CASES))
+def test_edge_cases(name):
+    assert_parity(EDGE_CASES[name], f"https://edge/{name}/", scoped=False)
+
+
+@pytest.mark.parametrize("i", range(NUM_FIXTURES))
+@pytest.mark.parametrize("scoped", [False, True])
+def test_fixture_pages(i, scoped):
+    url = f"https://fixture/view/fixture-{i}/"
+    assert_parity(product_html(i, i % 2), url, scoped)
+
+
+def test_footer_inside_product_body():
+    # A <footer> in the product body must not cut off the fields after it
+    html = product_html(7).replace(
+        "<h4>Job levels</h4>",
+        "<blockquote>Great test.<footer>Hiring manager</footer></blockquote>"
+        "<h4>Job levels</h4>",
+    )
+    assert_parity(html, "https://fixture/view/fixture-7/", scoped=True)
+    assert parse_test_details_html(html, "u")["remote_support"] == "Yes"
+
+
+@pytest.mark.parametrize("name, url", captured_pages() or [("", "")])
+def test_captured_pages(name, url):
+    if not name:
+        pytest.skip(
+            "no captured product pages: run "
+            "tests/capture_product_pages.py --crawl-pages 4"
+        )
+    html = (PAGES_DIR / name).read_text(encoding="utf-8")
+    assert_parity(html, url, scoped=True)
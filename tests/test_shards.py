@@ -0,0 +1,113 @@
+import random
+
+import numpy as np
+import pytest
+
+from retrieval import search
+from retrieval.catalog import build_catalog_store
+from retrieval.catalogs import IndexBundle, use_bundle
+from retrieval.shards import ShardedIndex
+
+
+# =========================================================
+# CONFIG
+# =========================================================
+NUM_ROWS = 300
+DIM = 32
+SEED = 11
+
+WORDS = [
+    "java",
+    "python",
+    "sql",
+    "excel",
+    "leadership",
+    "communication",
+    "sales",
+    "numerical",
+    "verbal",
+    "reasoning",
+    "customer",
+    "service",
+    "manager",
+    "developer",
+    "graduate",
+]
+QUERIES = [
+    "java developer with sql",
+    "communication and leadership for a sales manager",
+    "numerical reasoning graduate",
+    "unknownterm",
+]
+
+
+# =========================================================
+# FIXTURES
+# =========================================================
+@pytest.fixture(scope="module")
+def index_dir(tmp_path_factory):
+    """Small named catalog: random text rows and unit vectors."""
+    rng = random.Random(SEED)
+    records = [
+        {
+            "assessment_id": f"shl_{i:05d}",
+            "name": " ".join(rng.sample(WORDS, 2)).title(),
+            "description": " ".join(rng.choices(WORDS, k=12)),
+            "test_type": rng.sample(["A", "K", "P", "S"], 2),
+            "job_levels": rng.choice(["graduate", "manager", None]),
+            "languages": "english",
+        }
+        for i in range(NUM_ROWS)
+    ]
+    directory = tmp_path_factory.mktemp("shard_catalog")
+    build_catalog_store(records, directory / "catalog")
+
+    vectors = np.random.default_rng(SEED).standard_normal((NUM_ROWS, DIM))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.save(directory / "embeddings.npy", vectors.astype("float32"))
+    return directory
+
+
+def query_vector(i: int) -> np.ndarray:
+    vec = np.random.default_rng(i).standard_normal((1, DIM)).astype("float32")
+    return vec / np.linalg.norm(vec)
+
+
+# =========================================================
+# TESTS
+# =========================================================
+@pytest.mark.parametrize("backend", ["local", "process"])
+def test_sharded_topk_matches_single_index(index_dir, backend):
+    bundle = IndexBundle("shard-test", index_dir)
+    sharded = ShardedIndex(3, index_dir, backend=backend)
+    try:
+        with use_bundle(bundle):
+            for i, query in enumerate(QUERIES):
+                q_vec, tokens = query_vector(i), search.query_tokens(query)
+
+                single = (search.vector_search(q_vec), search.bm25_search(tokens))
+                merged = sharded.search(
+                    q_vec, tokens, search.TOP_K_VECTOR, search.TOP_K_BM25
+                )
+
+                for expected, got in zip(single, merged):
+                    assert sorted(got) == sorted(expected)
+                    assert got == pytest.approx(expected, abs=1e-6)
+
+                # The fused pool (what search() returns) is identical too
+                single_pool = search.fuse_candidates(*single)
+                sharded_pool = search.fuse_candidates(*merged)
+                assert sharded_pool.rows.tolist() == single_pool.rows.tolist()
+    finally:
+        sharded.close()
+
+
+def test_vector_ties_resolve_to_lower_row(index_dir):
+    sharded = ShardedIndex(3, index_dir, backend="local")
+    try:
+        # Every row scores 0: the top-k is the k lowest rows in any layout
+        q_vec = np.zeros((1, DIM), dtype="float32")
+        vector_results, _ = sharded.search(q_vec, ["java"], 10, 10)
+        assert list(vector_results) == list(range(10))
+    finally:
+        sharded.close()